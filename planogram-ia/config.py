@@ -2,4 +2,31 @@ import os
 
 # Chemin absolu vers le fichier dataset
 #DATA_PATH = r"C:\Users\Dell\Desktop\Smart-Store\SmartStore-IA\dataset.csv"
-DATA_PATH = 'data/dataset.csv'
\ No newline at end of file
+DATA_PATH = 'data/dataset.csv'
+
+# Artefact des modèles entraînés (généré par main_pipeline.py, chargé au démarrage de l'API/Streamlit)
+MODEL_PATH = 'models/planogram_models.joblib'
+
+# Pool de génération de l'API : workers hors boucle asyncio et file d'attente bornée (503 au-delà)
+GENERATION_WORKERS = 2
+GENERATION_QUEUE_LIMIT = 8
+GENERATION_RETRY_AFTER = 5  # secondes, en-tête Retry-After des réponses 503
+
+# File de jobs asynchrones : workers, nombre maximal de jobs en attente, stockage des résultats
+JOB_WORKERS = 2
+JOB_QUEUE_LIMIT = 32
+JOBS_DIR = 'outputs/jobs'
+# Rétention des jobs terminés (mémoire et disque) : durée maximale et nombre maximal conservés
+JOB_RETENTION_SECONDS = 24 * 3600
+JOB_RETENTION_COUNT = 200
+
+# Cache des planogrammes générés (LRU + expiration)
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_TTL = 900  # secondes
+
+# Catalogue servi par l'API : CSV (DATA_PATH), Parquet (.parquet) ou SQLite (.db/.sqlite, table DATA_TABLE)
+DATA_TABLE = 'planogram_data'
+DATA_RELOAD_INTERVAL = 30  # secondes entre deux vérifications de modification (0 = désactivé)
+
+# Nombre de lignes (meubles + positions) sérialisées par bloc dans les réponses NDJSON
+STREAM_CHUNK_SIZE = 5000
@@ -1,8 +1,15 @@
 import pandas as pd
 import numpy as np
 import json
+import os
+import hashlib
+import time
+import threading
+import copy
+import bisect
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, List, Tuple, Any, Optional, Iterator
 import warnings
 
 warnings.filterwarnings('ignore')
@@ -13,6 +20,88 @@ from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
 from sklearn.metrics import mean_squared_error, accuracy_score
 import xgboost as xgb
+import joblib
+from joblib import Parallel, delayed
+
+# Sérialiseur JSON rapide optionnel (repli sur la bibliothèque standard)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+# Version du format d'artefact des modèles entraînés (à incrémenter si la structure change)
+MODEL_ARTIFACT_VERSION = 1
+DEFAULT_MODEL_PATH = "models/planogram_models.joblib"
+
+# Version du prétraitement : à incrémenter à chaque changement de preprocess_data (invalide le cache)
+PREPROCESSING_VERSION = 1
+DEFAULT_CACHE_DIR = "cache"
+
+# Colonnes de regroupement pour la génération par lots (un planogramme par couple magasin/catégorie)
+BATCH_GROUP_COLUMNS = ('input_magasin_id', 'input_categorie_id')
+
+# Schéma explicite des colonnes d'entrée pour la lecture par blocs (les autres colonnes sont inférées)
+CATEGORICAL_INPUT_COLUMNS = [
+    'input_magasin_id', 'input_categorie_id', 'input_zone_id', 'input_nom_magasin_magasin', 'input_nom_zone',
+    'input_nom_categorie', 'input_saisonnalite_produit', 'input_saisonnalite_categorie',
+    'input_conditionnement_produit', 'input_contrainte_conditionnement_produit', 'input_emplacement_zone',
+    'input_temperature_zone', 'input_eclairage_zone', 'input_type_promotion', 'input_etat_promotion',
+    'input_type_mouvement', 'input_type_contrainte_legal', 'input_type_event', 'input_placement_exige_supplier',
+    'input_zone_exposition_preferee_categorie', 'input_clientele_ciblee_categorie'
+]
+FLOAT32_INPUT_COLUMNS = [
+    'input_prix_produit', 'input_longueur_produit', 'input_largeur_produit', 'input_hauteur_produit',
+    'input_surface_magasin', 'input_longueur_magasin', 'input_largeur_magasin',
+    'input_longueur_zone', 'input_largeur_zone', 'input_hauteur_zone'
+]
+INPUT_DTYPES = {
+    **{col: 'category' for col in CATEGORICAL_INPUT_COLUMNS},
+    **{col: 'float32' for col in FLOAT32_INPUT_COLUMNS}
+}
+
+
+def resolve_n_jobs(n_jobs: Optional[int]) -> int:
+    """Convertit un budget n_jobs (None, -1, ...) en nombre de cœurs effectif"""
+    cpu_count = os.cpu_count() or 1
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, cpu_count + 1 + n_jobs)
+    return min(n_jobs, cpu_count)
+
+
+def _fit_estimator(name: str, estimator, X_train, y_train) -> Tuple[str, Any, float]:
+    """Entraîne un estimateur et mesure son temps d'entraînement (exécuté dans un worker)"""
+    start_time = time.perf_counter()
+    estimator.fit(X_train, y_train)
+    return name, estimator, time.perf_counter() - start_time
+
+
+def fit_estimators(tasks: List[Tuple[str, Any, Any, Any]], n_jobs: int = 1) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Entraîne des estimateurs indépendants en parallèle dans un budget de n_jobs cœurs
+
+    Le budget est réparti entre les workers (un modèle à la fois par worker) et les threads
+    internes de chaque estimateur, pour éviter la sur-souscription.
+    Retourne les estimateurs entraînés et le temps d'entraînement de chacun.
+    """
+    n_jobs = resolve_n_jobs(n_jobs)
+    n_workers = max(1, min(n_jobs, len(tasks)))
+    inner_jobs = max(1, n_jobs // n_workers)
+
+    for _, estimator, _, _ in tasks:
+        estimator.set_params(n_jobs=inner_jobs)
+
+    if n_workers == 1:
+        results = [_fit_estimator(*task) for task in tasks]
+    else:
+        results = Parallel(n_jobs=n_workers, backend='loky')(delayed(_fit_estimator)(*task) for task in tasks)
+
+    fitted, timings = {}, {}
+    for name, estimator, seconds in results:
+        fitted[name] = estimator
+        timings[name] = seconds
+    return fitted, timings
 
 
 class DataProcessor:
@@ -21,6 +110,8 @@ class DataProcessor:
     def __init__(self, csv_path: str):
         self.csv_path = csv_path
         self.label_encoders = {}
+        # Médianes des colonnes numériques apprises au premier prétraitement (valeurs manquantes)
+        self.numeric_medians = {}
         self.scaler = StandardScaler()
 
     def load_data(self) -> pd.DataFrame:
@@ -33,19 +124,62 @@ class DataProcessor:
             print(f"❌ Erreur lors du chargement: {e}")
             return pd.DataFrame()
 
+    def load_data_chunks(self, chunksize: int = 50000, columns: List[str] = None,
+                         **read_csv_kwargs) -> Iterator[pd.DataFrame]:
+        """Lit le fichier CSV par blocs avec un schéma de types explicite (mémoire bornée)
+
+        Les colonnes d'identifiants et de libellés sont lues en 'category', les dimensions
+        en float32. `columns` permet de ne lire qu'un sous-ensemble de colonnes ; les autres
+        arguments (sep, encoding, decimal...) sont transmis à pd.read_csv.
+        """
+        header = pd.read_csv(self.csv_path, nrows=0, **read_csv_kwargs).columns
+        usecols = [col for col in header if columns is None or col in columns]
+        dtypes = {col: dtype for col, dtype in INPUT_DTYPES.items() if col in usecols}
+
+        n_rows = 0
+        n_chunks = 0
+        for chunk in pd.read_csv(self.csv_path, usecols=usecols, dtype=dtypes, chunksize=chunksize,
+                                 **read_csv_kwargs):
+            n_rows += len(chunk)
+            n_chunks += 1
+            yield chunk
+
+        print(f"✅ Données lues par blocs: {n_rows} lignes, {n_chunks} bloc(s) de {chunksize} lignes max")
+
+    def iter_preprocessed_chunks(self, chunksize: int = 50000, columns: List[str] = None,
+                                 **read_csv_kwargs) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """Lit et prétraite le fichier CSV bloc par bloc : paires (bloc brut, bloc prétraité)
+
+        Les encodeurs et les médianes sont ajustés sur le premier bloc (ou repris d'un artefact
+        chargé) ; les valeurs inconnues des blocs suivants sont encodées à -1. Avec un artefact,
+        le résultat ne dépend ni de chunksize ni de l'ordre des lignes.
+        """
+        for chunk in self.load_data_chunks(chunksize, columns, **read_csv_kwargs):
+            yield chunk, self.preprocess_data(chunk)
+
     def preprocess_data(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Prétraite les données pour l'entraînement ML"""
+        """Prétraite les données pour l'entraînement ML
+
+        Les valeurs numériques manquantes sont remplacées par la médiane apprise au premier
+        prétraitement (données d'entraînement), pas par celle des données reçues.
+        """
         if data.empty:
             return data
 
         processed_data = data.copy()
 
+        # Colonnes 'category' (lecture par blocs) : encodées comme les colonnes texte
+        for col in processed_data.select_dtypes(include=['category']).columns:
+            processed_data[col] = processed_data[col].astype(object)
+
         # Gestion des valeurs manquantes
         for col in processed_data.columns:
             if processed_data[col].dtype == 'object':
                 processed_data[col] = processed_data[col].fillna('unknown')
             else:
-                processed_data[col] = processed_data[col].fillna(processed_data[col].median())
+                if col not in self.numeric_medians:
+                    self.numeric_medians[col] = float(processed_data[col].median())
+                processed_data[col] = processed_data[col].fillna(self.numeric_medians[col])
 
         # Encodage des variables catégorielles
         categorical_columns = processed_data.select_dtypes(include=['object']).columns
@@ -54,7 +188,9 @@ class DataProcessor:
                 self.label_encoders[col] = LabelEncoder()
                 processed_data[col] = self.label_encoders[col].fit_transform(processed_data[col])
             else:
-                processed_data[col] = self.label_encoders[col].transform(processed_data[col])
+                # Encodeur déjà entraîné : les valeurs inconnues sont encodées à -1
+                mapping = {label: code for code, label in enumerate(self.label_encoders[col].classes_)}
+                processed_data[col] = processed_data[col].map(mapping).fillna(-1).astype('int64')
 
         # Features dérivées
         if 'input_longueur_produit' in processed_data.columns and 'input_largeur_produit' in processed_data.columns:
@@ -69,11 +205,129 @@ class DataProcessor:
         return processed_data
 
 
+class DatasetCache:
+    """Cache disque colonnaire (Parquet) des jeux de données, indexé par le contenu du CSV source"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._hashes = {}
+
+    @staticmethod
+    def is_available() -> bool:
+        """Indique si un moteur Parquet (pyarrow) est installé"""
+        try:
+            import pyarrow  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    @staticmethod
+    def _content_hash(file_path: str) -> str:
+        """Empreinte SHA-256 du contenu du fichier, lu par blocs"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def file_hash(self, file_path: str) -> str:
+        """Empreinte du contenu du fichier, recalculée seulement quand sa signature (chemin, mtime, taille) change
+
+        La dernière empreinte est conservée à côté des entrées du cache : une nouvelle instance ou un
+        nouveau processus ne relit pas le fichier tant qu'il n'a pas été modifié.
+        """
+        stat = os.stat(file_path)
+        signature = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        if signature in self._hashes:
+            return self._hashes[signature]
+
+        signature_path = os.path.join(self.cache_dir, f"{self._source_prefix(file_path)}.sig")
+        try:
+            stored = joblib.load(signature_path) if os.path.exists(signature_path) else {}
+        except Exception:
+            stored = {}
+        if stored.get('signature') == signature:
+            self._hashes[signature] = stored['hash']
+            return stored['hash']
+
+        self._hashes[signature] = self._content_hash(file_path)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            joblib.dump({'signature': signature, 'hash': self._hashes[signature]}, signature_path)
+        except OSError as e:
+            print(f"⚠️ Impossible d'enregistrer l'empreinte de {file_path}: {e}")
+        return self._hashes[signature]
+
+    @staticmethod
+    def _source_prefix(source_path: str) -> str:
+        """Préfixe commun aux fichiers de cache d'un fichier source (nom et empreinte du chemin)"""
+        name = os.path.splitext(os.path.basename(source_path))[0]
+        path_digest = hashlib.sha256(os.path.abspath(source_path).encode('utf-8')).hexdigest()[:8]
+        return f"{name}_{path_digest}"
+
+    def _entry_prefix(self, source_path: str, kind: str) -> str:
+        """Préfixe des entrées de cache d'un fichier source et d'un type de données"""
+        return f"{self._source_prefix(source_path)}_{kind}_"
+
+    def _entry_path(self, source_path: str, kind: str, key_extra: str = "") -> str:
+        """Chemin de l'entrée : source, type, version du prétraitement et empreinte du contenu"""
+        digest = hashlib.sha256(f"{self.file_hash(source_path)}|{key_extra}".encode('utf-8')).hexdigest()[:16]
+        name = f"{self._entry_prefix(source_path, kind)}v{PREPROCESSING_VERSION}_{digest}"
+        return os.path.join(self.cache_dir, name)
+
+    def load(self, source_path: str, kind: str,
+             key_extra: str = "") -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        """Retourne (données, métadonnées) depuis le cache, ou None si absent ou invalidé"""
+        if not self.is_available() or not os.path.exists(source_path):
+            return None
+
+        entry_path = self._entry_path(source_path, kind, key_extra)
+        if not os.path.exists(f"{entry_path}.parquet"):
+            return None
+
+        try:
+            data = pd.read_parquet(f"{entry_path}.parquet")
+            metadata = joblib.load(f"{entry_path}.meta") if os.path.exists(f"{entry_path}.meta") else {}
+            print(f"⚡ Cache {kind} utilisé: {entry_path}.parquet")
+            return data, metadata
+        except Exception as e:
+            print(f"⚠️ Cache {kind} illisible, rechargement depuis le CSV: {e}")
+            return None
+
+    def save(self, source_path: str, kind: str, data: pd.DataFrame,
+             metadata: Dict[str, Any] = None, key_extra: str = "") -> bool:
+        """Écrit les données en Parquet et supprime les entrées obsolètes du même fichier source"""
+        if not self.is_available():
+            print("⚠️ pyarrow non installé : cache Parquet désactivé")
+            return False
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entry_path = self._entry_path(source_path, kind, key_extra)
+
+            # Invalidation : anciennes versions du même fichier source et du même type
+            prefix = self._entry_prefix(source_path, kind)
+            for name in os.listdir(self.cache_dir):
+                if name.startswith(prefix) and not os.path.join(self.cache_dir, name).startswith(entry_path):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+            data.to_parquet(f"{entry_path}.parquet", index=False)
+            if metadata:
+                joblib.dump(metadata, f"{entry_path}.meta")
+            return True
+        except Exception as e:
+            print(f"⚠️ Impossible d'écrire le cache {kind}: {e}")
+            return False
+
+
 class FurnitureTypePredictor:
     """Prédicteur pour les types de meubles"""
 
-    def __init__(self):
+    def __init__(self, random_state: int = 42):
         self.model = None
+        self.label_encoder = None
+        # Graine du générateur utilisé pour les labels synthétiques
+        self.random_state = random_state
         self.furniture_types = {
             1: {"name": "planogram", "faces": 1, "description": "Planogramme standard"},
             2: {"name": "gondola", "faces": 2, "description": "Gondole 2 faces"},
@@ -89,8 +343,8 @@ class FurnitureTypePredictor:
             12: {"name": "clothing-wall", "faces": 1, "description": "Mur vêtements"}
         }
 
-    def train(self, X: pd.DataFrame, y: pd.Series = None):
-        """Entraîne le modèle de prédiction des types de meubles"""
+    def train(self, X: pd.DataFrame, y: pd.Series = None, n_jobs: int = 1) -> Dict[str, float]:
+        """Entraîne le modèle de prédiction des types de meubles (retourne le temps d'entraînement)"""
         if y is None:
             # Génération de labels basée sur les règles métier
             y = self._generate_furniture_type_labels(X)
@@ -100,38 +354,42 @@ class FurnitureTypePredictor:
             n_estimators=100,
             max_depth=6,
             learning_rate=0.1,
-            random_state=42
+            random_state=42,
+            n_jobs=resolve_n_jobs(n_jobs)
         )
 
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        self.model.fit(X_train, y_train)
+
+        # XGBoost attend des classes contiguës 0..n-1 : encodage des types de meubles
+        self.label_encoder = LabelEncoder()
+        _, self.model, fit_time = _fit_estimator('type', self.model, X_train, self.label_encoder.fit_transform(y_train))
 
         # Évaluation
-        y_pred = self.model.predict(X_test)
+        y_pred = self.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
-        print(f"✅ Modèle type de meuble entraîné - Précision: {accuracy:.3f}")
+        print(f"✅ Modèle type de meuble entraîné - Précision: {accuracy:.3f} ({fit_time:.2f}s)")
+        return {'type': fit_time}
 
     def _generate_furniture_type_labels(self, X: pd.DataFrame) -> pd.Series:
-        """Génère des labels basés sur les règles métier"""
-        labels = []
-
-        for _, row in X.iterrows():
-            # Règles basées sur les contraintes de température
-            if 'input_contrainte_temperature_produit' in X.columns:
-                temp_constraint = row.get('input_contrainte_temperature_produit', 0)
-                if temp_constraint == 1:  # Froid
-                    labels.append(np.random.choice([9, 10]))  # Réfrigérateur ou vitrine
-                else:
-                    # Règles basées sur la catégorie
-                    category = row.get('input_categorie_id', 0)
-                    if category % 4 == 0:
-                        labels.append(4)  # Clothing rack
-                    elif category % 3 == 0:
-                        labels.append(2)  # Gondola
-                    else:
-                        labels.append(1)  # Planogram standard
-            else:
-                labels.append(np.random.choice(list(self.furniture_types.keys())))
+        """Génère des labels basés sur les règles métier (évaluation vectorisée)"""
+        rng = np.random.default_rng(self.random_state)
+        n_samples = len(X)
+
+        if 'input_contrainte_temperature_produit' not in X.columns:
+            return pd.Series(rng.choice(list(self.furniture_types.keys()), size=n_samples))
+
+        temp_constraints = X['input_contrainte_temperature_produit'].to_numpy()
+        if 'input_categorie_id' in X.columns:
+            categories = X['input_categorie_id'].to_numpy()
+        else:
+            categories = np.zeros(n_samples, dtype=int)
+
+        # Règles dans l'ordre de priorité : froid → réfrigérateur ou vitrine, puis règles par catégorie
+        labels = np.select(
+            [temp_constraints == 1, categories % 4 == 0, categories % 3 == 0],
+            [rng.choice([9, 10], size=n_samples), 4, 2],  # Réfrigérés, clothing rack, gondola
+            default=1  # Planogram standard
+        )
 
         return pd.Series(labels)
 
@@ -139,13 +397,82 @@ class FurnitureTypePredictor:
         """Prédit les types de meubles"""
         if self.model is None:
             return np.random.choice(list(self.furniture_types.keys()), size=len(X))
-        return self.model.predict(X)
+        return self.label_encoder.inverse_transform(self.model.predict(X))
+
+    def get_state(self) -> Dict[str, Any]:
+        """Retourne l'état entraîné du prédicteur (pour la sauvegarde)"""
+        return {'model': self.model, 'label_encoder': self.label_encoder}
+
+    def set_state(self, state: Dict[str, Any]):
+        """Restaure l'état entraîné du prédicteur"""
+        self.model = state.get('model')
+        self.label_encoder = state.get('label_encoder')
+
+
+# Spécifications par type de meuble avec nombre de faces
+FURNITURE_SPECS = {
+    1: {'largeur': 120, 'hauteur': 180, 'profondeur': 40, 'faces': 1, 'etageres': 4, 'colonnes': 5},
+    2: {'largeur': 150, 'hauteur': 200, 'profondeur': 45, 'faces': 2, 'etageres': 5, 'colonnes': 6},
+    3: {'largeur': 100, 'hauteur': 160, 'profondeur': 35, 'faces': 4, 'etageres': 4, 'colonnes': 4},
+    4: {'largeur': 80, 'hauteur': 180, 'profondeur': 30, 'faces': 1, 'etageres': 1, 'colonnes': 8},
+    5: {'largeur': 200, 'hauteur': 250, 'profondeur': 20, 'faces': 1, 'etageres': 6, 'colonnes': 8},
+    6: {'largeur': 60, 'hauteur': 120, 'profondeur': 25, 'faces': 1, 'etageres': 3, 'colonnes': 3},
+    7: {'largeur': 50, 'hauteur': 50, 'profondeur': 50, 'faces': 1, 'etageres': 2, 'colonnes': 2},
+    8: {'largeur': 120, 'hauteur': 80, 'profondeur': 60, 'faces': 1, 'etageres': 1, 'colonnes': 4},
+    9: {'largeur': 60, 'hauteur': 180, 'profondeur': 60, 'faces': 1, 'etageres': 4, 'colonnes': 2},
+    10: {'largeur': 150, 'hauteur': 120, 'profondeur': 50, 'faces': 1, 'etageres': 3, 'colonnes': 5},
+    11: {'largeur': 100, 'hauteur': 200, 'profondeur': 40, 'faces': 1, 'etageres': 5, 'colonnes': 4},
+    12: {'largeur': 300, 'hauteur': 250, 'profondeur': 30, 'faces': 1, 'etageres': 8, 'colonnes': 12}
+}
+
+
+def build_spec_table(specs: Dict[int, Dict[str, int]] = None) -> Dict[str, np.ndarray]:
+    """Convertit les spécifications en tableaux NumPy indexés par id de type de meuble
+
+    L'index 0 et les types inconnus reprennent les spécifications du type 1 (planogram).
+    """
+    specs = FURNITURE_SPECS if specs is None else specs
+    size = max(specs) + 1
+    return {
+        field: np.array([specs.get(furniture_type, specs[1])[field] for furniture_type in range(size)])
+        for field in specs[1]
+    }
+
+
+def spec_index(furniture_types: np.ndarray, table_size: int) -> np.ndarray:
+    """Index dans la table des spécifications (types hors table → type 1)"""
+    furniture_types = np.asarray(furniture_types).astype(int)
+    return np.where((furniture_types > 0) & (furniture_types < table_size), furniture_types, 1)
+
+
+# Noms des types de meubles et faces disponibles selon le nombre de faces (sortie JSON)
+FURNITURE_TYPE_NAMES = {
+    1: "planogram", 2: "gondola", 3: "shelves-display", 4: "clothing-rack",
+    5: "wall-display", 6: "accessory-display", 7: "modular-cube", 8: "table",
+    9: "refrigerator", 10: "refrigerated-showcase", 11: "clothing-display", 12: "clothing-wall"
+}
+AVAILABLE_FACES = {
+    1: ['front'],
+    2: ['front', 'back'],
+    4: ['front', 'back', 'left', 'right']
+}
 
 
 class FurnitureDimensionPredictor:
     """Prédicteur pour les dimensions des meubles"""
 
-    def __init__(self):
+    # Dimensions continues (régression) et nombres d'étagères/colonnes (classification)
+    CONTINUOUS_DIMENSIONS = ['largeur', 'hauteur', 'profondeur']
+    COUNT_DIMENSIONS = ['nb_etageres_unique_face', 'nb_colonnes_unique_face', 'nb_etageres_front_back',
+                        'nb_colonnes_front_back', 'nb_etageres_left_right', 'nb_colonnes_left_right']
+
+    def __init__(self, random_state: int = 42, multi_output: bool = False):
+        # Graine du générateur utilisé pour les targets synthétiques
+        self.random_state = random_state
+        self.spec_table = build_spec_table()
+        # Mode multi-sorties : un régresseur pour les 3 dimensions, un classifieur pour les 6 comptages
+        self.multi_output = multi_output
+        self.multi_output_models = {'continuous': None, 'counts': None}
         # Modèles selon le nombre de faces
         self.models = {
             'largeur': None,
@@ -162,102 +489,109 @@ class FurnitureDimensionPredictor:
             'nb_colonnes_left_right': None
         }
 
-    def train(self, X: pd.DataFrame, furniture_types: np.ndarray):
-        """Entraîne les modèles de prédiction des dimensions"""
+    def train(self, X: pd.DataFrame, furniture_types: np.ndarray, n_jobs: int = 1) -> Dict[str, float]:
+        """Entraîne les modèles de prédiction des dimensions (modèles indépendants en parallèle)
+
+        Retourne le temps d'entraînement de chaque modèle.
+        """
         # Génération des targets basée sur les types de meubles
         targets = self._generate_dimension_targets(X, furniture_types)
 
+        if self.multi_output:
+            return self._train_multi_output(X, targets, n_jobs)
+
+        tasks, test_sets = [], {}
         for dimension, target in targets.items():
-            if dimension in ['nb_etageres_unique_face', 'nb_colonnes_unique_face', 'nb_etageres_front_back',
-                             'nb_colonnes_front_back', 'nb_etageres_left_right', 'nb_colonnes_left_right']:
+            if dimension in self.COUNT_DIMENSIONS:
                 # Classification pour les nombres entiers
-                self.models[dimension] = RandomForestClassifier(n_estimators=50, random_state=42)
+                estimator = RandomForestClassifier(n_estimators=50, random_state=42)
             else:
                 # Régression pour les dimensions continues
-                self.models[dimension] = RandomForestRegressor(n_estimators=50, random_state=42)
+                estimator = RandomForestRegressor(n_estimators=50, random_state=42)
 
             X_train, X_test, y_train, y_test = train_test_split(X, target, test_size=0.2, random_state=42)
-            self.models[dimension].fit(X_train, y_train)
+            tasks.append((dimension, estimator, X_train, y_train))
+            test_sets[dimension] = (X_test, y_test)
+
+        fitted, timings = fit_estimators(tasks, n_jobs)
+        self.models.update(fitted)
 
-            # Évaluation
+        # Évaluation
+        for dimension, (X_test, y_test) in test_sets.items():
             y_pred = self.models[dimension].predict(X_test)
-            if dimension in ['nb_etageres_unique_face', 'nb_colonnes_unique_face', 'nb_etageres_front_back',
-                             'nb_colonnes_front_back', 'nb_etageres_left_right', 'nb_colonnes_left_right']:
+            if dimension in self.COUNT_DIMENSIONS:
                 score = accuracy_score(y_test, y_pred)
-                print(f"✅ Modèle {dimension} entraîné - Précision: {score:.3f}")
+                print(f"✅ Modèle {dimension} entraîné - Précision: {score:.3f} ({timings[dimension]:.2f}s)")
             else:
                 score = mean_squared_error(y_test, y_pred, squared=False)
-                print(f"✅ Modèle {dimension} entraîné - RMSE: {score:.3f}")
+                print(f"✅ Modèle {dimension} entraîné - RMSE: {score:.3f} ({timings[dimension]:.2f}s)")
+
+        return timings
+
+    def _train_multi_output(self, X: pd.DataFrame, targets: Dict[str, np.ndarray], n_jobs: int = 1) -> Dict[str, float]:
+        """Entraîne un modèle multi-sorties par famille de targets (un seul découpage train/test)"""
+        y_continuous = np.column_stack([targets[dimension] for dimension in self.CONTINUOUS_DIMENSIONS])
+        y_counts = np.column_stack([targets[dimension] for dimension in self.COUNT_DIMENSIONS])
+
+        X_train, X_test, yc_train, yc_test, yn_train, yn_test = train_test_split(
+            X, y_continuous, y_counts, test_size=0.2, random_state=42)
+
+        fitted, timings = fit_estimators([
+            ('continuous', RandomForestRegressor(n_estimators=50, random_state=42), X_train, yc_train),
+            ('counts', RandomForestClassifier(n_estimators=50, random_state=42), X_train, yn_train)
+        ], n_jobs)
+        self.multi_output_models.update(fitted)
+
+        # Évaluation par dimension
+        yc_pred = self.multi_output_models['continuous'].predict(X_test)
+        for i, dimension in enumerate(self.CONTINUOUS_DIMENSIONS):
+            score = mean_squared_error(yc_test[:, i], yc_pred[:, i], squared=False)
+            print(f"✅ Modèle {dimension} (multi-sorties) entraîné - RMSE: {score:.3f}")
+
+        yn_pred = self.multi_output_models['counts'].predict(X_test)
+        for i, dimension in enumerate(self.COUNT_DIMENSIONS):
+            score = accuracy_score(yn_test[:, i], yn_pred[:, i])
+            print(f"✅ Modèle {dimension} (multi-sorties) entraîné - Précision: {score:.3f}")
+
+        print(f"⏱️ Multi-sorties - continues: {timings['continuous']:.2f}s, entières: {timings['counts']:.2f}s")
+        return timings
 
     def _generate_dimension_targets(self, X: pd.DataFrame, furniture_types: np.ndarray) -> Dict[str, np.ndarray]:
-        """Génère les dimensions cibles basées sur les types de meubles et leurs faces"""
+        """Génère les dimensions cibles basées sur les types de meubles et leurs faces (vectorisé)"""
         targets = {}
+        rng = np.random.default_rng(self.random_state)
+        n_samples = len(furniture_types)
 
-        # Spécifications par type de meuble avec nombre de faces
-        furniture_specs = {
-            1: {'largeur': 120, 'hauteur': 180, 'profondeur': 40, 'faces': 1, 'etageres': 4, 'colonnes': 5},
-            2: {'largeur': 150, 'hauteur': 200, 'profondeur': 45, 'faces': 2, 'etageres': 5, 'colonnes': 6},
-            3: {'largeur': 100, 'hauteur': 160, 'profondeur': 35, 'faces': 4, 'etageres': 4, 'colonnes': 4},
-            4: {'largeur': 80, 'hauteur': 180, 'profondeur': 30, 'faces': 1, 'etageres': 1, 'colonnes': 8},
-            5: {'largeur': 200, 'hauteur': 250, 'profondeur': 20, 'faces': 1, 'etageres': 6, 'colonnes': 8},
-            6: {'largeur': 60, 'hauteur': 120, 'profondeur': 25, 'faces': 1, 'etageres': 3, 'colonnes': 3},
-            7: {'largeur': 50, 'hauteur': 50, 'profondeur': 50, 'faces': 1, 'etageres': 2, 'colonnes': 2},
-            8: {'largeur': 120, 'hauteur': 80, 'profondeur': 60, 'faces': 1, 'etageres': 1, 'colonnes': 4},
-            9: {'largeur': 60, 'hauteur': 180, 'profondeur': 60, 'faces': 1, 'etageres': 4, 'colonnes': 2},
-            10: {'largeur': 150, 'hauteur': 120, 'profondeur': 50, 'faces': 1, 'etageres': 3, 'colonnes': 5},
-            11: {'largeur': 100, 'hauteur': 200, 'profondeur': 40, 'faces': 1, 'etageres': 5, 'colonnes': 4},
-            12: {'largeur': 300, 'hauteur': 250, 'profondeur': 30, 'faces': 1, 'etageres': 8, 'colonnes': 12}
-        }
+        # Spécifications de chaque ligne par indexation dans la table
+        index = spec_index(furniture_types, len(self.spec_table['faces']))
+        faces = self.spec_table['faces'][index]
+
+        # Tirages de variabilité en un seul lot : bruit gaussien (dimensions), bruit entier (étagères/colonnes)
+        gaussian_noise = rng.normal(0, 1, size=(3, n_samples))
+        integer_noise = rng.integers(-1, 2, size=(2, 2, n_samples))
 
         # Génération des dimensions de base
-        for dimension in ['largeur', 'hauteur', 'profondeur']:
-            values = []
-            for furniture_type in furniture_types:
-                base_value = furniture_specs.get(furniture_type, furniture_specs[1])[dimension]
-                # Ajout de variabilité
-                values.append(max(10, base_value + np.random.normal(0, base_value * 0.1)))
-            targets[dimension] = np.array(values)
+        for i, dimension in enumerate(['largeur', 'hauteur', 'profondeur']):
+            base_value = self.spec_table[dimension][index]
+            targets[dimension] = np.maximum(10, base_value + gaussian_noise[i] * base_value * 0.1)
 
         # Génération des étagères et colonnes selon le nombre de faces
-        for dimension_type in ['etageres', 'colonnes']:
-            # Initialisation des arrays pour chaque configuration
-            unique_face_values = []
-            front_back_values = []
-            left_right_values = []
-
-            for furniture_type in furniture_types:
-                spec = furniture_specs.get(furniture_type, furniture_specs[1])
-                faces = spec['faces']
-                base_value = spec[dimension_type]
-
-                # Ajout de variabilité
-                varied_value = max(1, base_value + np.random.randint(-1, 2))
-
-                if faces == 1:
-                    # 1 face : utiliser unique_face
-                    unique_face_values.append(varied_value)
-                    front_back_values.append(0)  # Non utilisé
-                    left_right_values.append(0)  # Non utilisé
-                elif faces == 2:
-                    # 2 faces : utiliser front_back
-                    unique_face_values.append(0)  # Non utilisé
-                    front_back_values.append(varied_value)
-                    left_right_values.append(0)  # Non utilisé
-                elif faces == 4:
-                    # 4 faces : utiliser front_back et left_right
-                    unique_face_values.append(0)  # Non utilisé
-                    front_back_values.append(varied_value)
-                    left_right_values.append(max(1, varied_value + np.random.randint(-1, 2)))
-
-            # Attribution aux targets
-            targets[f'nb_{dimension_type}_unique_face'] = np.array(unique_face_values)
-            targets[f'nb_{dimension_type}_front_back'] = np.array(front_back_values)
-            targets[f'nb_{dimension_type}_left_right'] = np.array(left_right_values)
+        for i, dimension_type in enumerate(['etageres', 'colonnes']):
+            varied_value = np.maximum(1, self.spec_table[dimension_type][index] + integer_noise[i, 0])
+
+            # 1 face : unique_face ; 2 faces : front_back ; 4 faces : front_back et left_right
+            targets[f'nb_{dimension_type}_unique_face'] = np.where(faces == 1, varied_value, 0)
+            targets[f'nb_{dimension_type}_front_back'] = np.where(np.isin(faces, [2, 4]), varied_value, 0)
+            targets[f'nb_{dimension_type}_left_right'] = np.where(
+                faces == 4, np.maximum(1, varied_value + integer_noise[i, 1]), 0)
 
         return targets
 
     def predict(self, X: pd.DataFrame, furniture_types: np.ndarray) -> Dict[str, np.ndarray]:
         """Prédit les dimensions des meubles selon leur nombre de faces"""
+        if self.multi_output_models['continuous'] is not None:
+            return self._predict_multi_output(X)
+
         predictions = {}
 
         # Mapping des types vers le nombre de faces
@@ -307,6 +641,991 @@ class FurnitureDimensionPredictor:
 
         return predictions
 
+    def _predict_multi_output(self, X: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Prédit les 9 dimensions en une passe par modèle multi-sorties"""
+        continuous = self.multi_output_models['continuous'].predict(X).reshape(len(X), -1)
+        counts = self.multi_output_models['counts'].predict(X).reshape(len(X), -1)
+
+        predictions = {dimension: continuous[:, i] for i, dimension in enumerate(self.CONTINUOUS_DIMENSIONS)}
+        predictions.update({dimension: counts[:, i] for i, dimension in enumerate(self.COUNT_DIMENSIONS)})
+        return predictions
+
+    def get_state(self) -> Dict[str, Any]:
+        """Retourne l'état entraîné du prédicteur (pour la sauvegarde)"""
+        return {
+            'models': dict(self.models),
+            'multi_output': self.multi_output,
+            'multi_output_models': dict(self.multi_output_models)
+        }
+
+    def set_state(self, state: Dict[str, Any]):
+        """Restaure l'état entraîné du prédicteur"""
+        self.models.update(state.get('models', {}))
+        self.multi_output = state.get('multi_output', False)
+        self.multi_output_models.update(state.get('multi_output_models', {}))
+
+
+# Colonnes d'entrée des dimensions produit utilisées par le moteur de placement (cm)
+PRODUCT_DIMENSION_COLUMNS = {
+    'largeur': 'input_largeur_produit',
+    'hauteur': 'input_hauteur_produit',
+    'profondeur': 'input_longueur_produit'
+}
+
+
+def _count_with_fallback(dimensions: Dict[str, np.ndarray], field: str, fallback: np.ndarray) -> np.ndarray:
+    """Nombre d'étagères/colonnes prédit, remplacé par la spécification du type s'il est absent ou nul"""
+    values = dimensions.get(field)
+    if values is None:
+        return fallback
+    values = np.asarray(values).astype(int)
+    return np.where(values > 0, values, fallback)
+
+
+def build_shelf_bins(furniture_types: np.ndarray, dimensions: Dict[str, np.ndarray], faces: np.ndarray,
+                     units: np.ndarray = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Découpe les meubles en bacs de rangement (un bac = une face d'une unité de meuble)
+
+    Retourne l'index de bac de chaque produit et la géométrie des bacs : largeur utile, nombre
+    d'étagères, hauteur d'une étagère, profondeur et nombre de colonnes. Par défaut chaque produit
+    occupe sa propre unité (un meuble prédit par ligne) ; units permet de regrouper des produits
+    sur une même unité, dont la géométrie est celle de la première ligne rencontrée.
+    """
+    furniture_types = np.asarray(furniture_types).astype(int)
+    n_rows = len(furniture_types)
+    units = np.arange(n_rows) if units is None else np.asarray(units).astype(int)
+
+    spec_table = build_spec_table()
+    index = spec_index(furniture_types, len(spec_table['faces']))
+    faces_count = spec_table['faces'][index]
+
+    # Rang de la face (front, back, left, right) ; face inconnue ou absente du meuble → front
+    face_rank = np.zeros(n_rows, dtype=int)
+    if faces is not None:
+        faces = np.asarray(faces).astype(str)
+        for rank, face_name in enumerate(AVAILABLE_FACES[4]):
+            face_rank[faces == face_name] = rank
+    face_rank[face_rank >= faces_count] = 0
+    side = face_rank >= 2
+
+    # Étagères/colonnes de la face : unique (1 face), front/back ou left/right (meubles multi-faces)
+    shelves = np.where(faces_count == 1,
+                       _count_with_fallback(dimensions, 'nb_etageres_unique_face', spec_table['etageres'][index]),
+                       np.where(side,
+                                _count_with_fallback(dimensions, 'nb_etageres_left_right', spec_table['etageres'][index]),
+                                _count_with_fallback(dimensions, 'nb_etageres_front_back', spec_table['etageres'][index])))
+    columns = np.where(faces_count == 1,
+                       _count_with_fallback(dimensions, 'nb_colonnes_unique_face', spec_table['colonnes'][index]),
+                       np.where(side,
+                                _count_with_fallback(dimensions, 'nb_colonnes_left_right', spec_table['colonnes'][index]),
+                                _count_with_fallback(dimensions, 'nb_colonnes_front_back', spec_table['colonnes'][index])))
+
+    largeur = np.asarray(dimensions.get('largeur', spec_table['largeur'][index]), dtype=float)
+    hauteur = np.asarray(dimensions.get('hauteur', spec_table['hauteur'][index]), dtype=float)
+    profondeur = np.asarray(dimensions.get('profondeur', spec_table['profondeur'][index]), dtype=float)
+
+    # Faces latérales : la largeur utile est la profondeur du meuble ; meuble double face : profondeur partagée
+    bin_width = np.where(side, profondeur, largeur)
+    bin_depth = np.where(side, largeur, profondeur) / np.where(faces_count >= 2, 2, 1)
+
+    bin_keys = units * len(AVAILABLE_FACES[4]) + face_rank
+    _, first_rows, bin_index = np.unique(bin_keys, return_index=True, return_inverse=True)
+    shelves = np.maximum(shelves, 1)
+    bins = {
+        'largeur': bin_width[first_rows],
+        'etageres': shelves[first_rows],
+        'hauteur_etagere': (hauteur / shelves)[first_rows],
+        'profondeur': bin_depth[first_rows],
+        'colonnes': np.maximum(columns, 1)[first_rows]
+    }
+    return bin_index.reshape(-1), bins
+
+
+def pack_shelves(items: Dict[str, np.ndarray], bins: Dict[str, np.ndarray],
+                 order: str = 'decreasing') -> Dict[str, np.ndarray]:
+    """Range les facings des produits sur les étagères de leur bac (first-fit decreasing)
+
+    items : 'bin' (index du bac), 'largeur', 'hauteur', 'profondeur' (dimensions d'un facing),
+    'quantite' (facings demandés) et 'etagere' (étagère souhaitée, optionnelle).
+    Les produits sont traités par hauteur puis emprise décroissantes (order='input' : dans
+    l'ordre des lignes, passe unique sans tri) ; chaque produit va sur
+    l'étagère souhaitée si elle a la place, sinon sur la première étagère assez large, sinon sur
+    l'étagère la plus libre avec moins de facings. Un produit trop haut ou trop profond pour le
+    bac (ou sans place pour un facing) n'est pas placé. Les bacs sont traités simultanément :
+    l'itération porte sur le rang du produit dans son bac, pas sur les produits.
+
+    Retourne 'etagere', 'colonne', 'quantite' (facings placés, 0 si non placé) et 'placed'.
+    """
+    bin_index = np.asarray(items['bin']).astype(int)
+    n_items = len(bin_index)
+    widths = np.asarray(items['largeur'], dtype=float)
+    heights = np.asarray(items['hauteur'], dtype=float)
+    depths = np.asarray(items['profondeur'], dtype=float)
+    requested = np.maximum(np.asarray(items['quantite']).astype(int), 1)
+
+    bin_widths = np.asarray(bins['largeur'], dtype=float)
+    bin_shelves = np.asarray(bins['etageres']).astype(int)
+    n_shelves = int(bin_shelves.max()) if len(bin_shelves) else 1
+    preferred = items.get('etagere')
+    preferred = np.zeros(n_items, dtype=int) if preferred is None else \
+        np.clip(np.asarray(preferred).astype(int), 1, bin_shelves[bin_index]) - 1
+
+    # Largeur restante de chaque étagère ; les étagères au-delà du nombre du bac sont fermées
+    remaining = np.where(np.arange(n_shelves) < bin_shelves[:, None], bin_widths[:, None], 0.0)
+
+    placement = {
+        'etagere': preferred + 1,
+        'colonne': np.ones(n_items, dtype=int),
+        'quantite': np.zeros(n_items, dtype=int),
+        'placed': np.zeros(n_items, dtype=bool)
+    }
+    fits = (widths > 0) & (heights <= np.asarray(bins['hauteur_etagere'])[bin_index]) & \
+        (depths <= np.asarray(bins['profondeur'])[bin_index])
+    if not fits.any():
+        return placement
+
+    # Ordre first-fit decreasing : par bac, hauteur puis emprise demandée décroissantes
+    candidates = np.flatnonzero(fits)
+    if order == 'input':
+        order = candidates[np.argsort(bin_index[candidates], kind='stable')]
+    else:
+        order = candidates[np.lexsort((-(widths * requested)[candidates], -heights[candidates],
+                                       bin_index[candidates]))]
+    sorted_bins = bin_index[order]
+    bin_starts = np.flatnonzero(np.r_[True, sorted_bins[1:] != sorted_bins[:-1]])
+    rank = np.arange(len(order)) - np.repeat(bin_starts, np.diff(np.r_[bin_starts, len(order)]))
+
+    for current_rank in range(int(rank.max()) + 1):
+        idx = order[rank == current_rank]  # au plus un produit par bac : mises à jour sans conflit
+        item_bins = bin_index[idx]
+        shelf_space = remaining[item_bins]
+        width, need = widths[idx], widths[idx] * requested[idx]
+        rows = np.arange(len(idx))
+
+        first_fit = np.argmax(shelf_space >= need[:, None], axis=1)
+        has_fit = shelf_space[rows, first_fit] >= need
+        shelf = np.where(shelf_space[rows, preferred[idx]] >= need, preferred[idx],
+                         np.where(has_fit, first_fit, np.argmax(shelf_space, axis=1)))
+
+        space = shelf_space[rows, shelf]
+        facings = np.minimum(requested[idx], np.floor(space / width + 1e-9).astype(int))
+        placed = facings > 0
+        idx, item_bins, shelf, space, facings, width = \
+            idx[placed], item_bins[placed], shelf[placed], space[placed], facings[placed], width[placed]
+
+        column_width = bin_widths[item_bins] / np.asarray(bins['colonnes'])[item_bins]
+        start = bin_widths[item_bins] - space
+        remaining[item_bins, shelf] -= facings * width
+
+        placement['etagere'][idx] = shelf + 1
+        placement['colonne'][idx] = np.minimum(np.floor(start / column_width + 1e-9).astype(int) + 1,
+                                               np.asarray(bins['colonnes'])[item_bins])
+        placement['quantite'][idx] = facings
+        placement['placed'][idx] = True
+
+    return placement
+
+
+# Niveaux d'optimisation du placement (1=Rapide … 5=Qualité maximale) : solveur et budget de temps
+# maximal (s) du rangement, puis de l'optimiseur d'affectation des étagères (refine_budget). Chaque
+# niveau part du meilleur résultat du niveau inférieur (voir optimization_chain)
+OPTIMIZATION_LEVELS = {
+    1: {'label': "Rapide", 'solver': 'greedy', 'order': 'input', 'time_budget': 0.0, 'refine_budget': 0.0},
+    2: {'label': "Glouton trié", 'solver': 'greedy', 'order': 'decreasing', 'time_budget': 0.0,
+        'refine_budget': 0.0},
+    3: {'label': "Recherche locale", 'solver': 'local_search', 'order': 'decreasing', 'time_budget': 0.5,
+        'refine_budget': 0.0},
+    4: {'label': "Recuit simulé", 'solver': 'annealing', 'order': 'decreasing', 'time_budget': 1.0,
+        'refine_budget': 1.0},
+    5: {'label': "Qualité maximale", 'solver': 'annealing', 'order': 'decreasing', 'time_budget': 1.0,
+        'refine_budget': 2.0}
+}
+DEFAULT_OPTIMIZATION_LEVEL = 3
+
+
+def optimization_chain(level: int) -> List[int]:
+    """Niveaux exécutés successivement pour atteindre un niveau d'optimisation
+
+    Chaque niveau n'ajoute que sa propre étape, à partir du meilleur résultat du niveau inférieur :
+    le taux de remplissage ne peut donc pas baisser d'un niveau au suivant.
+    """
+    return [step for step in sorted(OPTIMIZATION_LEVELS) if step <= level]
+
+
+def resolve_optimization_level(level: Any) -> int:
+    """Niveau d'optimisation borné à 1-5 (niveau par défaut si absent ou invalide)"""
+    try:
+        level = int(level)
+    except (TypeError, ValueError):
+        return DEFAULT_OPTIMIZATION_LEVEL
+    return min(max(level, min(OPTIMIZATION_LEVELS)), max(OPTIMIZATION_LEVELS))
+
+
+# Arrêt des recherches anytime (improve_placement, optimize_shelf_assignment) : budget plafonné par
+# produit optimisable (s), et arrêt anticipé après un nombre de mouvements sans nouveau record
+# proportionnel au nombre de produits (minimum ANYTIME_STALL_MIN)
+ANYTIME_SECONDS_PER_PRODUCT = 0.002
+ANYTIME_STALL_MOVES_PER_PRODUCT = 100
+ANYTIME_STALL_MIN = 2000
+# Recherche sur l'ordre de rangement (improve_placement) : une itération re-range un bac entier
+SEARCH_STALL_ITERATIONS_PER_PRODUCT = 10
+
+
+def _pack_bin(order: List[int], widths: List[float], requested: List[int], preferred: List[int],
+              n_shelves: int, bin_width: float) -> Tuple[float, List[Tuple[int, int, int, float]]]:
+    """Rangement d'un seul bac dans l'ordre donné (mêmes règles que pack_shelves)
+
+    Retourne le score du bac (nombre de produits placés, puis largeur occupée : un produit placé
+    vaut plus que toute la capacité du bac) et, pour chaque produit, (produit, étagère, facings, début).
+    """
+    remaining = [bin_width] * n_shelves
+    capacity = bin_width * n_shelves
+    occupied, placements = 0.0, []
+    for item in order:
+        width, wanted, shelf = widths[item], requested[item], preferred[item]
+        need = width * wanted
+        if remaining[shelf] < need:
+            shelf = next((k for k, space in enumerate(remaining) if space >= need), None)
+            if shelf is None:
+                shelf = max(range(n_shelves), key=remaining.__getitem__)
+        start = bin_width - remaining[shelf]
+        facings = min(wanted, int(remaining[shelf] / width + 1e-9))
+        remaining[shelf] -= facings * width
+        occupied += facings * width + (capacity if facings > 0 else 0.0)
+        placements.append((item, shelf, facings, start))
+    return occupied, placements
+
+
+def improve_placement(items: Dict[str, np.ndarray], bins: Dict[str, np.ndarray], placement: Dict[str, np.ndarray],
+                      solver: str = 'local_search', time_budget: float = 0.5, seed: int = 42,
+                      orders: Dict[int, List[int]] = None) -> Dict[str, int]:
+    """Améliore le rangement glouton par recherche sur l'ordre de rangement de chaque bac
+
+    Un mouvement échange deux produits dans l'ordre d'un bac, puis seul ce bac est re-rangé.
+    L'objectif est le nombre de produits placés, puis la largeur de facings placée (taux de
+    remplissage). 'local_search' garde les mouvements qui ne dégradent pas le score ; 'annealing'
+    accepte aussi des dégradations avec une probabilité qui décroît avec le temps écoulé. Seuls les bacs d'au moins deux produits
+    dont la demande n'est pas entièrement satisfaite sont explorés. Met à jour placement en
+    place avec le meilleur ordre trouvé par bac, s'il fait mieux que le rangement actuel du bac.
+
+    Comme optimize_shelf_assignment, le budget est plafonné par produit exploré et la recherche
+    s'arrête après ANYTIME_STALL_MIN itérations (au moins) sans nouveau record. orders (bac ->
+    ordre de rangement), mis à jour en place avec les meilleurs ordres, permet à un appel suivant
+    de repartir des meilleurs ordres trouvés au lieu de l'ordre first-fit decreasing.
+    """
+    stats = {'iterations': 0, 'improved_bins': 0}
+    if time_budget <= 0:
+        return stats
+
+    bin_index = np.asarray(items['bin']).astype(int)
+    widths = np.asarray(items['largeur'], dtype=float)
+    heights = np.asarray(items['hauteur'], dtype=float)
+    requested = np.maximum(np.asarray(items['quantite']).astype(int), 1)
+    bin_shelves = np.asarray(bins['etageres']).astype(int)
+    preferred = items.get('etagere')
+    preferred = np.zeros(len(bin_index), dtype=int) if preferred is None else \
+        np.clip(np.asarray(preferred).astype(int), 1, bin_shelves[bin_index]) - 1
+
+    # Bacs à explorer : au moins deux produits rangeables et une demande non satisfaite
+    fits = (widths > 0) & (heights <= np.asarray(bins['hauteur_etagere'])[bin_index]) & \
+        (np.asarray(items['profondeur'], dtype=float) <= np.asarray(bins['profondeur'])[bin_index])
+    candidates = np.flatnonzero(fits)
+    counts = np.bincount(bin_index[candidates], minlength=len(bin_shelves))
+    unmet = np.zeros(len(bin_shelves), dtype=bool)
+    unmet[bin_index[candidates[placement['quantite'][candidates] < requested[candidates]]]] = True
+    searchable = unmet & (counts >= 2)
+    candidates = candidates[searchable[bin_index[candidates]]]
+    if len(candidates) == 0:
+        return stats
+
+    time_budget = min(time_budget, ANYTIME_SECONDS_PER_PRODUCT * len(candidates))
+    stall_iterations = max(ANYTIME_STALL_MIN, SEARCH_STALL_ITERATIONS_PER_PRODUCT * len(candidates))
+
+    # Ordre initial de chaque bac : meilleur ordre d'un appel précédent, sinon first-fit decreasing
+    warm_orders = orders if orders is not None else {}
+    orders = {}
+    for item in candidates[np.lexsort((-(widths * requested)[candidates], -heights[candidates],
+                                       bin_index[candidates]))].tolist():
+        orders.setdefault(int(bin_index[item]), []).append(item)
+    orders = {bin_id: list(warm_orders.get(bin_id, order)) for bin_id, order in orders.items()}
+
+    widths_list, requested_list, preferred_list = widths.tolist(), requested.tolist(), preferred.tolist()
+    bin_widths, shelves_list = np.asarray(bins['largeur'], dtype=float).tolist(), bin_shelves.tolist()
+
+    def score(bin_id: int, order: List[int]) -> float:
+        return _pack_bin(order, widths_list, requested_list, preferred_list,
+                         shelves_list[bin_id], bin_widths[bin_id])[0]
+
+    # Score du rangement actuel de chaque bac (même barème que _pack_bin) : seuil d'écriture
+    capacity = np.asarray(bins['largeur'], dtype=float) * bin_shelves
+    facings = np.asarray(placement['quantite'])[candidates]
+    placed_value = np.bincount(bin_index[candidates], minlength=len(bin_shelves),
+                               weights=facings * widths[candidates] + (facings > 0) * capacity[bin_index[candidates]])
+
+    current = {bin_id: score(bin_id, order) for bin_id, order in orders.items()}
+    best = {bin_id: (value, list(orders[bin_id])) for bin_id, value in current.items()}
+    bin_ids = list(orders)
+    last_record = 0
+
+    rng = np.random.default_rng(seed)
+    initial_temperature = float(np.mean(widths[candidates]))
+    start_time = time.perf_counter()
+    while True:
+        elapsed = time.perf_counter() - start_time
+        if elapsed >= time_budget or stats['iterations'] - last_record >= stall_iterations:
+            break
+        stats['iterations'] += 1
+
+        bin_id = bin_ids[int(rng.integers(len(bin_ids)))]
+        order = orders[bin_id]
+        i, j = rng.choice(len(order), size=2, replace=False)
+        order[i], order[j] = order[j], order[i]
+
+        value = score(bin_id, order)
+        delta = value - current[bin_id]
+        if solver == 'annealing':
+            temperature = initial_temperature * (1.0 - elapsed / time_budget) + 1e-9
+            accept = delta >= 0 or rng.random() < np.exp(delta / temperature)
+        else:
+            accept = delta >= 0
+
+        if accept:
+            current[bin_id] = value
+            if value > best[bin_id][0] + 1e-9:
+                best[bin_id] = (value, list(order))
+                last_record = stats['iterations']
+        else:
+            order[i], order[j] = order[j], order[i]
+
+    # Écriture du meilleur rangement des bacs améliorés
+    column_counts = np.asarray(bins['colonnes']).astype(int).tolist()
+    for bin_id, (value, order) in best.items():
+        warm_orders[bin_id] = order
+        if value <= placed_value[bin_id] + 1e-9:
+            continue
+        stats['improved_bins'] += 1
+        column_width = bin_widths[bin_id] / column_counts[bin_id]
+        for item, shelf, facings, start in _pack_bin(order, widths_list, requested_list, preferred_list,
+                                                     shelves_list[bin_id], bin_widths[bin_id])[1]:
+            placement['etagere'][item] = shelf + 1
+            placement['colonne'][item] = min(int(start / column_width + 1e-9) + 1, column_counts[bin_id])
+            placement['quantite'][item] = facings
+            placement['placed'][item] = facings > 0
+    return stats
+
+
+# Poids de l'objectif de l'optimiseur d'affectation des étagères et étagère à hauteur des yeux (1 = bas)
+OBJECTIVE_WEIGHTS = {'remplissage': 2.0, 'priorite': 1.0, 'niveau_oeil': 2.0, 'tete_gondole': 2.0}
+EYE_LEVEL_SHELF = 3
+
+
+def _decoded_column(data: pd.DataFrame, column: str, label_encoders: Dict[str, Any] = None) -> np.ndarray:
+    """Valeurs texte d'une colonne, décodées si elle a été encodée par le prétraitement"""
+    values = data[column]
+    encoder = (label_encoders or {}).get(column)
+    if values.dtype.kind not in 'iuf' or encoder is None:
+        return values.astype(str).to_numpy()
+    classes = np.asarray(encoder.classes_).astype(str)
+    codes = values.to_numpy().astype(int)
+    known = (codes >= 0) & (codes < len(classes))
+    return np.where(known, classes[np.clip(codes, 0, len(classes) - 1)], 'unknown')
+
+
+def merchandising_demands(data: pd.DataFrame, label_encoders: Dict[str, Any] = None) -> Dict[str, np.ndarray]:
+    """Priorité merchandising (0-1) et exigences fournisseur (niveau_oeil, tete_gondole) de chaque produit"""
+    n_rows = len(data)
+    demands = {'priorite': np.zeros(n_rows), 'niveau_oeil': np.zeros(n_rows, dtype=bool),
+               'tete_gondole': np.zeros(n_rows, dtype=bool)}
+    if 'input_priorite_merchandising' in data.columns:
+        priority = pd.to_numeric(data['input_priorite_merchandising'], errors='coerce').fillna(0).to_numpy(dtype=float)
+        demands['priorite'] = np.clip(priority / 10.0, 0.0, 1.0)
+    if 'input_placement_exige_supplier' in data.columns:
+        supplier = _decoded_column(data, 'input_placement_exige_supplier', label_encoders)
+        demands['niveau_oeil'] = supplier == 'niveau_oeil'
+        demands['tete_gondole'] = supplier == 'tete_gondole'
+    return demands
+
+
+def optimize_shelf_assignment(items: Dict[str, np.ndarray], bins: Dict[str, np.ndarray],
+                              placement: Dict[str, np.ndarray], time_budget: float = 1.0,
+                              weights: Dict[str, float] = None, seed: int = 42) -> Dict[str, Any]:
+    """Optimiseur anytime de l'affectation des produits aux étagères, borné par une échéance
+
+    Part du placement courant et applique des mouvements aléatoires (déplacement vers une autre
+    étagère, échange de deux produits d'un même bac, facing ajouté, facing transféré vers un
+    produit au moins aussi large) acceptés par recuit simulé. L'objectif combine le remplissage
+    (largeur placée / largeur du bac), la priorité merchandising à hauteur des yeux (étagère
+    EYE_LEVEL_SHELF), les exigences fournisseur niveau_oeil (étagères 3-4) et tete_gondole (une
+    tête de gondole par étagère, colonne 1). Le remplissage est prioritaire : aucun mouvement
+    accepté ne le réduit, et le meilleur état est comparé sur le remplissage puis le score.
+    Chaque mouvement ne modifie que quelques termes : son delta est calculé en O(1) à partir
+    de compteurs par étagère, sans réévaluer le planogramme. Un produit placé le reste.
+
+    Le budget est plafonné à ANYTIME_SECONDS_PER_PRODUCT par produit optimisable, et la recherche
+    s'arrête dès que ANYTIME_STALL_MOVES_PER_PRODUCT mouvements par produit (au moins ANYTIME_STALL_MIN)
+    n'ont produit aucun nouveau record ('converged' dans le résumé).
+    Le meilleur état rencontré est rétabli à l'arrêt (journal d'annulation depuis le dernier
+    record) ; placement est mis à jour en place et les colonnes sont recalculées (têtes de
+    gondole en premier). items accepte 'priorite', 'niveau_oeil' et 'tete_gondole'
+    (voir merchandising_demands) en plus des champs de pack_shelves.
+    """
+    weights = {**OBJECTIVE_WEIGHTS, **(weights or {})}
+    stats = {'moves': 0, 'accepted': 0, 'score_initial': 0.0, 'score': 0.0, 'converged': False}
+    if time_budget <= 0:
+        return stats
+
+    bin_index = np.asarray(items['bin']).astype(int)
+    n_items = len(bin_index)
+    widths_array = np.asarray(items['largeur'], dtype=float)
+    requested_array = np.maximum(np.asarray(items['quantite']).astype(int), 1)
+    bin_widths_array = np.asarray(bins['largeur'], dtype=float)
+    bin_shelves_array = np.asarray(bins['etageres']).astype(int)
+
+    # Produits optimisables : ceux qui tiennent dans leur bac (hauteur, profondeur, un facing)
+    fits = (widths_array > 0) & (widths_array <= bin_widths_array[bin_index]) & \
+        (np.asarray(items['hauteur'], dtype=float) <= np.asarray(bins['hauteur_etagere'])[bin_index]) & \
+        (np.asarray(items['profondeur'], dtype=float) <= np.asarray(bins['profondeur'])[bin_index])
+    movable = np.flatnonzero(fits)
+    if len(movable) == 0:
+        return stats
+    time_budget = min(time_budget, ANYTIME_SECONDS_PER_PRODUCT * len(movable))
+    stall_moves = max(ANYTIME_STALL_MIN, ANYTIME_STALL_MOVES_PER_PRODUCT * len(movable))
+
+    zeros = np.zeros(n_items)
+    priority = (np.asarray(items.get('priorite', zeros), dtype=float) * weights['priorite']).tolist()
+    eye_demand = (np.asarray(items.get('niveau_oeil', zeros), dtype=float) * weights['niveau_oeil']).tolist()
+    end_cap = np.asarray(items.get('tete_gondole', zeros)).astype(bool).tolist()
+    fill_weight = (weights['remplissage'] * widths_array / bin_widths_array[bin_index]).tolist()
+    widths, requested, bins_of = widths_array.tolist(), requested_array.tolist(), bin_index.tolist()
+    bin_widths, bin_shelves = bin_widths_array.tolist(), bin_shelves_array.tolist()
+    shelf = (np.asarray(placement['etagere']).astype(int) - 1).tolist()
+    facings = np.asarray(placement['quantite']).astype(int).tolist()
+    end_cap_weight = weights['tete_gondole']
+
+    # Bonus de hauteur des yeux par (nombre d'étagères, étagère) : 1 à l'étagère cible, 0,5 à côté
+    max_shelves = int(bin_shelves_array.max())
+    eye_bonus, eye_ok = {}, {}
+    for n_shelves in set(bin_shelves):
+        eye = min(EYE_LEVEL_SHELF, n_shelves) - 1
+        for k in range(n_shelves):
+            eye_bonus[n_shelves, k] = max(0.0, 1.0 - abs(k - eye) / 2.0)
+            eye_ok[n_shelves, k] = float(k + 1 in (EYE_LEVEL_SHELF, EYE_LEVEL_SHELF + 1) or
+                                         (n_shelves < EYE_LEVEL_SHELF and k == n_shelves - 1))
+
+    def item_score(i: int, k: int, f: int) -> float:
+        if f == 0:
+            return 0.0
+        key = (bin_shelves[bins_of[i]], k)
+        return f * fill_weight[i] + priority[i] * eye_bonus[key] + eye_demand[i] * eye_ok[key]
+
+    # Compteurs par étagère (index plat bac * max_shelves + étagère) : largeur occupée, têtes de gondole
+    used = [0.0] * (len(bin_widths) * max_shelves)
+    end_caps = [0] * (len(bin_widths) * max_shelves)
+    members = {}
+    for i in movable.tolist():
+        if facings[i] > 0:
+            used[bins_of[i] * max_shelves + shelf[i]] += facings[i] * widths[i]
+            end_caps[bins_of[i] * max_shelves + shelf[i]] += end_cap[i]
+        members.setdefault(bins_of[i], []).append(i)
+    movable_list = movable.tolist()
+
+    score = sum(item_score(i, shelf[i], facings[i]) for i in movable_list) + \
+        end_cap_weight * sum(1 for count in end_caps if count > 0)
+    stats['score_initial'] = round(score, 4)
+    # Largeur de facings placée, jamais réduite par un mouvement accepté (critère prioritaire du record)
+    fill = sum(facings[i] * widths[i] for i in movable_list)
+    best_fill, best_score, journal = fill, score, []
+    # Numéro du mouvement du dernier record (arrêt anticipé quand la recherche stagne)
+    last_record = 0
+
+    def apply(i: int, k: int, f: int):
+        """Affecte l'étagère k et f facings au produit i en tenant les compteurs à jour"""
+        base = bins_of[i] * max_shelves
+        if facings[i] > 0:
+            used[base + shelf[i]] -= facings[i] * widths[i]
+            end_caps[base + shelf[i]] -= end_cap[i]
+        if f > 0:
+            used[base + k] += f * widths[i]
+            end_caps[base + k] += end_cap[i]
+        journal.append((i, shelf[i], facings[i]))
+        shelf[i], facings[i] = k, f
+
+    def end_cap_delta(i: int, source: int, target: int) -> float:
+        """Variation du nombre d'étagères avec tête de gondole si le produit i passe de source à target"""
+        if not end_cap[i] or source == target:
+            return 0.0
+        return end_cap_weight * ((end_caps[target] == 0) - (end_caps[source] == 1))
+
+    rng = np.random.default_rng(seed)
+    random = rng.random
+    temperature_start = 0.1 * max(weights.values())
+    start_time = time.perf_counter()
+    deadline = start_time + time_budget
+    check_every = 256
+    while True:
+        # Horloge consultée par lots de mouvements (l'appel coûte plus cher qu'un mouvement)
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        if stats['moves'] - last_record >= stall_moves:
+            stats['converged'] = True
+            break
+        temperature = temperature_start * (deadline - now) / time_budget + 1e-6
+        draws = rng.random((check_every, 3)).tolist()
+        picks = rng.integers(0, len(movable_list), check_every).tolist()
+
+        for (kind, draw_shelf, draw_other), pick in zip(draws, picks):
+            i = movable_list[pick]
+            b, k, f = bins_of[i], shelf[i], facings[i]
+            n_shelves = bin_shelves[b]
+            base = b * max_shelves
+            width = widths[i]
+            stats['moves'] += 1
+
+            if kind < 0.4:
+                # Déplacement vers une autre étagère du bac
+                if f == 0 or n_shelves < 2:
+                    continue
+                target = int(draw_shelf * (n_shelves - 1))
+                target += target >= k
+                if used[base + target] + f * width > bin_widths[b] + 1e-9:
+                    continue
+                delta = item_score(i, target, f) - item_score(i, k, f) + end_cap_delta(i, base + k, base + target)
+                moves = ((i, target, f),)
+            elif kind < 0.7:
+                # Échange avec un autre produit du bac placé sur une autre étagère
+                group = members[b]
+                j = group[int(draw_other * len(group))]
+                g, other = facings[j], shelf[j]
+                if f == 0 or g == 0 or other == k:
+                    continue
+                if used[base + k] - f * width + g * widths[j] > bin_widths[b] + 1e-9 or \
+                        used[base + other] - g * widths[j] + f * width > bin_widths[b] + 1e-9:
+                    continue
+                delta = item_score(i, other, f) - item_score(i, k, f) + item_score(j, k, g) - item_score(j, other, g)
+                if end_cap[i] != end_cap[j]:
+                    delta += end_cap_delta(i, base + k, base + other) if end_cap[i] else \
+                        end_cap_delta(j, base + other, base + k)
+                moves = ((i, other, f), (j, k, g))
+            elif kind < 0.9:
+                # Facing supplémentaire (produit non placé : sur une étagère tirée au hasard)
+                if f >= requested[i]:
+                    continue
+                target = k if f > 0 else int(draw_shelf * n_shelves)
+                if used[base + target] + width > bin_widths[b] + 1e-9:
+                    continue
+                delta = item_score(i, target, f + 1) - item_score(i, k, f)
+                if f == 0 and end_cap[i]:
+                    delta += end_cap_weight * (end_caps[base + target] == 0)
+                moves = ((i, target, f + 1),)
+            else:
+                # Facing transféré à un produit du bac au moins aussi large (libère l'étagère sans
+                # perte de remplissage ; un produit placé garde au moins un facing)
+                group = members[b]
+                j = group[int(draw_other * len(group))]
+                g = facings[j]
+                if f <= 1 or j == i or g >= requested[j] or widths[j] < width:
+                    continue
+                target = shelf[j] if g > 0 else k
+                freed = width if target == k else 0.0
+                if used[base + target] - freed + widths[j] > bin_widths[b] + 1e-9:
+                    continue
+                delta = item_score(i, k, f - 1) - item_score(i, k, f) + \
+                    item_score(j, target, g + 1) - item_score(j, shelf[j], g)
+                if g == 0 and end_cap[j]:
+                    delta += end_cap_weight * (end_caps[base + target] == 0)
+                moves = ((i, k, f - 1), (j, target, g + 1))
+
+            if delta >= 0 or random() < np.exp(delta / temperature):
+                for move in moves:
+                    fill += (move[2] - facings[move[0]]) * widths[move[0]]
+                    apply(*move)
+                score += delta
+                stats['accepted'] += 1
+                if fill > best_fill + 1e-9 or (fill > best_fill - 1e-9 and score > best_score + 1e-9):
+                    best_fill, best_score, journal = fill, score, []
+                    last_record = stats['moves']
+
+        # Journal trop long sans nouveau record : retour au meilleur état
+        if len(journal) > 100000:
+            for i, k, f in reversed(journal):
+                shelf[i], facings[i] = k, f
+            journal.clear()
+            fill, score = best_fill, best_score
+            used = [0.0] * len(used)
+            end_caps = [0] * len(end_caps)
+            for i in movable_list:
+                if facings[i] > 0:
+                    used[bins_of[i] * max_shelves + shelf[i]] += facings[i] * widths[i]
+                    end_caps[bins_of[i] * max_shelves + shelf[i]] += end_cap[i]
+
+    # Retour au meilleur état rencontré
+    for i, k, f in reversed(journal):
+        shelf[i], facings[i] = k, f
+    stats['score'] = round(best_score, 4)
+
+    # Écriture : étagères, facings, puis colonnes recalculées par étagère (têtes de gondole en premier)
+    placement['etagere'][movable] = np.asarray(shelf)[movable] + 1
+    placement['quantite'][movable] = np.asarray(facings)[movable]
+    placement['placed'][movable] = placement['quantite'][movable] > 0
+    placed = movable[placement['placed'][movable]]
+    if len(placed):
+        end_cap_array = np.asarray(end_cap)[placed]
+        order = placed[np.lexsort((placement['colonne'][placed], ~end_cap_array,
+                                   placement['etagere'][placed], bin_index[placed]))]
+        shelf_keys = bin_index[order] * max_shelves + placement['etagere'][order]
+        occupied = widths_array[order] * placement['quantite'][order]
+        cumulative = np.cumsum(occupied)
+        group_starts = np.flatnonzero(np.r_[True, shelf_keys[1:] != shelf_keys[:-1]])
+        offsets = np.repeat(cumulative[group_starts] - occupied[group_starts],
+                            np.diff(np.r_[group_starts, len(order)]))
+        start = cumulative - occupied - offsets
+        column_counts = np.asarray(bins['colonnes']).astype(int)[bin_index[order]]
+        column_width = bin_widths_array[bin_index[order]] / column_counts
+        placement['colonne'][order] = np.minimum(np.floor(start / column_width + 1e-9).astype(int) + 1, column_counts)
+    return stats
+
+
+def solve_placement(items: Dict[str, np.ndarray], bins: Dict[str, np.ndarray],
+                    optimization_level: int = DEFAULT_OPTIMIZATION_LEVEL) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Placement selon le niveau d'optimisation : étapes des niveaux de la chaîne (voir optimization_chain)
+
+    Une étape gloutonne ne remplace le rangement que si elle remplit mieux ; une recherche repart des
+    meilleurs ordres de l'étape précédente et est annulée si elle fait baisser le remplissage.
+    L'optimiseur anytime d'affectation des étagères (objectif merchandising, voir
+    optimize_shelf_assignment), qui ne le fait jamais baisser, n'est relancé que si le rangement a
+    changé depuis son dernier passage.
+    Retourne le placement et un résumé (niveau, solveur, budgets, itérations, taux de remplissage).
+    """
+    level = resolve_optimization_level(optimization_level)
+    tier = OPTIMIZATION_LEVELS[level]
+    chain = optimization_chain(level)
+    start_time = time.perf_counter()
+    widths = np.asarray(items['largeur'], dtype=float)
+
+    def fill(candidate: Dict[str, np.ndarray]) -> Tuple[float, int]:
+        return float(np.sum(widths * candidate['quantite'])), int(np.sum(candidate['placed']))
+
+    placement, orders, changed = None, {}, True
+    search = {'iterations': 0, 'improved_bins': 0, 'refines': 0}
+    for stage in (OPTIMIZATION_LEVELS[step] for step in chain):
+        if stage['solver'] == 'greedy':
+            candidate = pack_shelves(items, bins, order=stage['order'])
+            if placement is None or fill(candidate) > fill(placement):
+                placement, changed = candidate, True
+        else:
+            previous = {key: values.copy() for key, values in placement.items()}
+            stats = improve_placement(items, bins, placement, stage['solver'], stage['time_budget'], orders=orders)
+            if fill(placement)[0] < fill(previous)[0] - 1e-9:
+                placement.update(previous)
+            elif stats['improved_bins']:
+                changed = True
+            search['iterations'] += stats['iterations']
+            search['improved_bins'] += stats['improved_bins']
+        if stage['refine_budget'] > 0 and changed:
+            refine = optimize_shelf_assignment(items, bins, placement, stage['refine_budget'])
+            search['refines'] += 1
+            search['moves'] = search.get('moves', 0) + refine['moves']
+            search['accepted'] = search.get('accepted', 0) + refine['accepted']
+            search.setdefault('score_initial', refine['score_initial'])
+            search['score'] = refine['score']
+            search['converged'] = refine['converged']
+            changed = False
+
+    capacity = float(np.sum(np.asarray(bins['largeur'], dtype=float) * np.asarray(bins['etageres'])))
+    occupied = float(np.sum(widths * placement['quantite']))
+    info = {
+        'optimization_level': level,
+        'solver': tier['solver'],
+        'time_budget': sum(OPTIMIZATION_LEVELS[step]['time_budget'] for step in chain),
+        'refine_budget': sum(OPTIMIZATION_LEVELS[step]['refine_budget'] for step in chain),
+        'elapsed': round(time.perf_counter() - start_time, 3),
+        **search,
+        'fill_rate': round(occupied / capacity, 4) if capacity > 0 else 0.0
+    }
+    return placement, info
+
+
+# Regroupement des produits pour le dimensionnement des meubles (colonnes présentes uniquement)
+FIXTURE_GROUP_COLUMNS = ('input_magasin_id', 'input_categorie_id', 'input_zone_id')
+
+
+def first_appearance_codes(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Codes 0..k-1 numérotés dans l'ordre de première apparition, et valeur d'origine de chaque code"""
+    uniques, first_rows, inverse = np.unique(values, return_index=True, return_inverse=True)
+    order = np.argsort(first_rows, kind='stable')
+    rank = np.empty(len(order), dtype=int)
+    rank[order] = np.arange(len(order))
+    return rank[inverse.reshape(-1)], uniques[order]
+
+
+def fixture_capacity(furniture_types: np.ndarray, dimensions: Dict[str, np.ndarray]) -> np.ndarray:
+    """Largeur de rangement d'une unité de meuble : somme sur ses faces de largeur x nombre d'étagères"""
+    spec_table = build_spec_table()
+    index = spec_index(furniture_types, len(spec_table['faces']))
+    faces_count = spec_table['faces'][index]
+    shelves = spec_table['etageres'][index]
+    largeur = np.asarray(dimensions['largeur'], dtype=float)
+    profondeur = np.asarray(dimensions['profondeur'], dtype=float)
+
+    single = largeur * _count_with_fallback(dimensions, 'nb_etageres_unique_face', shelves)
+    front_back = 2 * largeur * _count_with_fallback(dimensions, 'nb_etageres_front_back', shelves)
+    left_right = 2 * profondeur * _count_with_fallback(dimensions, 'nb_etageres_left_right', shelves)
+    return np.where(faces_count == 1, single, front_back + np.where(faces_count == 4, left_right, 0.0))
+
+
+def size_fixtures(data: pd.DataFrame, furniture_types: np.ndarray, dimensions: Dict[str, np.ndarray],
+                  positions: Dict[str, np.ndarray], group_columns: Tuple[str, ...] = FIXTURE_GROUP_COLUMNS,
+                  max_rounds: int = 5) -> Optional[Dict[str, Any]]:
+    """Dimensionne le nombre minimal d'unités de meubles par groupe (magasin, catégorie, zone, type)
+
+    Les facings demandés sont agrégés par groupe (groupby vectorisé) ; la géométrie d'une unité
+    est la médiane des dimensions et nombres d'étagères/colonnes prédits pour le groupe. Le nombre
+    d'unités est la borne ceil(largeur de facings / capacité d'une unité), les produits étant
+    répartis entre les unités par largeur cumulée. Un rangement glouton (pack_shelves) vérifie le
+    résultat : les produits qui ne trouvent pas de place sont redimensionnés sur de nouvelles
+    unités (max_rounds passes). Les produits trop grands pour le meuble restent sur la première unité.
+
+    Retourne 'unit' (unité de chaque produit, numérotée par première apparition), et par unité
+    'furniture_type' et 'dimensions' ; None si les dimensions produit sont absentes.
+    """
+    if any(col not in data.columns for col in PRODUCT_DIMENSION_COLUMNS.values()):
+        return None
+
+    furniture_types = np.asarray(furniture_types).astype(int)
+    n_rows = len(furniture_types)
+    keys = pd.DataFrame({col: data[col].to_numpy() for col in group_columns if col in data.columns})
+    keys['furniture_type'] = furniture_types
+    group = keys.groupby(list(keys.columns), sort=False, dropna=False).ngroup().to_numpy()
+
+    # Géométrie d'unité par groupe : médiane des prédictions du groupe
+    fields = ['largeur', 'hauteur', 'profondeur'] + [field for field in SHELF_COUNT_FIELDS if field in dimensions]
+    geometry = pd.DataFrame({field: np.asarray(dimensions[field], dtype=float) for field in fields})
+    geometry = geometry.groupby(group).median()
+    group_dimensions = {field: geometry[field].to_numpy() for field in fields}
+    for field in SHELF_COUNT_FIELDS:
+        if field in group_dimensions:
+            group_dimensions[field] = np.rint(group_dimensions[field]).astype(int)
+    group_types = np.zeros(len(geometry), dtype=int)
+    group_types[group] = furniture_types
+    group_capacity = fixture_capacity(group_types, group_dimensions)
+
+    items = {dimension: pd.to_numeric(data[column], errors='coerce').fillna(0).to_numpy(dtype=float)
+             for dimension, column in PRODUCT_DIMENSION_COLUMNS.items()}
+    items.update({'quantite': np.maximum(np.asarray(positions['quantite']).astype(int), 1),
+                  'etagere': positions.get('etagere')})
+    demand = items['largeur'] * items['quantite']
+    row_types = group_types[group]
+    row_dimensions = {field: values[group] for field, values in group_dimensions.items()}
+
+    def assign(rows: np.ndarray, first_unit: int) -> np.ndarray:
+        """Unités des lignes données : borne de capacité par groupe, répartition par largeur cumulée"""
+        row_groups = group[rows]
+        order = rows[np.lexsort((-items['hauteur'][rows], row_groups))]
+        required = np.bincount(group[order], weights=demand[order], minlength=len(group_capacity))
+        n_units = np.maximum(np.ceil(required / np.maximum(group_capacity, 1e-9)), 1).astype(int)
+        present = np.zeros(len(group_capacity), dtype=bool)
+        present[row_groups] = True
+        n_units[~present] = 0
+        offsets = first_unit + np.cumsum(n_units) - n_units
+
+        # Largeur cumulée de chaque ligne depuis le début de son groupe (ordre trié)
+        cumulative = np.cumsum(demand[order])
+        sorted_groups = group[order]
+        starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+        before = np.repeat(cumulative[starts] - demand[order][starts], np.diff(np.r_[starts, len(order)]))
+        within = cumulative - demand[order] - before
+        share = np.maximum(required[sorted_groups], 1e-9) / n_units[sorted_groups]
+        local = np.minimum(np.floor(within / share).astype(int), n_units[sorted_groups] - 1)
+
+        units = np.empty(len(rows), dtype=int)
+        units[np.searchsorted(rows, order)] = offsets[sorted_groups] + local
+        return units
+
+    rows = np.arange(n_rows)
+    unit = assign(rows, 0)
+    for _ in range(max_rounds):
+        bin_index, bins = build_shelf_bins(row_types, row_dimensions, positions.get('face'), unit)
+        placement = pack_shelves({**items, 'bin': bin_index}, bins)
+        fits = (items['largeur'] > 0) & (items['largeur'] <= bins['largeur'][bin_index]) & \
+            (items['hauteur'] <= bins['hauteur_etagere'][bin_index]) & \
+            (items['profondeur'] <= bins['profondeur'][bin_index])
+        overflow = np.flatnonzero(fits & ~placement['placed'])
+        if len(overflow) == 0:
+            break
+        unit[overflow] = assign(overflow, int(unit.max()) + 1)
+
+    unit, _ = first_appearance_codes(unit)
+    first_rows = np.zeros(int(unit.max()) + 1 if n_rows else 0, dtype=int)
+    first_rows[unit[::-1]] = np.arange(n_rows)[::-1]
+    return {
+        'unit': unit,
+        'furniture_type': row_types[first_rows],
+        'dimensions': {field: values[first_rows] for field, values in row_dimensions.items()}
+    }
+
+
+# Implantation des meubles dans les zones : dégagement d'allée (cm) devant chaque face accessible
+AISLE_CLEARANCE = 120.0
+ZONE_GEOMETRY_COLUMNS = {
+    'longueur': 'input_longueur_zone',
+    'largeur': 'input_largeur_zone',
+    'hauteur': 'input_hauteur_zone'
+}
+STORE_GEOMETRY_COLUMNS = {'longueur': 'input_longueur_magasin', 'largeur': 'input_largeur_magasin'}
+
+
+class SpatialGridIndex:
+    """Index spatial en grille uniforme des rectangles déjà implantés (tests de collision en O(voisinage))"""
+
+    def __init__(self, cell_size: float):
+        self.cell_size = max(float(cell_size), 1.0)
+        self.cells = {}
+        self.rects = []
+
+    def _cells(self, x0: float, y0: float, x1: float, y1: float):
+        size = self.cell_size
+        for cx in range(int(x0 // size), int(x1 // size) + 1):
+            for cy in range(int(y0 // size), int(y1 // size) + 1):
+                yield cx, cy
+
+    def collides(self, x0: float, y0: float, x1: float, y1: float) -> bool:
+        """Indique si le rectangle chevauche (intérieurs) un rectangle indexé"""
+        eps = 1e-6
+        for cell in self._cells(x0, y0, x1 - eps, y1 - eps):
+            for rect_id in self.cells.get(cell, ()):
+                rx0, ry0, rx1, ry1 = self.rects[rect_id]
+                if x0 < rx1 - eps and rx0 < x1 - eps and y0 < ry1 - eps and ry0 < y1 - eps:
+                    return True
+        return False
+
+    def insert(self, x0: float, y0: float, x1: float, y1: float):
+        """Ajoute un rectangle à l'index"""
+        rect_id = len(self.rects)
+        self.rects.append((x0, y0, x1, y1))
+        for cell in self._cells(x0, y0, x1 - 1e-6, y1 - 1e-6):
+            self.cells.setdefault(cell, []).append(rect_id)
+
+
+def layout_rectangles(sizes: List[Tuple[float, float]], length: float, width: float,
+                      cell_size: float = None) -> List[Optional[Tuple[float, float, bool]]]:
+    """Implante des rectangles (longueur, largeur) dans un rectangle length x width (bottom-left)
+
+    Les rectangles sont traités par aire décroissante ; chacun prend le premier point candidat
+    (coins des rectangles déjà posés, par y puis x) où il tient sans collision, tel quel ou
+    tourné de 90°. Retourne (x, y, tourné) par rectangle, ou None s'il ne tient pas.
+    """
+    if cell_size is None:
+        cell_size = float(np.median([max(size) for size in sizes])) if sizes else 1.0
+    grid = SpatialGridIndex(cell_size)
+    candidates = [(0.0, 0.0)]
+    result = [None] * len(sizes)
+
+    for index in sorted(range(len(sizes)), key=lambda k: -sizes[k][0] * sizes[k][1]):
+        size_x, size_y = sizes[index]
+        for position, (x, y) in enumerate(candidates):
+            for rotated, (dx, dy) in ((False, (size_x, size_y)), (True, (size_y, size_x))):
+                if x + dx <= length + 1e-6 and y + dy <= width + 1e-6 and not grid.collides(x, y, x + dx, y + dy):
+                    break
+            else:
+                continue
+            grid.insert(x, y, x + dx, y + dy)
+            result[index] = (x, y, rotated)
+            del candidates[position]
+            for point in ((x + dx, y), (x, y + dy)):
+                candidates.insert(bisect.bisect(candidates, (point[1], point[0]), key=lambda c: (c[1], c[0])), point)
+            break
+    return result
+
+
+def allocate_zone_space(data: pd.DataFrame, units: np.ndarray, fixtures: Dict[str, Any],
+                        label_encoders: Dict[str, Any] = None,
+                        clearance: float = AISLE_CLEARANCE) -> Optional[Dict[str, np.ndarray]]:
+    """Implante au sol les unités de meubles dans le rectangle de leur zone (coordonnées en cm)
+
+    La zone d'une unité est celle de ses produits (magasin, zone) ; son rectangle est la médiane
+    des dimensions de zone des lignes (m → cm), bornée par les dimensions du magasin. L'emprise
+    d'un meuble est agrandie d'un dégagement d'allée complet devant chaque face accessible
+    (1 face : avant ; 2 faces : avant et arrière ; 4 faces : tout le tour) : aucune autre emprise
+    ni le mur de la zone n'empiète sur cette allée, les dos et côtés non accessibles peuvent
+    rester accolés. Un meuble plus haut que la zone n'est pas implanté.
+
+    Retourne par unité 'zone_id', 'x', 'y' (coin de l'emprise du meuble dans la zone), 'rotation'
+    (0 ou 90) et 'placed' ; None sans dimensions de zone ni de magasin.
+    """
+    has_zone = all(ZONE_GEOMETRY_COLUMNS[name] in data.columns for name in ('longueur', 'largeur'))
+    has_store = all(column in data.columns for column in STORE_GEOMETRY_COLUMNS.values())
+    if not (has_zone or has_store):
+        return None
+
+    units = np.asarray(units).astype(int)
+    n_units = len(fixtures['furniture_type'])
+    first_rows = np.zeros(n_units, dtype=int)
+    first_rows[units[::-1]] = np.arange(len(units))[::-1]
+
+    # Zone de chaque unité (magasin, zone) et rectangle de chaque zone (médiane des lignes, en cm)
+    keys = pd.DataFrame({col: data[col].to_numpy() for col in ('input_magasin_id', 'input_zone_id')
+                         if col in data.columns})
+    row_zone = keys.groupby(list(keys.columns), sort=False, dropna=False).ngroup().to_numpy() \
+        if len(keys.columns) else np.zeros(len(data), dtype=int)
+    geometry = pd.DataFrame({
+        f'{prefix}_{name}': pd.to_numeric(data[column], errors='coerce').to_numpy(dtype=float) * 100
+        for prefix, columns in (('zone', ZONE_GEOMETRY_COLUMNS), ('magasin', STORE_GEOMETRY_COLUMNS))
+        for name, column in columns.items() if column in data.columns
+    }).groupby(row_zone).median()
+    zone_length = geometry['zone_longueur' if has_zone else 'magasin_longueur']
+    zone_width = geometry['zone_largeur' if has_zone else 'magasin_largeur']
+    if has_zone and has_store:
+        zone_length = np.minimum(zone_length, geometry['magasin_longueur'].fillna(np.inf))
+        zone_width = np.minimum(zone_width, geometry['magasin_largeur'].fillna(np.inf))
+    zone_length = zone_length.fillna(0).to_numpy()
+    zone_width = zone_width.fillna(0).to_numpy()
+    zone_height = geometry['zone_hauteur'].fillna(np.inf).to_numpy() if 'zone_hauteur' in geometry \
+        else np.full(len(geometry), np.inf)
+
+    zone_labels = _decoded_column(data, 'input_zone_id', label_encoders)[first_rows] \
+        if 'input_zone_id' in data.columns else np.full(n_units, 'unknown')
+    unit_zone = row_zone[first_rows]
+
+    # Emprise agrandie du dégagement d'allée selon le nombre de faces (face avant côté y croissant)
+    dimensions = fixtures['dimensions']
+    spec_table = build_spec_table()
+    faces_count = spec_table['faces'][spec_index(fixtures['furniture_type'], len(spec_table['faces']))]
+    largeur = np.asarray(dimensions['largeur'], dtype=float)
+    profondeur = np.asarray(dimensions['profondeur'], dtype=float)
+    hauteur = np.asarray(dimensions['hauteur'], dtype=float)
+    margin_x = np.where(faces_count == 4, clearance, 0.0)
+    margin_back = np.where(faces_count >= 2, clearance, 0.0)
+    size_x = largeur + 2 * margin_x
+    size_y = profondeur + margin_back + clearance
+
+    layout = {
+        'zone_id': zone_labels.astype(object),
+        'x': np.full(n_units, np.nan),
+        'y': np.full(n_units, np.nan),
+        'rotation': np.zeros(n_units, dtype=int),
+        'placed': np.zeros(n_units, dtype=bool)
+    }
+    order = np.argsort(unit_zone, kind='stable')
+    zone_starts = np.flatnonzero(np.r_[True, unit_zone[order][1:] != unit_zone[order][:-1]]) if n_units else []
+    for zone_units in np.split(order, zone_starts[1:]) if n_units else []:
+        zone = unit_zone[zone_units[0]]
+        fits_height = hauteur[zone_units] <= zone_height[zone]
+        candidates = zone_units[fits_height]
+        placements = layout_rectangles(list(zip(size_x[candidates].tolist(), size_y[candidates].tolist())),
+                                       zone_length[zone], zone_width[zone])
+        for unit, placement in zip(candidates.tolist(), placements):
+            if placement is None:
+                continue
+            x, y, rotated = placement
+            # Coin de l'emprise du meuble : origine de l'emprise agrandie, décalée des marges
+            offset_x, offset_y = (margin_back[unit], margin_x[unit]) if rotated else (margin_x[unit], margin_back[unit])
+            layout['x'][unit] = round(x + offset_x, 1)
+            layout['y'][unit] = round(y + offset_y, 1)
+            layout['rotation'][unit] = 90 if rotated else 0
+            layout['placed'][unit] = True
+    return layout
+
 
 class PositionPredictor:
     """Prédicteur pour les positions des produits avec noms de faces"""
@@ -326,23 +1645,29 @@ class PositionPredictor:
             4: ['front', 'back', 'left', 'right']
         }
 
-    def train(self, X: pd.DataFrame, furniture_dimensions: Dict[str, np.ndarray]):
-        """Entraîne les modèles de prédiction des positions"""
+    def train(self, X: pd.DataFrame, furniture_dimensions: Dict[str, np.ndarray], n_jobs: int = 1) -> Dict[str, float]:
+        """Entraîne les modèles de prédiction des positions (modèles indépendants en parallèle)
+
+        Retourne le temps d'entraînement de chaque modèle.
+        """
         targets = self._generate_position_targets(X, furniture_dimensions)
 
+        tasks, test_sets = [], {}
         for position, target in targets.items():
-            if position == 'face':
-                # Pour les faces, on utilise un classificateur spécial
-                self.models[position] = RandomForestClassifier(n_estimators=50, random_state=42)
-            else:
-                self.models[position] = RandomForestClassifier(n_estimators=50, random_state=42)
-
+            estimator = RandomForestClassifier(n_estimators=50, random_state=42)
             X_train, X_test, y_train, y_test = train_test_split(X, target, test_size=0.2, random_state=42)
-            self.models[position].fit(X_train, y_train)
+            tasks.append((position, estimator, X_train, y_train))
+            test_sets[position] = (X_test, y_test)
 
+        fitted, timings = fit_estimators(tasks, n_jobs)
+        self.models.update(fitted)
+
+        for position, (X_test, y_test) in test_sets.items():
             y_pred = self.models[position].predict(X_test)
             accuracy = accuracy_score(y_test, y_pred)
-            print(f"✅ Modèle position {position} entraîné - Précision: {accuracy:.3f}")
+            print(f"✅ Modèle position {position} entraîné - Précision: {accuracy:.3f} ({timings[position]:.2f}s)")
+
+        return timings
 
     def _generate_position_targets(self, X: pd.DataFrame, furniture_dimensions: Dict[str, np.ndarray]) -> Dict[
         str, np.ndarray]:
@@ -398,11 +1723,240 @@ class PositionPredictor:
 
         return predictions
 
+    def place(self, processed_data: pd.DataFrame, furniture_types: np.ndarray,
+              furniture_dimensions: Dict[str, np.ndarray], positions: Dict[str, np.ndarray],
+              units: np.ndarray = None, optimization_level: int = DEFAULT_OPTIMIZATION_LEVEL,
+              label_encoders: Dict[str, Any] = None) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Rend les positions physiquement réalisables avec les dimensions réelles des produits
+
+        Les étagères et quantités prédites (après contraintes) servent d'étagère souhaitée et de
+        facings demandés ; le moteur de placement range les facings dans la largeur, la hauteur
+        et la profondeur des étagères, avec le solveur du niveau d'optimisation demandé.
+        Retourne les positions et le résumé du solveur (positions inchangées sans dimensions produit).
+        """
+        missing_columns = [col for col in PRODUCT_DIMENSION_COLUMNS.values() if col not in processed_data.columns]
+        if missing_columns:
+            print(f"⚠️ Placement ignoré, dimensions produit absentes: {', '.join(missing_columns)}")
+            return positions, {}
+
+        bin_index, bins = build_shelf_bins(furniture_types, furniture_dimensions, positions.get('face'), units)
+        items = {dimension: pd.to_numeric(processed_data[column], errors='coerce').fillna(0).to_numpy(dtype=float)
+                 for dimension, column in PRODUCT_DIMENSION_COLUMNS.items()}
+        items.update({'bin': bin_index, 'quantite': positions['quantite'], 'etagere': positions.get('etagere')})
+        items.update(merchandising_demands(processed_data, label_encoders))
+
+        placement, info = solve_placement(items, bins, optimization_level)
+        placed_positions = dict(positions)
+        placed_positions.update(placement)
+
+        n_unplaced = int((~placement['placed']).sum())
+        print(f"📐 Placement ({info['solver']}, niveau {info['optimization_level']}): "
+              f"{len(bin_index) - n_unplaced}/{len(bin_index)} produits placés sur {len(bins['largeur'])} "
+              f"faces de meubles, remplissage {info['fill_rate']:.1%} ({info['elapsed']:.2f}s)")
+        return placed_positions, info
+
+    def get_state(self) -> Dict[str, Any]:
+        """Retourne l'état entraîné du prédicteur (pour la sauvegarde)"""
+        return {'models': dict(self.models)}
+
+    def set_state(self, state: Dict[str, Any]):
+        """Restaure l'état entraîné du prédicteur"""
+        self.models.update(state.get('models', {}))
+
+
+# Groupes de contraintes : description et message de résumé affiché à l'application
+CONSTRAINT_GROUPS = {
+    'temperature': {
+        'info_key': 'contraintes_temperature',
+        'description': "Produits froids forcés vers meubles réfrigérés",
+        'message': "🧊 Contraintes de température appliquées"
+    },
+    'faces': {
+        'info_key': 'contraintes_faces',
+        'description': "Validation faces selon type meuble (1, 2 ou 4 faces)",
+        'message': "🔄 Contraintes de faces appliquées"
+    },
+    'dimensions': {
+        'info_key': 'contraintes_dimensions',
+        'description': "Limites min/max pour toutes les dimensions",
+        'message': "📏 Contraintes de dimensions appliquées"
+    },
+    'supplier': {
+        'info_key': 'contraintes_fournisseur',
+        'description': "Placement exigé par fournisseur",
+        'message': "🏭 Contraintes fournisseur appliquées"
+    },
+    'packaging': {
+        'info_key': 'contraintes_conditionnement',
+        'description': "Adaptation selon type conditionnement",
+        'message': "📦 Contraintes de conditionnement appliquées"
+    },
+    'legal': {
+        'info_key': 'contraintes_legales',
+        'description': "Restrictions légales (âge, licence)",
+        'message': "⚖️ Contraintes légales appliquées"
+    },
+    'seasonal': {
+        'info_key': 'contraintes_saisonnieres',
+        'description': "Priorité selon saison actuelle",
+        'message': "🌟 Contraintes saisonnières appliquées (saison: {season})"
+    },
+    'zone': {
+        'info_key': 'contraintes_zone',
+        'description': "Adaptation selon zone magasin",
+        'message': "🏢 Contraintes de zone appliquées"
+    },
+    'merchandising': {
+        'info_key': 'contraintes_merchandising',
+        'description': "Priorité merchandising",
+        'message': "🎯 Contraintes de merchandising appliquées"
+    },
+    'store_surface': {
+        'info_key': 'contraintes_surface_magasin',
+        'description': "Adaptation taille meubles selon surface magasin",
+        'message': "🏬 Contraintes de surface magasin appliquées"
+    }
+}
+
+# Table des règles métier : une ligne = (colonne, prédicat, condition sur les prédictions, cible, action).
+# Les règles sont exécutées par priorité croissante (ordre de la table à priorité égale).
+#   predicate : ('eq' | 'in' | 'lt' | 'le' | 'gt' | 'ge', valeur) ou ('season', None) sur la colonne d'entrée
+#   condition : ('type_not_in', [types]) | ('faces_min', n) | ('face_invalid', None) sur les prédictions courantes
+#   action    : ('set' | 'min' | 'max' | 'choice' | 'clip', valeur) appliquée à la cible
+CONSTRAINT_RULES = [
+    # 1. Température : produits froids → meubles réfrigérés
+    {'group': 'temperature', 'priority': 10, 'column': 'input_contrainte_temperature_produit',
+     'predicate': ('eq', 1), 'condition': ('type_not_in', [9, 10]),
+     'target': 'furniture_type', 'action': ('set', 9),
+     'label': "Changement type meuble vers réfrigérateur/vitrine"},
+
+    # 2. Faces : face valide selon le nombre de faces du meuble
+    {'group': 'faces', 'priority': 20, 'column': None, 'predicate': None,
+     'condition': ('face_invalid', None), 'target': 'positions.face', 'action': ('set', 'front'),
+     'label': "Assignation face valide: front, back, left, right"},
+
+    # 3. Dimensions : limites min/max
+    {'group': 'dimensions', 'priority': 30, 'column': None, 'predicate': None,
+     'target': 'dimensions.largeur', 'action': ('clip', (30, 400)),
+     'label': "Clipping des valeurs dans les limites autorisées"},
+    {'group': 'dimensions', 'priority': 30, 'column': None, 'predicate': None,
+     'target': 'dimensions.hauteur', 'action': ('clip', (50, 300)),
+     'label': "Clipping des valeurs dans les limites autorisées"},
+    {'group': 'dimensions', 'priority': 30, 'column': None, 'predicate': None,
+     'target': 'dimensions.profondeur', 'action': ('clip', (20, 80)),
+     'label': "Clipping des valeurs dans les limites autorisées"},
+    {'group': 'dimensions', 'priority': 30, 'column': None, 'predicate': None,
+     'target': 'dimensions.nb_etageres_unique_face', 'action': ('clip', (1, 10)),
+     'label': "Clipping des valeurs dans les limites autorisées"},
+    {'group': 'dimensions', 'priority': 30, 'column': None, 'predicate': None,
+     'target': 'dimensions.nb_colonnes_unique_face', 'action': ('clip', (1, 15)),
+     'label': "Clipping des valeurs dans les limites autorisées"},
+    {'group': 'dimensions', 'priority': 30, 'column': None, 'predicate': None,
+     'target': 'dimensions.nb_etageres_front_back', 'action': ('clip', (0, 10)),
+     'label': "Clipping des valeurs dans les limites autorisées"},
+    {'group': 'dimensions', 'priority': 30, 'column': None, 'predicate': None,
+     'target': 'dimensions.nb_colonnes_front_back', 'action': ('clip', (0, 15)),
+     'label': "Clipping des valeurs dans les limites autorisées"},
+    {'group': 'dimensions', 'priority': 30, 'column': None, 'predicate': None,
+     'target': 'dimensions.nb_etageres_left_right', 'action': ('clip', (0, 10)),
+     'label': "Clipping des valeurs dans les limites autorisées"},
+    {'group': 'dimensions', 'priority': 30, 'column': None, 'predicate': None,
+     'target': 'dimensions.nb_colonnes_left_right', 'action': ('clip', (0, 15)),
+     'label': "Clipping des valeurs dans les limites autorisées"},
+
+    # 4. Fournisseur : placement exigé
+    {'group': 'supplier', 'priority': 40, 'column': 'input_placement_exige_supplier',
+     'predicate': ('eq', 'tete_gondole'), 'target': 'positions.colonne', 'action': ('set', 1),
+     'label': "Tête gondole → colonne 1"},
+    {'group': 'supplier', 'priority': 40, 'column': 'input_placement_exige_supplier',
+     'predicate': ('eq', 'niveau_oeil'), 'target': 'positions.etagere', 'action': ('choice', [3, 4]),
+     'label': "Niveau œil → étagères 3-4"},
+
+    # 5. Conditionnement
+    {'group': 'packaging', 'priority': 50, 'column': 'input_contrainte_conditionnement_produit',
+     'predicate': ('eq', 'fragile'), 'target': 'positions.quantite', 'action': ('min', 3),
+     'label': "Fragile → quantité réduite"},
+    {'group': 'packaging', 'priority': 50, 'column': 'input_contrainte_conditionnement_produit',
+     'predicate': ('eq', 'liquide'), 'target': 'positions.etagere', 'action': ('min', 2),
+     'label': "Liquide → étagères basses"},
+
+    # 6. Contraintes légales
+    {'group': 'legal', 'priority': 60, 'column': 'input_type_contrainte_legal',
+     'predicate': ('eq', 'age'), 'target': 'positions.etagere', 'action': ('max', 4),
+     'label': "Âge → étagères hautes"},
+    {'group': 'legal', 'priority': 60, 'column': 'input_type_contrainte_legal',
+     'predicate': ('eq', 'licence'), 'condition': ('faces_min', 2),
+     'target': 'positions.face', 'action': ('set', 'back'),
+     'label': "Licence → face arrière"},
+
+    # 7. Saisonnalité : produits de saison en positions privilégiées
+    {'group': 'seasonal', 'priority': 70, 'column': 'input_saisonnalite_produit',
+     'predicate': ('season', None), 'target': 'positions.face', 'action': ('set', 'front'),
+     'label': "Produits saison → positions privilégiées"},
+    {'group': 'seasonal', 'priority': 70, 'column': 'input_saisonnalite_produit',
+     'predicate': ('season', None), 'target': 'positions.etagere', 'action': ('set', 3),
+     'label': "Produits saison → positions privilégiées"},
+    {'group': 'seasonal', 'priority': 70, 'column': 'input_saisonnalite_produit',
+     'predicate': ('season', None), 'target': 'positions.colonne', 'action': ('min', 3),
+     'label': "Produits saison → positions privilégiées"},
+
+    # 8. Zone : température et emplacement
+    {'group': 'zone', 'priority': 80, 'column': 'input_temperature_zone',
+     'predicate': ('eq', 'froid'), 'condition': ('type_not_in', [9, 10]),
+     'target': 'furniture_type', 'action': ('set', 9),
+     'label': "Zone froide → meuble réfrigéré"},
+    {'group': 'zone', 'priority': 80, 'column': 'input_emplacement_zone',
+     'predicate': ('eq', 'entree'), 'target': 'positions.face', 'action': ('set', 'front'),
+     'label': "Entrée → positions attractives"},
+    {'group': 'zone', 'priority': 80, 'column': 'input_emplacement_zone',
+     'predicate': ('eq', 'entree'), 'target': 'positions.etagere', 'action': ('set', 3),
+     'label': "Entrée → positions attractives"},
+
+    # 9. Priorité merchandising
+    {'group': 'merchandising', 'priority': 90, 'column': 'input_priorite_merchandising',
+     'predicate': ('ge', 8), 'target': 'positions.face', 'action': ('set', 'front'),
+     'label': "Haute priorité → face avant niveau œil"},
+    {'group': 'merchandising', 'priority': 90, 'column': 'input_priorite_merchandising',
+     'predicate': ('ge', 8), 'target': 'positions.etagere', 'action': ('set', 3),
+     'label': "Haute priorité → face avant niveau œil"},
+    {'group': 'merchandising', 'priority': 90, 'column': 'input_priorite_merchandising',
+     'predicate': ('ge', 8), 'target': 'positions.colonne', 'action': ('min', 3),
+     'label': "Haute priorité → face avant niveau œil"},
+    {'group': 'merchandising', 'priority': 90, 'column': 'input_priorite_merchandising',
+     'predicate': ('ge', 8), 'target': 'positions.quantite', 'action': ('max', 5),
+     'label': "Haute priorité → face avant niveau œil"},
+    {'group': 'merchandising', 'priority': 90, 'column': 'input_priorite_merchandising',
+     'predicate': ('le', 3), 'condition': ('faces_min', 2),
+     'target': 'positions.face', 'action': ('set', 'back'),
+     'label': "Basse priorité → positions arrière"},
+    {'group': 'merchandising', 'priority': 90, 'column': 'input_priorite_merchandising',
+     'predicate': ('le', 3), 'target': 'positions.etagere', 'action': ('max', 4),
+     'label': "Basse priorité → positions arrière"},
+
+    # 10. Surface magasin
+    {'group': 'store_surface', 'priority': 100, 'column': 'input_surface_magasin',
+     'predicate': ('lt', 300), 'target': 'dimensions.largeur', 'action': ('min', 100),
+     'label': "Petit magasin → meubles compacts"},
+    {'group': 'store_surface', 'priority': 100, 'column': 'input_surface_magasin',
+     'predicate': ('lt', 300), 'target': 'dimensions.hauteur', 'action': ('min', 180),
+     'label': "Petit magasin → meubles compacts"},
+    {'group': 'store_surface', 'priority': 100, 'column': 'input_surface_magasin',
+     'predicate': ('gt', 800), 'target': 'dimensions.largeur', 'action': ('max', 150),
+     'label': "Grand magasin → meubles imposants"},
+    {'group': 'store_surface', 'priority': 100, 'column': 'input_surface_magasin',
+     'predicate': ('gt', 800), 'target': 'dimensions.hauteur', 'action': ('max', 200),
+     'label': "Grand magasin → meubles imposants"}
+]
+
 
 class ConstraintManager:
     """Gestionnaire des contraintes métier - TOUTES LES CONTRAINTES"""
 
-    def __init__(self):
+    PREDICATE_OPS = ('eq', 'in', 'lt', 'le', 'gt', 'ge', 'season')
+    CONDITION_OPS = ('type_not_in', 'faces_min', 'face_invalid')
+    ACTION_OPS = ('set', 'min', 'max', 'choice', 'clip')
+
+    def __init__(self, rules: List[Dict[str, Any]] = None):
         self.furniture_constraints = {
             1: {'faces': 1, 'max_faces': 1, 'temp_compatible': ['ambiante'], 'name': 'planogram'},
             2: {'faces': 2, 'max_faces': 2, 'temp_compatible': ['ambiante'], 'name': 'gondola'},
@@ -425,245 +1979,214 @@ class ConstraintManager:
             4: ['front', 'back', 'left', 'right']
         }
 
+        # Règles métier (table déclarative) compilées une seule fois en plan d'exécution
+        self.rules = list(CONSTRAINT_RULES if rules is None else rules)
+        self._plan = self._compile_rules(self.rules)
+
+        # Nombre de produits modifiés par règle lors du dernier appel à apply_constraints
+        self.constraint_summary = {}
+
+    def add_rules(self, rules: List[Dict[str, Any]]):
+        """Ajoute des règles (ex: spécifiques à un magasin) et recompile le plan d'exécution"""
+        self.rules.extend(rules)
+        self._plan = self._compile_rules(self.rules)
+
+    def load_rules_file(self, rules_path: str):
+        """Ajoute les règles définies dans un fichier JSON (liste de règles au format de CONSTRAINT_RULES)"""
+        with open(rules_path, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+        self.add_rules(rules)
+        print(f"✅ {len(rules)} règle(s) chargée(s) depuis {rules_path}")
+
+    def _compile_rules(self, rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Valide les règles et les trie en plan d'exécution (priorité, puis ordre de la table)"""
+        plan = []
+        for order, rule in enumerate(rules):
+            predicate = tuple(rule['predicate']) if rule.get('predicate') is not None else None
+            condition = tuple(rule['condition']) if rule.get('condition') is not None else None
+            action = tuple(rule['action'])
+
+            if rule.get('column') is None and predicate is not None:
+                raise ValueError(f"Règle {rule['group']}: un prédicat nécessite une colonne d'entrée")
+            if predicate is not None and predicate[0] not in self.PREDICATE_OPS:
+                raise ValueError(f"Règle {rule['group']}: prédicat inconnu '{predicate[0]}'")
+            if condition is not None and condition[0] not in self.CONDITION_OPS:
+                raise ValueError(f"Règle {rule['group']}: condition inconnue '{condition[0]}'")
+            if action[0] not in self.ACTION_OPS:
+                raise ValueError(f"Règle {rule['group']}: action inconnue '{action[0]}'")
+
+            plan.append({
+                'group': rule['group'],
+                'priority': rule.get('priority', 100),
+                'order': order,
+                'column': rule.get('column'),
+                'predicate': predicate,
+                'condition': condition,
+                'target': tuple(rule['target'].split('.')),
+                'action': action
+            })
+
+        return sorted(plan, key=lambda step: (step['priority'], step['order']))
+
     def apply_constraints(self, predictions: Dict[str, Any], original_data: pd.DataFrame) -> Dict[str, Any]:
-        """Applique TOUTES les contraintes métier aux prédictions"""
+        """Applique TOUTES les contraintes métier aux prédictions (plan compilé, masques vectorisés)"""
         constrained_predictions = predictions.copy()
+        self.constraint_summary = {}
 
-        print("🔧 Application des contraintes métier...")
+        # Faces codées en entiers (1 = front ... 4 = right) : règles appliquées sur les noms, codes rétablis ensuite
+        positions = constrained_predictions.get('positions')
+        face_codes = positions is not None and positions.get('face') is not None and \
+            np.asarray(positions['face']).dtype.kind in 'iuf'
+        if face_codes:
+            constrained_predictions['positions'] = {**positions, 'face': self._face_names(positions['face'])}
 
-        # 1. CONTRAINTES DE TEMPÉRATURE
-        constrained_predictions = self._apply_temperature_constraints(constrained_predictions, original_data)
+        print("🔧 Application des contraintes métier...")
 
-        # 2. CONTRAINTES DE FACES
-        constrained_predictions = self._apply_face_constraints(constrained_predictions)
+        # Règles dont la colonne d'entrée est absente : ignorées avant tout calcul sur les lignes
+        columns = set(original_data.columns)
+        active_steps = [step for step in self._plan if step['column'] is None or step['column'] in columns]
 
-        # 3. CONTRAINTES DE DIMENSIONS
-        constrained_predictions = self._apply_dimension_constraints(constrained_predictions)
+        n_rows = len(constrained_predictions['furniture_type'])
+        predicate_masks = {}
+        affected_by_group = {}
 
-        # 4. CONTRAINTES DE PLACEMENT FOURNISSEUR
-        constrained_predictions = self._apply_supplier_constraints(constrained_predictions, original_data)
+        for step in active_steps:
+            affected = affected_by_group.setdefault(step['group'], np.zeros(n_rows, dtype=bool))
 
-        # 5. CONTRAINTES DE CONDITIONNEMENT
-        constrained_predictions = self._apply_packaging_constraints(constrained_predictions, original_data)
+            target = self._resolve_target(constrained_predictions, step['target'])
+            if target is None:
+                continue
 
-        # 6. CONTRAINTES LÉGALES
-        constrained_predictions = self._apply_legal_constraints(constrained_predictions, original_data)
+            # Masque du prédicat sur les données d'entrée (calculé une fois par appel)
+            if step['predicate'] is None:
+                mask = np.ones(n_rows, dtype=bool)
+            else:
+                key = (step['column'], step['predicate'][0], repr(step['predicate'][1]))
+                if key not in predicate_masks:
+                    predicate_masks[key] = self._evaluate_predicate(original_data, step['column'], *step['predicate'])
+                mask = predicate_masks[key]
 
-        # 7. CONTRAINTES SAISONNIÈRES/ÉVÉNEMENTS
-        constrained_predictions = self._apply_seasonal_constraints(constrained_predictions, original_data)
+            # Condition sur l'état courant des prédictions
+            if step['condition'] is not None:
+                mask = mask & self._evaluate_condition(constrained_predictions, *step['condition'])
 
-        # 8. CONTRAINTES DE ZONE
-        constrained_predictions = self._apply_zone_constraints(constrained_predictions, original_data)
+            affected |= self._apply_action(target, mask, *step['action'])
 
-        # 9. CONTRAINTES DE PRIORITÉ MERCHANDISING
-        constrained_predictions = self._apply_merchandising_constraints(constrained_predictions, original_data)
+        season = self._get_current_season()
+        for group, affected in affected_by_group.items():
+            message = CONSTRAINT_GROUPS.get(group, {}).get('message', f"🔧 Contraintes {group} appliquées")
+            self._record(group, affected.sum(), message.format(season=season))
 
-        # 10. CONTRAINTES DE SURFACE MAGASIN
-        constrained_predictions = self._apply_store_surface_constraints(constrained_predictions, original_data)
+        if face_codes:
+            constrained_predictions['positions']['face'] = self._face_codes(constrained_predictions['positions']['face'])
 
         print("✅ Toutes les contraintes appliquées")
         return constrained_predictions
 
-    def _apply_temperature_constraints(self, predictions: Dict[str, Any], original_data: pd.DataFrame) -> Dict[
-        str, Any]:
-        """1. Contraintes de température - Produits froids → meubles réfrigérés"""
-        if 'input_contrainte_temperature_produit' in original_data.columns:
-            temp_constraints = original_data['input_contrainte_temperature_produit'].values
-            furniture_types = predictions['furniture_type']
-
-            for i, (temp_constraint, furniture_type) in enumerate(zip(temp_constraints, furniture_types)):
-                furniture_info = self.furniture_constraints.get(furniture_type, {})
-                temp_compatible = furniture_info.get('temp_compatible', ['ambiante'])
-
-                # Si produit froid mais meuble non réfrigéré
-                if temp_constraint == 1 and 'froid' not in temp_compatible:
-                    predictions['furniture_type'][i] = 9  # Réfrigérateur
-                    print(f"  🧊 Produit {i + 1}: Meuble changé vers réfrigérateur (contrainte température)")
-
-        return predictions
-
-    def _apply_face_constraints(self, predictions: Dict[str, Any]) -> Dict[str, Any]:
-        """2. Contraintes de faces - Validation des faces selon le type de meuble"""
+    def _face_names(self, codes: np.ndarray) -> np.ndarray:
+        """Codes de face 1-4 → noms front/back/left/right (code inconnu conservé en texte, donc face invalide)"""
+        codes = np.asarray(codes)
+        names = codes.astype(str).astype(object)
+        for rank, face_name in enumerate(self.face_mapping[4]):
+            names[codes == rank + 1] = face_name
+        return names
+
+    def _face_codes(self, names: np.ndarray) -> np.ndarray:
+        """Noms de face → codes 1-4 (inverse de _face_names)"""
+        codes = np.zeros(len(names), dtype=int)
+        for rank, face_name in enumerate(self.face_mapping[4]):
+            codes[names == face_name] = rank + 1
+        unknown = codes == 0
+        codes[unknown] = np.asarray(names[unknown]).astype(float).astype(int)
+        return codes
+
+    def _record(self, rule: str, count: int, message: str):
+        """Enregistre le nombre de produits modifiés par une règle et affiche le résumé"""
+        self.constraint_summary[rule] = self.constraint_summary.get(rule, 0) + int(count)
+        print(f"  {message}: {int(count)} produit(s)")
+
+    @staticmethod
+    def _resolve_target(predictions: Dict[str, Any], target: Tuple[str, ...]) -> Optional[np.ndarray]:
+        """Retourne le tableau ciblé par une règle (ex: ('positions', 'etagere')) ou None s'il est absent"""
+        value = predictions
+        for key in target:
+            if not isinstance(value, dict) or key not in value:
+                return None
+            value = value[key]
+        return value
+
+    def _evaluate_predicate(self, original_data: pd.DataFrame, column: str, op: str, value: Any) -> np.ndarray:
+        """Masque booléen d'un prédicat évalué sur une colonne d'entrée"""
+        if op == 'eq':
+            return self._column_equals(original_data, column, value)
+        if op == 'in':
+            return original_data[column].isin(value).to_numpy(dtype=bool)
+        if op == 'season':
+            return self._column_equals(original_data, column, self._get_current_season())
+
+        # Comparaisons numériques (valeurs non numériques → NaN, donc hors masque)
+        values = self._numeric_column(original_data, column)
+        comparators = {'lt': np.less, 'le': np.less_equal, 'gt': np.greater, 'ge': np.greater_equal}
+        return comparators[op](values, value)
+
+    def _evaluate_condition(self, predictions: Dict[str, Any], op: str, value: Any) -> np.ndarray:
+        """Masque booléen d'une condition évaluée sur les prédictions courantes"""
         furniture_types = predictions['furniture_type']
-        faces = predictions['positions']['face']
-
-        for i, (furniture_type, face) in enumerate(zip(furniture_types, faces)):
-            faces_count = self.furniture_constraints.get(furniture_type, {}).get('faces', 1)
-            available_faces = self.face_mapping[faces_count]
-
-            # Si la face assignée n'est pas disponible pour ce type de meuble
-            if face not in available_faces:
-                # Assigner une face valide
-                predictions['positions']['face'][i] = available_faces[0]
-                print(f"  🔄 Produit {i + 1}: Face changée de '{face}' vers '{available_faces[0]}'")
-
-        return predictions
-
-    def _apply_dimension_constraints(self, predictions: Dict[str, Any]) -> Dict[str, Any]:
-        """3. Contraintes de dimensions - Limites min/max"""
-        dimension_limits = {
-            'largeur': (30, 400),
-            'hauteur': (50, 300),
-            'profondeur': (20, 80),
-            'nb_etageres_unique_face': (1, 10),
-            'nb_colonnes_unique_face': (1, 15),
-            'nb_etageres_front_back': (0, 10),
-            'nb_colonnes_front_back': (0, 15),
-            'nb_etageres_left_right': (0, 10),
-            'nb_colonnes_left_right': (0, 15)
-        }
-
-        for dimension, (min_val, max_val) in dimension_limits.items():
-            if dimension in predictions['dimensions']:
-                original_values = predictions['dimensions'][dimension].copy()
-                predictions['dimensions'][dimension] = np.clip(predictions['dimensions'][dimension], min_val, max_val)
-
-                # Compter les modifications
-                modified = np.sum(original_values != predictions['dimensions'][dimension])
-                if modified > 0:
-                    print(f"  📏 {modified} valeurs de {dimension} ajustées aux limites")
-
-        return predictions
-
-    def _apply_supplier_constraints(self, predictions: Dict[str, Any], original_data: pd.DataFrame) -> Dict[str, Any]:
-        """4. Contraintes fournisseur - Placement exigé, espace minimum"""
-        if 'input_placement_exige_supplier' in original_data.columns:
-            placement_requirements = original_data['input_placement_exige_supplier'].values
-
-            for i, placement in enumerate(placement_requirements):
-                if placement == 'tete_gondole':
-                    # Forcer position en tête (colonne 1)
-                    predictions['positions']['colonne'][i] = 1
-                elif placement == 'niveau_oeil':
-                    # Forcer étagère niveau œil (étagère 3-4)
-                    predictions['positions']['etagere'][i] = np.random.choice([3, 4])
-
-            print(f"  🏭 Contraintes fournisseur appliquées")
-
-        return predictions
-
-    def _apply_packaging_constraints(self, predictions: Dict[str, Any], original_data: pd.DataFrame) -> Dict[str, Any]:
-        """5. Contraintes de conditionnement - Fragile, liquide, etc."""
-        if 'input_contrainte_conditionnement_produit' in original_data.columns:
-            packaging_constraints = original_data['input_contrainte_conditionnement_produit'].values
-
-            for i, packaging in enumerate(packaging_constraints):
-                if packaging == 'fragile':
-                    # Réduire la quantité par position pour les produits fragiles
-                    predictions['positions']['quantite'][i] = min(3, predictions['positions']['quantite'][i])
-                elif packaging == 'liquide':
-                    # Placer sur étagères basses
-                    predictions['positions']['etagere'][i] = min(2, predictions['positions']['etagere'][i])
-
-            print(f"  📦 Contraintes de conditionnement appliquées")
-
-        return predictions
-
-    def _apply_legal_constraints(self, predictions: Dict[str, Any], original_data: pd.DataFrame) -> Dict[str, Any]:
-        """6. Contraintes légales - Âge, licence, certification"""
-        if 'input_type_contrainte_legal' in original_data.columns:
-            legal_constraints = original_data['input_type_contrainte_legal'].values
-
-            for i, legal_type in enumerate(legal_constraints):
-                if legal_type == 'age':
-                    # Placer en hauteur (étagères hautes)
-                    predictions['positions']['etagere'][i] = max(4, predictions['positions']['etagere'][i])
-                elif legal_type == 'licence':
-                    # Zone spéciale (face arrière si disponible)
-                    if 'back' in self.face_mapping.get(
-                            self.furniture_constraints.get(predictions['furniture_type'][i], {}).get('faces', 1), []):
-                        predictions['positions']['face'][i] = 'back'
-
-            print(f"  ⚖️ Contraintes légales appliquées")
-
-        return predictions
-
-    def _apply_seasonal_constraints(self, predictions: Dict[str, Any], original_data: pd.DataFrame) -> Dict[str, Any]:
-        """7. Contraintes saisonnières et événements"""
-        if 'input_saisonnalite_produit' in original_data.columns:
-            seasonal_data = original_data['input_saisonnalite_produit'].values
-            current_season = self._get_current_season()
-
-            for i, product_season in enumerate(seasonal_data):
-                if product_season == current_season:
-                    # Produits de saison → positions privilégiées (face avant, niveau œil)
-                    predictions['positions']['face'][i] = 'front'
-                    predictions['positions']['etagere'][i] = 3  # Niveau œil
-                    predictions['positions']['colonne'][i] = min(3, predictions['positions']['colonne'][
-                        i])  # Colonnes centrales
-
-            print(f"  🌟 Contraintes saisonnières appliquées (saison: {current_season})")
-
-        return predictions
+        if op == 'type_not_in':
+            return ~np.isin(furniture_types, value)
 
-    def _apply_zone_constraints(self, predictions: Dict[str, Any], original_data: pd.DataFrame) -> Dict[str, Any]:
-        """8. Contraintes de zone - Température, emplacement, éclairage"""
-        if 'input_temperature_zone' in original_data.columns:
-            zone_temps = original_data['input_temperature_zone'].values
+        faces_count = self._faces_count(furniture_types)
+        if op == 'faces_min':
+            return faces_count >= value
 
-            for i, zone_temp in enumerate(zone_temps):
-                if zone_temp == 'froid':
-                    # Forcer meuble réfrigéré
-                    if predictions['furniture_type'][i] not in [9, 10]:
-                        predictions['furniture_type'][i] = 9
-
-        if 'input_emplacement_zone' in original_data.columns:
-            zone_locations = original_data['input_emplacement_zone'].values
-
-            for i, location in enumerate(zone_locations):
-                if location == 'entree':
-                    # Zone d'entrée → positions attractives
-                    predictions['positions']['face'][i] = 'front'
-                    predictions['positions']['etagere'][i] = 3
-
-            print(f"  🏢 Contraintes de zone appliquées")
-
-        return predictions
-
-    def _apply_merchandising_constraints(self, predictions: Dict[str, Any], original_data: pd.DataFrame) -> Dict[
-        str, Any]:
-        """9. Contraintes de priorité merchandising"""
-        if 'input_priorite_merchandising' in original_data.columns:
-            priorities = original_data['input_priorite_merchandising'].values
-
-            for i, priority in enumerate(priorities):
-                if priority >= 8:  # Haute priorité
-                    # Positions privilégiées
-                    predictions['positions']['face'][i] = 'front'
-                    predictions['positions']['etagere'][i] = 3  # Niveau œil
-                    predictions['positions']['colonne'][i] = min(3, predictions['positions']['colonne'][i])
-                    predictions['positions']['quantite'][i] = max(5, predictions['positions']['quantite'][i])
-                elif priority <= 3:  # Basse priorité
-                    # Positions moins visibles
-                    available_faces = self.face_mapping.get(
-                        self.furniture_constraints.get(predictions['furniture_type'][i], {}).get('faces', 1), ['front'])
-                    if 'back' in available_faces:
-                        predictions['positions']['face'][i] = 'back'
-                    predictions['positions']['etagere'][i] = max(4, predictions['positions']['etagere'][i])
-
-            print(f"  🎯 Contraintes de merchandising appliquées")
-
-        return predictions
-
-    def _apply_store_surface_constraints(self, predictions: Dict[str, Any], original_data: pd.DataFrame) -> Dict[
-        str, Any]:
-        """10. Contraintes de surface magasin"""
-        if 'input_surface_magasin' in original_data.columns:
-            store_surfaces = original_data['input_surface_magasin'].values
-
-            for i, surface in enumerate(store_surfaces):
-                if surface < 300:  # Petit magasin
-                    # Meubles plus compacts
-                    predictions['dimensions']['largeur'][i] = min(100, predictions['dimensions']['largeur'][i])
-                    predictions['dimensions']['hauteur'][i] = min(180, predictions['dimensions']['hauteur'][i])
-                elif surface > 800:  # Grand magasin
-                    # Meubles plus imposants
-                    predictions['dimensions']['largeur'][i] = max(150, predictions['dimensions']['largeur'][i])
-                    predictions['dimensions']['hauteur'][i] = max(200, predictions['dimensions']['hauteur'][i])
-
-            print(f"  🏬 Contraintes de surface magasin appliquées")
-
-        return predictions
+        # face_invalid : rang de la face dans front/back/left/right ≥ nombre de faces du meuble
+        faces = predictions['positions']['face']
+        face_rank = np.full(len(faces), len(self.face_mapping[4]))
+        for rank, face_name in enumerate(self.face_mapping[4]):
+            face_rank[faces == face_name] = rank
+        return face_rank >= faces_count
+
+    @staticmethod
+    def _apply_action(target: np.ndarray, mask: np.ndarray, op: str, value: Any) -> np.ndarray:
+        """Applique une action sur les lignes masquées de la cible
+
+        Retourne le masque des lignes dont la valeur a réellement changé (une ligne déjà
+        conforme n'est pas comptée).
+        """
+        previous = target[mask].copy()
+        if op == 'clip':
+            min_val, max_val = value
+            target[mask] = np.clip(target[mask], min_val, max_val)
+        elif op == 'set':
+            target[mask] = value
+        elif op == 'min':
+            target[mask] = np.minimum(value, target[mask])
+        elif op == 'max':
+            target[mask] = np.maximum(value, target[mask])
+        elif op == 'choice':
+            target[mask] = np.random.choice(value, size=int(mask.sum()))
+
+        changed = mask.copy()
+        changed[mask] = target[mask] != previous
+        return changed
+
+    def _faces_count(self, furniture_types: np.ndarray) -> np.ndarray:
+        """Nombre de faces de chaque meuble (1 par défaut pour les types inconnus)"""
+        furniture_types = np.asarray(furniture_types)
+        faces_count = np.ones(len(furniture_types), dtype=int)
+        for furniture_type, info in self.furniture_constraints.items():
+            faces_count[furniture_types == furniture_type] = info.get('faces', 1)
+        return faces_count
+
+    @staticmethod
+    def _column_equals(original_data: pd.DataFrame, column: str, value: Any) -> np.ndarray:
+        """Masque booléen des lignes dont la colonne vaut la valeur donnée"""
+        return original_data[column].eq(value).to_numpy(dtype=bool)
+
+    @staticmethod
+    def _numeric_column(original_data: pd.DataFrame, column: str) -> np.ndarray:
+        """Colonne convertie en flottants (valeurs non numériques → NaN, donc hors masque)"""
+        return pd.to_numeric(original_data[column], errors='coerce').to_numpy(dtype=float)
 
     def _get_current_season(self) -> str:
         """Détermine la saison actuelle"""
@@ -678,69 +2201,62 @@ class ConstraintManager:
             return 'automne'
 
     def get_all_constraints_info(self) -> Dict[str, Any]:
-        """Retourne la liste complète de toutes les contraintes prises en charge"""
-        return {
-            "contraintes_temperature": {
-                "description": "Produits froids forcés vers meubles réfrigérés",
-                "colonnes_utilisees": ["input_contrainte_temperature_produit"],
-                "actions": ["Changement type meuble vers réfrigérateur/vitrine"]
-            },
-            "contraintes_faces": {
-                "description": "Validation faces selon type meuble (1, 2 ou 4 faces)",
-                "colonnes_utilisees": ["furniture_type"],
-                "actions": ["Assignation face valide: front, back, left, right"]
-            },
-            "contraintes_dimensions": {
-                "description": "Limites min/max pour toutes les dimensions",
-                "colonnes_utilisees": ["largeur", "hauteur", "profondeur", "nb_etageres", "nb_colonnes"],
-                "actions": ["Clipping des valeurs dans les limites autorisées"]
-            },
-            "contraintes_fournisseur": {
-                "description": "Placement exigé par fournisseur",
-                "colonnes_utilisees": ["input_placement_exige_supplier", "input_espace_minimum_supplier"],
-                "actions": ["Tête gondole → colonne 1", "Niveau œil → étagères 3-4"]
-            },
-            "contraintes_conditionnement": {
-                "description": "Adaptation selon type conditionnement",
-                "colonnes_utilisees": ["input_contrainte_conditionnement_produit"],
-                "actions": ["Fragile → quantité réduite", "Liquide → étagères basses"]
-            },
-            "contraintes_legales": {
-                "description": "Restrictions légales (âge, licence)",
-                "colonnes_utilisees": ["input_type_contrainte_legal"],
-                "actions": ["Âge → étagères hautes", "Licence → face arrière"]
-            },
-            "contraintes_saisonnieres": {
-                "description": "Priorité selon saison actuelle",
-                "colonnes_utilisees": ["input_saisonnalite_produit"],
-                "actions": ["Produits saison → positions privilégiées"]
-            },
-            "contraintes_zone": {
-                "description": "Adaptation selon zone magasin",
-                "colonnes_utilisees": ["input_temperature_zone", "input_emplacement_zone"],
-                "actions": ["Zone froide → meuble réfrigéré", "Entrée → positions attractives"]
-            },
-            "contraintes_merchandising": {
-                "description": "Priorité merchandising",
-                "colonnes_utilisees": ["input_priorite_merchandising"],
-                "actions": ["Haute priorité → face avant niveau œil", "Basse priorité → positions arrière"]
-            },
-            "contraintes_surface_magasin": {
-                "description": "Adaptation taille meubles selon surface magasin",
-                "colonnes_utilisees": ["input_surface_magasin"],
-                "actions": ["Petit magasin → meubles compacts", "Grand magasin → meubles imposants"]
-            }
-        }
+        """Retourne la liste complète de toutes les contraintes prises en charge (générée depuis la table)"""
+        info = {}
+        for step in self._plan:
+            rule = self.rules[step['order']]
+            group = CONSTRAINT_GROUPS.get(step['group'], {})
+            entry = info.setdefault(group.get('info_key', f"contraintes_{step['group']}"), {
+                "description": group.get('description', rule.get('label', step['group'])),
+                "colonnes_utilisees": [],
+                "actions": []
+            })
+
+            # Colonne d'entrée de la règle, ou champ ciblé pour les règles sans colonne
+            column = step['column'] or step['target'][-1]
+            if column not in entry['colonnes_utilisees']:
+                entry['colonnes_utilisees'].append(column)
+
+            label = rule.get('label', f"{step['target'][-1]} → {step['action'][0]} {step['action'][1]}")
+            if label not in entry['actions']:
+                entry['actions'].append(label)
+
+        return info
 
 
 class PlanogramModels:
     """Classe principale pour tous les modèles ML"""
 
-    def __init__(self):
+    def __init__(self, multi_output_dimensions: bool = False, n_jobs: int = 1):
         self.furniture_type_predictor = FurnitureTypePredictor()
-        self.dimension_predictor = FurnitureDimensionPredictor()
+        self.dimension_predictor = FurnitureDimensionPredictor(multi_output=multi_output_dimensions)
         self.position_predictor = PositionPredictor()
         self.constraint_manager = ConstraintManager()
+        # Colonnes utilisées à l'entraînement (figées pour l'inférence)
+        self.feature_columns = None
+        # Budget de cœurs pour l'entraînement (-1 = tous les cœurs)
+        self.n_jobs = n_jobs
+        # Temps d'entraînement (secondes) par modèle du dernier entraînement
+        self.training_times = {}
+
+    @property
+    def is_trained(self) -> bool:
+        """Indique si les modèles ont été entraînés ou chargés"""
+        return self.furniture_type_predictor.model is not None
+
+    def _select_features(self, processed_data: pd.DataFrame) -> pd.DataFrame:
+        """Construit la matrice de features (colonnes d'entraînement si disponibles)"""
+        if self.feature_columns is not None:
+            # Mêmes colonnes, même ordre qu'à l'entraînement ; colonnes absentes → 0
+            return processed_data.reindex(columns=self.feature_columns, fill_value=0).fillna(0)
+
+        feature_columns = [col for col in processed_data.columns
+                           if col.startswith('input_') and processed_data[col].dtype.kind in 'if']
+
+        if not feature_columns:
+            feature_columns = processed_data.select_dtypes(include=[np.number]).columns.tolist()
+
+        return processed_data[feature_columns].fillna(0)
 
     def train_models(self, processed_data: pd.DataFrame):
         """Entraîne tous les modèles"""
@@ -748,40 +2264,48 @@ class PlanogramModels:
 
         # Sélection des features pour l'entraînement
         feature_columns = [col for col in processed_data.columns
-                           if col.startswith('input_') and processed_data[col].dtype in ['int64', 'float64']]
+                           if col.startswith('input_') and processed_data[col].dtype.kind in 'if']
 
         if not feature_columns:
             print("⚠️ Aucune feature numérique trouvée, utilisation de toutes les colonnes")
             feature_columns = processed_data.select_dtypes(include=[np.number]).columns.tolist()
 
+        self.feature_columns = feature_columns
         X = processed_data[feature_columns].fillna(0)
 
+        # Les étapes restent séquentielles (chacune dépend des prédictions de la précédente),
+        # les modèles indépendants d'une même étape sont entraînés en parallèle
+        start_time = time.perf_counter()
+        self.training_times = {}
+
         # 1. Entraînement du prédicteur de types de meubles
-        self.furniture_type_predictor.train(X)
+        self.training_times.update(self.furniture_type_predictor.train(X, n_jobs=self.n_jobs))
 
         # 2. Prédiction des types pour l'entraînement des autres modèles
         furniture_types = self.furniture_type_predictor.predict(X)
 
         # 3. Entraînement du prédicteur de dimensions
-        self.dimension_predictor.train(X, furniture_types)
+        dimension_times = self.dimension_predictor.train(X, furniture_types, n_jobs=self.n_jobs)
+        self.training_times.update({f"dimension.{name}": seconds for name, seconds in dimension_times.items()})
 
         # 4. Prédiction des dimensions pour l'entraînement des positions
         furniture_dimensions = self.dimension_predictor.predict(X, furniture_types)
 
         # 5. Entraînement du prédicteur de positions
-        self.position_predictor.train(X, furniture_dimensions)
+        position_times = self.position_predictor.train(X, furniture_dimensions, n_jobs=self.n_jobs)
+        self.training_times.update({f"position.{name}": seconds for name, seconds in position_times.items()})
 
-        print("✅ Tous les modèles sont entraînés!")
+        wall_time = time.perf_counter() - start_time
+        print(f"✅ Tous les modèles sont entraînés! ({wall_time:.2f}s, n_jobs={resolve_n_jobs(self.n_jobs)}, "
+              f"somme des entraînements: {sum(self.training_times.values()):.2f}s)")
 
-    def predict(self, processed_data: pd.DataFrame) -> Dict[str, Any]:
-        """Effectue toutes les prédictions"""
-        feature_columns = [col for col in processed_data.columns
-                           if col.startswith('input_') and processed_data[col].dtype in ['int64', 'float64']]
+    def predict(self, processed_data: pd.DataFrame, optimization_level: int = DEFAULT_OPTIMIZATION_LEVEL,
+                label_encoders: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Effectue toutes les prédictions (placement selon le niveau d'optimisation)
 
-        if not feature_columns:
-            feature_columns = processed_data.select_dtypes(include=[np.number]).columns.tolist()
-
-        X = processed_data[feature_columns].fillna(0)
+        label_encoders permet au placement de relire les exigences fournisseur encodées.
+        """
+        X = self._select_features(processed_data)
 
         # Prédictions séquentielles
         furniture_types = self.furniture_type_predictor.predict(X)
@@ -797,30 +2321,385 @@ class PlanogramModels:
         # Application des contraintes
         final_predictions = self.constraint_manager.apply_constraints(predictions, processed_data)
 
+        # Dimensionnement : nombre minimal d'unités de meubles par groupe, produits répartis sur ces unités
+        furniture_types, dimensions, units = \
+            final_predictions['furniture_type'], final_predictions['dimensions'], None
+        fixtures = size_fixtures(processed_data, furniture_types, dimensions, final_predictions['positions'])
+        if fixtures is not None:
+            units = fixtures.pop('unit')
+            final_predictions['fixtures'] = fixtures
+            furniture_types = fixtures['furniture_type'][units]
+            dimensions = {field: values[units] for field, values in fixtures['dimensions'].items()}
+            print(f"🪑 Dimensionnement: {len(fixtures['furniture_type'])} unités de meubles "
+                  f"pour {len(units)} produits")
+
+            # Implantation au sol des unités dans le rectangle de leur zone
+            layout = allocate_zone_space(processed_data, units, fixtures, label_encoders)
+            if layout is not None:
+                fixtures['layout'] = layout
+                print(f"🗺️ Implantation: {int(layout['placed'].sum())}/{len(layout['placed'])} "
+                      f"unités implantées dans leur zone")
+
+        # Placement physique des facings sur les étagères des unités (dimensions après contraintes)
+        final_predictions['positions'], final_predictions['optimization'] = self.position_predictor.place(
+            processed_data, furniture_types, dimensions, final_predictions['positions'], units=units,
+            optimization_level=optimization_level, label_encoders=label_encoders)
+        if units is not None:
+            final_predictions['positions']['furniture_index'] = units
+
         return final_predictions
 
+    def get_state(self) -> Dict[str, Any]:
+        """Retourne l'état entraîné de tous les prédicteurs"""
+        return {
+            'feature_columns': self.feature_columns,
+            'furniture_type': self.furniture_type_predictor.get_state(),
+            'dimensions': self.dimension_predictor.get_state(),
+            'positions': self.position_predictor.get_state()
+        }
+
+    def set_state(self, state: Dict[str, Any]):
+        """Restaure l'état entraîné de tous les prédicteurs"""
+        self.feature_columns = state.get('feature_columns')
+        self.furniture_type_predictor.set_state(state.get('furniture_type', {}))
+        self.dimension_predictor.set_state(state.get('dimensions', {}))
+        self.position_predictor.set_state(state.get('positions', {}))
+
+
+SHELF_COUNT_FIELDS = [
+    'nb_etageres_unique_face', 'nb_colonnes_unique_face',
+    'nb_etageres_front_back', 'nb_colonnes_front_back',
+    'nb_etageres_left_right', 'nb_colonnes_left_right'
+]
+
+
+# Colonnes de dimensions des meubles de la sortie JSON (champ, type Python)
+FURNITURE_RECORD_COLUMNS = [('largeur', float), ('hauteur', float), ('profondeur', float)] + \
+    [(field, int) for field in SHELF_COUNT_FIELDS]
+
+
+def _result_column(values: Any, start: int, stop: int, dtype, size: int) -> list:
+    """Tranche [start, stop) d'une prédiction convertie en types Python (zéros si absente)"""
+    if values is None:
+        return [dtype(0)] * size
+    return np.asarray(values)[start:stop].astype(dtype).tolist()
+
+
+def build_furniture_records(results: Dict[str, Any], start: int = 0, stop: int = None) -> List[Dict[str, Any]]:
+    """Construit les meubles [start, stop) colonne par colonne
+
+    Unités dimensionnées (results['fixtures']) si présentes, sinon un meuble par ligne.
+    """
+    results = results.get('fixtures') or results
+    n_rows = len(results['furniture_type'])
+    stop = n_rows if stop is None else min(stop, n_rows)
+    size = max(stop - start, 0)
+    dimensions = results.get('dimensions', {})
+
+    furniture_types = np.asarray(results['furniture_type'])[start:stop].astype(int)
+    faces = build_spec_table()['faces'][spec_index(furniture_types, max(FURNITURE_SPECS) + 1)].tolist()
+    type_ids = furniture_types.tolist()
+
+    # Champs fixes en dictionnaires littéraux, puis colonnes de dimensions affectées colonne par colonne
+    records = [
+        {
+            "furniture_id": f"FURN_{number:03d}",
+            "furniture_type_id": type_id,
+            "furniture_type_name": FURNITURE_TYPE_NAMES.get(type_id, "unknown"),
+            "faces": face_count,
+            "available_faces": list(AVAILABLE_FACES.get(face_count, ['front'])),
+            "imageUrl": f"/images/furniture_{type_id}.png"
+        }
+        for number, type_id, face_count in zip(range(start + 1, stop + 1), type_ids, faces)
+    ]
+    for field, dtype in FURNITURE_RECORD_COLUMNS:
+        for record, value in zip(records, _result_column(dimensions.get(field), start, stop, dtype, size)):
+            record[field] = value
+
+    # Implantation au sol dans la zone (cm) ; x/y à None pour une unité non implantée
+    layout = results.get('layout')
+    if layout is not None:
+        placed = np.asarray(layout['placed'])[start:stop]
+        xs = np.where(placed, np.asarray(layout['x'])[start:stop], None).tolist()
+        ys = np.where(placed, np.asarray(layout['y'])[start:stop], None).tolist()
+        zone_ids = np.asarray(layout['zone_id'])[start:stop].astype(str).tolist()
+        rotations = _result_column(layout['rotation'], start, stop, int, size)
+        for record, zone_id, x, y, rotation in zip(records, zone_ids, xs, ys, rotations):
+            record.update({"zone_id": zone_id, "x": x, "y": y, "rotation": rotation})
+    return records
+
+
+def build_position_records(results: Dict[str, Any], start: int = 0, stop: int = None) -> List[Dict[str, Any]]:
+    """Construit les positions produits des lignes [start, stop) colonne par colonne
+
+    produit_id est l'identifiant du produit en entrée (positions['produit_id']), sinon PROD_<rang>.
+    """
+    n_rows = len(results['furniture_type'])
+    stop = n_rows if stop is None else min(stop, n_rows)
+    size = max(stop - start, 0)
+    positions = results.get('positions', {})
+
+    faces = positions.get('face')
+    faces = np.asarray(faces)[start:stop].tolist() if faces is not None else ['front'] * size
+
+    # Meuble de chaque produit : son unité dimensionnée, sinon le meuble de même rang
+    furniture_index = positions.get('furniture_index')
+    furniture_ids = range(start + 1, stop + 1) if furniture_index is None else \
+        (np.asarray(furniture_index)[start:stop] + 1).tolist()
+
+    suffixes = [f"{number:03d}" for number in range(start + 1, stop + 1)]
+    product_ids = positions.get('produit_id')
+    product_ids = [f"PROD_{suffix}" for suffix in suffixes] if product_ids is None else \
+        np.asarray(product_ids)[start:stop].astype(str).tolist()
+
+    return [
+        {
+            "position_id": f"POS_{suffix}",
+            "furniture_id": f"FURN_{furniture_number:03d}",
+            "produit_id": product_id,
+            "face": face,
+            "etagere": etagere,
+            "colonne": colonne,
+            "quantite": quantite
+        }
+        for suffix, furniture_number, product_id, face, etagere, colonne, quantite
+        in zip(suffixes, furniture_ids, product_ids, faces,
+               _result_column(positions.get('etagere'), start, stop, int, size),
+               _result_column(positions.get('colonne'), start, stop, int, size),
+               _result_column(positions.get('quantite'), start, stop, int, size))
+    ]
+
+
+def build_output_statistics(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Statistiques agrégées du planogramme calculées directement sur les tableaux de prédiction"""
+    furniture = results.get('fixtures') or results
+    furniture_types = np.asarray(furniture['furniture_type']).astype(int)
+    positions = results.get('positions', {})
+    dimensions = furniture.get('dimensions', {})
+    n_rows = len(results['furniture_type'])
+
+    type_ids, type_counts = np.unique(furniture_types, return_counts=True)
+    face_distribution = dict.fromkeys(AVAILABLE_FACES[4], 0)
+    if positions.get('face') is not None and n_rows > 0:
+        faces, face_counts = np.unique(np.asarray(positions['face']).astype(str), return_counts=True)
+        face_distribution.update(zip(faces.tolist(), face_counts.tolist()))
+
+    quantities = positions.get('quantite')
+    largeurs = dimensions.get('largeur')
+    return {
+        'total_products': n_rows,
+        'total_furniture': len(furniture_types),
+        'furniture_type_distribution': {FURNITURE_TYPE_NAMES.get(type_id, "unknown"): count
+                                        for type_id, count in zip(type_ids.tolist(), type_counts.tolist())},
+        'face_distribution': face_distribution,
+        'total_quantite': int(np.sum(quantities)) if quantities is not None else 0,
+        'largeur_totale': round(float(np.sum(largeurs)), 2) if largeurs is not None else 0.0,
+        'unplaced_products': int(n_rows - np.sum(positions['placed'])) if positions.get('placed') is not None else 0,
+        'unplaced_furniture': int(np.sum(~np.asarray(furniture['layout']['placed'])))
+        if furniture.get('layout') is not None else 0,
+        'optimization': dict(results.get('optimization') or {})
+    }
+
+
+def _json_default(value: Any) -> Any:
+    """Conversion des types NumPy restants (scalaires, tableaux) en types Python"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Type non sérialisable en JSON: {type(value).__name__}")
+
+
+def _json_compatible(value: Any) -> Any:
+    """Équivalent pour json de la sortie orjson : NaN/inf → null, scalaires et tableaux NumPy en types Python"""
+    if isinstance(value, dict):
+        return {key: _json_compatible(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_compatible(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return _json_compatible(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def serialize_json(payload: Any, pretty: bool = False) -> bytes:
+    """Sérialise en JSON UTF-8 : orjson si installé, sinon json ; compact par défaut, indenté si pretty
+
+    Les deux chemins produisent le même document : NaN et infinis deviennent null (json émettrait
+    sinon NaN, invalide en JSON) ; les clés int/float/bool sont converties en texte des deux côtés.
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(payload, default=_json_default, option=option)
+
+    layout = {'indent': 2} if pretty else {'separators': (',', ':')}
+    try:
+        text = json.dumps(payload, ensure_ascii=False, allow_nan=False, default=_json_default, **layout)
+    except ValueError:
+        # NaN ou infini : conversion complète (chemin lent, rare)
+        text = json.dumps(_json_compatible(payload), ensure_ascii=False, allow_nan=False,
+                          default=_json_default, **layout)
+    return text.encode('utf-8')
+
+
+def slice_predictions(predictions: Any, indices: np.ndarray) -> Any:
+    """Extrait les lignes d'indices donnés de toutes les prédictions (structure imbriquée conservée)"""
+    if isinstance(predictions, dict):
+        return {key: slice_predictions(value, indices) for key, value in predictions.items()}
+    if isinstance(predictions, (pd.Series, pd.DataFrame)):
+        return predictions.iloc[indices]
+    if isinstance(predictions, np.ndarray):
+        return predictions[indices]
+    if isinstance(predictions, list):
+        return [predictions[i] for i in indices]
+    return predictions
+
+
+def slice_results(predictions: Dict[str, Any], indices: np.ndarray) -> Dict[str, Any]:
+    """Extrait les lignes d'un groupe ; les unités de meubles qu'elles occupent sont renumérotées"""
+    fixtures = predictions.get('fixtures')
+    sliced = slice_predictions({key: value for key, value in predictions.items() if key != 'fixtures'}, indices)
+    if fixtures is not None:
+        units, kept = first_appearance_codes(sliced['positions']['furniture_index'])
+        sliced['positions']['furniture_index'] = units
+        sliced['fixtures'] = slice_predictions(fixtures, kept)
+    return sliced
+
 
 class PlanogramAIPipeline:
     """Pipeline principal pour la génération de planogrammes"""
 
-    def __init__(self, csv_path: str = "data/dataset.csv"):
+    def __init__(self, csv_path: str = "data/dataset.csv", models: PlanogramModels = None,
+                 label_encoders: Dict[str, LabelEncoder] = None, cache_dir: str = None,
+                 data: pd.DataFrame = None, numeric_medians: Dict[str, float] = None):
         self.csv_path = csv_path
+        # Données déjà en mémoire : utilisées à la place du CSV (aucune lecture/écriture disque)
+        self.input_data = data
         self.data_processor = DataProcessor(csv_path)
-        self.models = PlanogramModels()
+        self.models = models if models is not None else PlanogramModels()
+        if label_encoders:
+            # Copie : les nouvelles colonnes encodées ne modifient pas l'artefact partagé
+            self.data_processor.label_encoders = dict(label_encoders)
+        if numeric_medians:
+            self.data_processor.numeric_medians = dict(numeric_medians)
+        # Cache Parquet des données prétraitées (désactivé si cache_dir est None)
+        self.dataset_cache = DatasetCache(cache_dir) if cache_dir else None
         self.raw_data = None
         self.processed_data = None
+        # Version des modèles (date de création de l'artefact) : invalide les résultats en cache
+        self.model_version = None
+
+    @classmethod
+    def from_artifact(cls, model_path: str = DEFAULT_MODEL_PATH, csv_path: str = "data/dataset.csv",
+                      data: pd.DataFrame = None) -> 'PlanogramAIPipeline':
+        """Crée un pipeline prêt pour l'inférence à partir d'un artefact sauvegardé"""
+        pipeline = cls(csv_path, data=data)
+        pipeline.load_models(model_path)
+        return pipeline
+
+    def save_models(self, model_path: str = DEFAULT_MODEL_PATH) -> bool:
+        """Sauvegarde les modèles entraînés et les encodeurs dans un artefact versionné"""
+        if not self.models.is_trained:
+            print("❌ Modèles non entraînés, rien à sauvegarder")
+            return False
+
+        artifact = {
+            'version': MODEL_ARTIFACT_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'label_encoders': self.data_processor.label_encoders,
+            'numeric_medians': self.data_processor.numeric_medians,
+            'models': self.models.get_state()
+        }
+
+        try:
+            model_dir = os.path.dirname(model_path)
+            if model_dir:
+                os.makedirs(model_dir, exist_ok=True)
+            joblib.dump(artifact, model_path)
+            self.model_version = artifact['created_at']
+            print(f"✅ Modèles sauvegardés: {model_path}")
+            return True
+        except Exception as e:
+            print(f"❌ Erreur lors de la sauvegarde des modèles: {e}")
+            return False
+
+    def load_models(self, model_path: str = DEFAULT_MODEL_PATH) -> bool:
+        """Charge un artefact de modèles entraînés (sans ré-entraînement)"""
+        if not os.path.exists(model_path):
+            print(f"⚠️ Aucun artefact de modèles trouvé: {model_path}")
+            return False
+
+        try:
+            artifact = joblib.load(model_path)
+        except Exception as e:
+            print(f"❌ Erreur lors du chargement des modèles: {e}")
+            return False
+
+        version = artifact.get('version') if isinstance(artifact, dict) else None
+        if version != MODEL_ARTIFACT_VERSION:
+            print(f"❌ Version d'artefact incompatible: {version} (attendue: {MODEL_ARTIFACT_VERSION})")
+            return False
+
+        self.models.set_state(artifact['models'])
+        self.data_processor.label_encoders = dict(artifact.get('label_encoders', {}))
+        self.data_processor.numeric_medians = dict(artifact.get('numeric_medians', {}))
+        self.model_version = artifact.get('created_at')
+        print(f"✅ Modèles chargés: {model_path} (créés le {artifact.get('created_at')})")
+        return True
 
     def load_and_preprocess_data(self) -> bool:
-        """Charge et prétraite les données"""
+        """Charge et prétraite les données (en mémoire, ou depuis le cache Parquet si le CSV n'a pas changé)"""
         print("📊 Chargement des données...")
-        self.raw_data = self.data_processor.load_data()
+        if self.input_data is not None:
+            self.raw_data = self.input_data
+        elif self._load_from_cache():
+            return True
+        else:
+            self.raw_data = self.data_processor.load_data()
 
         if self.raw_data.empty:
             print("❌ Aucune donnée chargée")
             return False
 
         print("🔧 Prétraitement des données...")
+        encoders_key = self._encoders_fingerprint()
         self.processed_data = self.data_processor.preprocess_data(self.raw_data)
+
+        if self.dataset_cache is not None and self.input_data is None:
+            self.dataset_cache.save(self.csv_path, 'raw', self.raw_data)
+            self.dataset_cache.save(self.csv_path, 'processed', self.processed_data,
+                                    metadata={'label_encoders': self.data_processor.label_encoders,
+                                              'numeric_medians': self.data_processor.numeric_medians},
+                                    key_extra=encoders_key)
+        return True
+
+    def _encoders_fingerprint(self) -> str:
+        """Empreinte des encodeurs et médianes déjà ajustés (le résultat du prétraitement en dépend)"""
+        encoders = self.data_processor.label_encoders
+        medians = self.data_processor.numeric_medians
+        return repr([(col, list(encoders[col].classes_)) for col in sorted(encoders)] +
+                    [(col, medians[col]) for col in sorted(medians)])
+
+    def _load_from_cache(self) -> bool:
+        """Charge les données brutes et prétraitées depuis le cache, sans lecture du CSV"""
+        if self.dataset_cache is None:
+            return False
+
+        processed = self.dataset_cache.load(self.csv_path, 'processed', key_extra=self._encoders_fingerprint())
+        raw = self.dataset_cache.load(self.csv_path, 'raw') if processed is not None else None
+        if processed is None or raw is None:
+            return False
+
+        self.raw_data = raw[0]
+        self.processed_data, metadata = processed
+        self.data_processor.label_encoders = dict(metadata.get('label_encoders', {}))
+        self.data_processor.numeric_medians = dict(metadata.get('numeric_medians', {}))
+        print(f"✅ Données chargées depuis le cache: {len(self.processed_data)} lignes")
         return True
 
     def train_models(self):
@@ -831,18 +2710,31 @@ class PlanogramAIPipeline:
 
         self.models.train_models(self.processed_data)
 
-    def generate_planogram(self, filtered_data: pd.DataFrame = None) -> Dict[str, Any]:
-        """Génère un planogramme complet"""
+    def generate_planogram(self, filtered_data: pd.DataFrame = None,
+                           optimization_level: int = DEFAULT_OPTIMIZATION_LEVEL,
+                           raw_data: pd.DataFrame = None) -> Dict[str, Any]:
+        """Génère un planogramme complet
+
+        Les identifiants produit des positions ('produit_id') sont lus dans raw_data, les lignes
+        d'entrée avant encodage (un produit inconnu des encodeurs garde son identifiant), sinon
+        décodés depuis les données prétraitées.
+        """
         if filtered_data is None:
-            filtered_data = self.processed_data
+            filtered_data, raw_data = self.processed_data, self.raw_data
 
         if filtered_data is None or filtered_data.empty:
             print("❌ Aucune donnée pour la génération")
             return {}
 
         print("🎯 Génération du planogramme...")
-        predictions = self.models.predict(filtered_data)
-
+        predictions = self.models.predict(filtered_data, optimization_level=optimization_level,
+                                          label_encoders=self.data_processor.label_encoders)
+
+        if predictions and raw_data is not None and 'input_produit_id' in raw_data.columns:
+            predictions['positions']['produit_id'] = _decoded_column(raw_data, 'input_produit_id')
+        elif predictions and 'input_produit_id' in filtered_data.columns:
+            predictions['positions']['produit_id'] = _decoded_column(filtered_data, 'input_produit_id',
+                                                                     self.data_processor.label_encoders)
         return predictions
 
     def run_full_pipeline(self) -> Dict[str, Any]:
@@ -853,8 +2745,9 @@ class PlanogramAIPipeline:
         if not self.load_and_preprocess_data():
             return {}
 
-        # 2. Entraînement des modèles
-        self.train_models()
+        # 2. Entraînement des modèles (sauf si un artefact a déjà été chargé)
+        if not self.models.is_trained:
+            self.train_models()
 
         # 3. Génération du planogramme
         results = self.generate_planogram()
@@ -862,8 +2755,8 @@ class PlanogramAIPipeline:
         print("✅ Pipeline terminé avec succès!")
         return results
 
-    def run_filtered_pipeline(self, filtered_data: pd.DataFrame, magasin_id: str = None, categorie_id: str = None) -> \
-    Dict[str, Any]:
+    def run_filtered_pipeline(self, filtered_data: pd.DataFrame, magasin_id: str = None, categorie_id: str = None,
+                              optimization_level: int = DEFAULT_OPTIMIZATION_LEVEL) -> Dict[str, Any]:
         """Exécute le pipeline avec des données filtrées"""
         print(f"🎯 Pipeline filtré - Magasin: {magasin_id}, Catégorie: {categorie_id}")
 
@@ -871,74 +2764,135 @@ class PlanogramAIPipeline:
         processed_filtered = self.data_processor.preprocess_data(filtered_data)
 
         # Génération avec les données filtrées
-        results = self.generate_planogram(processed_filtered)
+        results = self.generate_planogram(processed_filtered, optimization_level=optimization_level,
+                                          raw_data=filtered_data)
 
         return results
 
+    def run_batch_pipeline(self, data: pd.DataFrame = None,
+                           group_columns: Tuple[str, ...] = BATCH_GROUP_COLUMNS,
+                           optimization_level: int = DEFAULT_OPTIMIZATION_LEVEL) -> Dict[Tuple, Dict[str, Any]]:
+        """Génère les prédictions de tous les groupes (magasin, catégorie) en une seule passe
+
+        Le jeu de données est prétraité et prédit une seule fois (contraintes incluses),
+        puis les résultats sont découpés par groupe. Sans données, utilise le jeu chargé.
+        """
+        if data is None:
+            if self.raw_data is None and not self.load_and_preprocess_data():
+                return {}
+            data, processed = self.raw_data, self.processed_data
+        else:
+            processed = None
+
+        missing_columns = [col for col in group_columns if col not in data.columns]
+        if missing_columns:
+            print(f"❌ Colonnes de regroupement absentes: {', '.join(missing_columns)}")
+            return {}
+
+        if data.empty:
+            print("❌ Aucune donnée pour la génération par lots")
+            return {}
+
+        # Regroupement sur les identifiants bruts (avant encodage) : positions des lignes de chaque groupe
+        group_indices = data.groupby(list(group_columns), sort=True, dropna=False, observed=True).indices
+        print(f"📦 Génération par lots: {len(group_indices)} groupes, {len(data)} lignes")
+
+        if processed is None:
+            processed = self.data_processor.preprocess_data(data)
+        predictions = self.generate_planogram(processed, optimization_level=optimization_level, raw_data=data)
+        if not predictions:
+            return {}
+
+        batch_results = {}
+        for key, indices in group_indices.items():
+            key = key if isinstance(key, tuple) else (key,)
+            batch_results[key] = slice_results(predictions, indices)
+
+        return batch_results
+
+    def generate_batch_json_output(self, batch_results: Dict[Tuple, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Génère un document JSON de planogramme par groupe (magasin, catégorie)"""
+        documents = []
+        for key, results in batch_results.items():
+            magasin_id = str(key[0])
+            categorie_id = str(key[1]) if len(key) > 1 else "CAT001"
+            documents.append(self.generate_json_output(results, magasin_id=magasin_id, categorie_id=categorie_id))
+        return documents
+
+    def run_chunked_pipeline(self, chunksize: int = 50000, **read_csv_kwargs) -> Iterator[Dict[str, Any]]:
+        """Génère les prédictions bloc par bloc sur un fichier volumineux (modèles déjà entraînés/chargés)
+
+        Les identifiants produit sont lus dans chaque bloc brut, comme pour run_batch_pipeline.
+        """
+        if not self.models.is_trained:
+            print("⚠️ Modèles non entraînés : chargez un artefact avant le traitement par blocs")
+
+        for raw_chunk, processed_chunk in self.data_processor.iter_preprocessed_chunks(chunksize, **read_csv_kwargs):
+            yield self.generate_planogram(processed_chunk, raw_data=raw_chunk)
+
+    @staticmethod
+    def _planogram_info(magasin_id: str, categorie_id: str) -> Dict[str, Any]:
+        """En-tête d'un planogramme généré"""
+        return {
+            "planogram_id": f"PLANO_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            "nom_planogram": f"Planogramme {magasin_id}_{categorie_id}",
+            "statut": "generated",
+            "date_creation": datetime.now().isoformat(),
+            "magasin_id": magasin_id,
+            "categorie_id": categorie_id
+        }
+
+    def iter_ndjson_output(self, results: Dict[str, Any], magasin_id: str = "MG001", categorie_id: str = "CAT001",
+                           chunk_size: int = 5000) -> Iterator[bytes]:
+        """Sérialise le planogramme en NDJSON UTF-8, bloc par bloc (mémoire bornée par chunk_size)
+
+        Une ligne d'en-tête {"type": "planogram_info"}, puis pour chaque bloc les lignes
+        {"type": "furniture"} suivies des lignes {"type": "product_position"} correspondantes.
+        """
+        if not results:
+            return
+
+        yield serialize_json({"type": "planogram_info", **self._planogram_info(magasin_id, categorie_id)}) + b"\n"
+
+        # Unités numérotées par première apparition : chaque meuble précède les positions qui le référencent
+        n_rows = max(len(results['furniture_type']), len((results.get('fixtures') or results)['furniture_type']))
+        for start in range(0, n_rows, chunk_size):
+            stop = start + chunk_size
+            lines = [serialize_json({"type": "furniture", **record})
+                     for record in build_furniture_records(results, start, stop)]
+            lines.extend(serialize_json({"type": "product_position", **record})
+                         for record in build_position_records(results, start, stop))
+            yield b"\n".join(lines) + b"\n"
+
+    def iter_batch_ndjson_output(self, batch_results: Dict[Tuple, Dict[str, Any]],
+                                 chunk_size: int = 5000) -> Iterator[bytes]:
+        """Sérialise en NDJSON les planogrammes d'une génération par lots, l'un après l'autre"""
+        for key, results in batch_results.items():
+            magasin_id = str(key[0])
+            categorie_id = str(key[1]) if len(key) > 1 else "CAT001"
+            yield from self.iter_ndjson_output(results, magasin_id, categorie_id, chunk_size)
+
     def generate_json_output(self, results: Dict[str, Any], magasin_id: str = "MG001",
                              categorie_id: str = "CAT001") -> Dict[str, Any]:
-        """Génère la sortie JSON finale simplifiée"""
+        """Génère la sortie JSON finale : unités de meubles, positions produits et statistiques
+
+        Les listes sont construites colonne par colonne à partir des tableaux de prédiction. Les
+        unités dimensionnées sont partagées entre produits : chaque position référence son unité
+        via furniture_id et son produit d'entrée via produit_id. Sans dimensionnement, un meuble
+        par produit (FURN_i ↔ POS_i).
+        """
         if not results:
             return {}
 
-        # Structure JSON de sortie simplifiée
-        json_output = {
-            "planogram_info": {
-                "planogram_id": f"PLANO_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                "nom_planogram": f"Planogramme {magasin_id}_{categorie_id}",
-                "statut": "generated",
-                "date_creation": datetime.now().isoformat(),
-                "magasin_id": magasin_id,
-                "categorie_id": categorie_id
-            },
-            "furniture": [],
-            "product_positions": []
+        return {
+            "planogram_info": self._planogram_info(magasin_id, categorie_id),
+            "furniture": build_furniture_records(results),
+            "product_positions": build_position_records(results),
+            "statistics": build_output_statistics(results)
         }
 
-        # On ne prend que le premier meuble et la première position pour l'exemple simplifié
-        if len(results['furniture_type']) > 0:
-            furniture_id = "FURN_001"
-            furniture_type_id = int(results['furniture_type'][0])
-
-            # Ajout du meuble
-            json_output["furniture"].append({
-                "furniture_id": furniture_id,
-                "furniture_type_id": furniture_type_id,
-                "furniture_type_name": {
-                    1: "planogram", 2: "gondola", 3: "shelves-display", 4: "clothing-rack",
-                    5: "wall-display", 6: "accessory-display", 7: "modular-cube", 8: "table",
-                    9: "refrigerator", 10: "refrigerated-showcase", 11: "clothing-display", 12: "clothing-wall"
-                }.get(furniture_type_id, "unknown"),
-                "faces": 1,
-                "available_faces": ["front"],
-                "largeur": float(results['dimensions']['largeur'][0]),
-                "hauteur": float(results['dimensions']['hauteur'][0]),
-                "profondeur": float(results['dimensions']['profondeur'][0]),
-                "imageUrl": f"/images/furniture_{furniture_type_id}.png",
-                "nb_etageres_unique_face": 4,
-                "nb_colonnes_unique_face": 5,
-                "nb_etageres_front_back": 0,
-                "nb_colonnes_front_back": 0,
-                "nb_etageres_left_right": 0,
-                "nb_colonnes_left_right": 0
-            })
-
-            # Ajout de la position
-            if len(results['positions']['face']) > 0:
-                json_output["product_positions"].append({
-                    "position_id": "POS_001",
-                    "furniture_id": furniture_id,
-                    "produit_id": "PROD_001",
-                    "face": "front",
-                    "etagere": 4,
-                    "colonne": 1,
-                    "quantite": 5
-                })
-
-        return json_output
-
-    def save_results(self, results: Dict[str, Any], filename: str = None):
-        """Sauvegarde les résultats en JSON"""
+    def save_results(self, results: Dict[str, Any], filename: str = None, pretty: bool = True):
+        """Sauvegarde les résultats en JSON (indenté par défaut, compact si pretty=False)"""
         if filename is None:
             filename = f"outputs/planogram_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
 
@@ -946,8 +2900,8 @@ class PlanogramAIPipeline:
             import os
             os.makedirs(os.path.dirname(filename), exist_ok=True)
 
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2, ensure_ascii=False)
+            with open(filename, 'wb') as f:
+                f.write(serialize_json(results, pretty=pretty))
 
             print(f"✅ Résultats sauvegardés: {filename}")
         except Exception as e:
@@ -958,14 +2912,167 @@ class PlanogramAIPipeline:
         return self.models.constraint_manager.get_all_constraints_info()
 
 
+class PipelineRegistry:
+    """Registre thread-safe du pipeline d'inférence partagé par toute l'application
+
+    L'artefact est chargé une seule fois puis rechargé à chaud dès que le fichier change
+    (date de modification ou taille). Le pipeline en service est remplacé d'un bloc :
+    les requêtes en cours conservent l'ancien jusqu'à leur fin.
+    """
+
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH, csv_path: str = "data/dataset.csv"):
+        self.model_path = model_path
+        self.csv_path = csv_path
+        self._lock = threading.Lock()
+        self._pipeline = None
+        self._artifact_signature = None
+        self.loaded_at = None
+        self.reload_count = 0
+
+    def _current_signature(self) -> Optional[Tuple[int, int]]:
+        """Signature de l'artefact sur disque (None s'il n'existe pas)"""
+        try:
+            stat = os.stat(self.model_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self) -> PlanogramAIPipeline:
+        """Retourne le pipeline en service (rechargé si l'artefact a changé)"""
+        if self._pipeline is None or self._current_signature() != self._artifact_signature:
+            self.reload()
+        return self._pipeline
+
+    def reload(self, force: bool = False) -> bool:
+        """Recharge l'artefact si nécessaire ; retourne True si le pipeline a été remplacé"""
+        with self._lock:
+            signature = self._current_signature()
+            if not force and self._pipeline is not None and signature == self._artifact_signature:
+                # Déjà rechargé par un autre thread
+                return False
+
+            pipeline = PlanogramAIPipeline(self.csv_path)
+            loaded = signature is not None and pipeline.load_models(self.model_path)
+            # Signature retenue même en cas d'échec : pas de nouvelle tentative avant la prochaine modification
+            self._artifact_signature = signature
+
+            if not loaded and self._pipeline is not None and self._pipeline.models.is_trained:
+                print("⚠️ Artefact illisible, conservation des modèles en service")
+                return False
+
+            self._pipeline = pipeline
+            self.loaded_at = datetime.now().isoformat()
+            self.reload_count += 1
+            return True
+
+    def create_pipeline(self, data: pd.DataFrame = None) -> PlanogramAIPipeline:
+        """Crée un pipeline de requête sur des données en mémoire, partageant les modèles en service"""
+        shared = self.get()
+        pipeline = PlanogramAIPipeline(
+            self.csv_path,
+            models=shared.models,
+            label_encoders=shared.data_processor.label_encoders,
+            data=data,
+            numeric_medians=shared.data_processor.numeric_medians
+        )
+        pipeline.model_version = shared.model_version
+        return pipeline
+
+    def status(self) -> Dict[str, Any]:
+        """État du registre (modèles chargés, date et nombre de chargements)"""
+        pipeline = self._pipeline
+        return {
+            "model_path": self.model_path,
+            "models_loaded": pipeline is not None and pipeline.models.is_trained,
+            "loaded_at": self.loaded_at,
+            "reload_count": self.reload_count
+        }
+
+
+class ResultCache:
+    """Cache LRU + TTL des planogrammes générés, indexé par une empreinte des entrées
+
+    La clé combine le contenu des lignes filtrées et les paramètres de génération
+    (niveau d'optimisation, contraintes, version des modèles). Les valeurs sont copiées
+    à la lecture : l'appelant peut modifier le résultat sans altérer le cache.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 900):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(data: pd.DataFrame, **params) -> str:
+        """Empreinte SHA-256 des lignes (colonnes et valeurs) et des paramètres"""
+        digest = hashlib.sha256()
+        digest.update(repr(list(data.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+        digest.update(repr(sorted(params.items())).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retourne une copie du résultat en cache (None si absent ou expiré)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] >= self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Any):
+        """Ajoute un résultat (évince le moins récemment utilisé au-delà de max_entries)"""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Métriques du cache (succès, échecs, taux de succès, évictions)"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
 # Fonction principale pour tester le pipeline
 def main():
     """Fonction principale de test"""
     print("🏪 Système de Génération de Planogrammes IA")
     print("=" * 50)
 
-    # Initialisation du pipeline
-    pipeline = PlanogramAIPipeline("data/dataset.csv")
+    # Initialisation du pipeline (entraînement sur tous les cœurs disponibles)
+    pipeline = PlanogramAIPipeline("data/dataset.csv", models=PlanogramModels(n_jobs=-1),
+                                   cache_dir=DEFAULT_CACHE_DIR)
 
     # Affichage des contraintes prises en charge
     print("\n📋 CONTRAINTES PRISES EN CHARGE:")
@@ -985,6 +3092,9 @@ def main():
     results = pipeline.run_full_pipeline()
 
     if results:
+        # Sauvegarde des modèles entraînés (chargés au démarrage par l'API et Streamlit)
+        pipeline.save_models()
+
         # Génération du JSON de sortie
         json_output = pipeline.generate_json_output(results)
 
@@ -1,18 +1,28 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import pandas as pd
+import numpy as np
 import json
-import tempfile
+import io
 import os
-from datetime import datetime
-from typing import Optional, Dict, Any, List
+import re
+import uuid
+import asyncio
+import functools
+import threading
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Callable
 import uvicorn
 
 # Import du pipeline principal
 import sys
 sys.path.append('..')
-from main_pipeline import PlanogramAIPipeline
+from main_pipeline import (PlanogramAIPipeline, PipelineRegistry, ResultCache, INPUT_DTYPES, serialize_json,
+                           DEFAULT_OPTIMIZATION_LEVEL)
+import config
 
 # Initialisation de l'API
 app = FastAPI(
@@ -33,8 +43,11 @@ app.add_middleware(
 )
 
 # Variables globales
-pipeline_instance = None
-sample_data = None
+# Pipeline d'inférence partagé par tous les endpoints (rechargé à chaud si l'artefact change)
+pipeline_registry = PipelineRegistry(config.MODEL_PATH, config.DATA_PATH)
+
+# Cache des planogrammes générés (mêmes lignes, paramètres et modèles → même résultat)
+result_cache = ResultCache(config.RESULT_CACHE_SIZE, config.RESULT_CACHE_TTL)
 
 # Types de meubles supportés
 FURNITURE_TYPES = {
@@ -52,9 +65,386 @@ FURNITURE_TYPES = {
     12: {"name": "clothing-wall", "faces": 1, "description": "Mur vêtements"}
 }
 
+class PlanogramJSONResponse(JSONResponse):
+    """Réponse JSON compacte via serialize_json (orjson si installé)
+    
+    Retournée directement par les endpoints de génération : FastAPI n'applique alors pas
+    jsonable_encoder, coûteux sur des centaines de milliers de positions.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return serialize_json(content)
+
+class GenerationPool:
+    """Pool borné de workers exécutant la génération hors de la boucle asyncio
+    
+    Au-delà de max_workers générations en cours et queue_limit en attente,
+    les nouvelles demandes sont refusées (503) au lieu d'être mises en file.
+    """
+    
+    def __init__(self, max_workers: int, queue_limit: int):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="planogram-generation")
+        # Générations en cours ou en attente (modifié uniquement depuis la boucle asyncio)
+        self.pending = 0
+        self.rejected = 0
+    
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_limit
+    
+    async def run(self, func, *args):
+        """Exécute func(*args) dans le pool, ou lève une erreur 503 si le pool est saturé"""
+        if self.pending >= self.capacity:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Serveur saturé : trop de générations en cours, réessayez plus tard",
+                headers={"Retry-After": str(config.GENERATION_RETRY_AFTER)}
+            )
+        
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+        finally:
+            self.pending -= 1
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_workers": self.max_workers,
+            "queue_limit": self.queue_limit,
+            "pending": self.pending,
+            "rejected": self.rejected
+        }
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+generation_pool = GenerationPool(config.GENERATION_WORKERS, config.GENERATION_QUEUE_LIMIT)
+
+class JobCancelled(Exception):
+    """Levée à la prochaine étape d'un job dont l'annulation a été demandée"""
+
+class JobManager:
+    """File de jobs de génération asynchrones (pool de workers local, résultats stockés sur disque)
+    
+    Chaque job a un fichier de métadonnées (statut, étape, progression) et, une fois terminé,
+    un fichier de résultat JSON : les résultats restent consultables après un redémarrage.
+    L'annulation est immédiate pour un job en attente, et coopérative (à la prochaine
+    étape) pour un job en cours. Les jobs terminés plus anciens que max_age secondes, ou
+    au-delà des max_finished plus récents, sont supprimés de la mémoire et du disque (voir prune).
+    """
+    
+    ACTIVE_STATUSES = ('queued', 'running')
+    
+    def __init__(self, jobs_dir: str, max_workers: int, queue_limit: int,
+                 max_age: Optional[float] = None, max_finished: Optional[int] = None):
+        self.jobs_dir = jobs_dir
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.max_age = max_age
+        self.max_finished = max_finished
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="planogram-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._futures = {}
+        self._cancel_events = {}
+    
+    def _meta_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.meta.json")
+    
+    def _result_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+    
+    def _write_json(self, path: str, payload: Any):
+        """Écriture atomique (fichier temporaire puis renommage)"""
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(serialize_json(payload))
+        os.replace(temp_path, path)
+    
+    def _update(self, job_id: str, **changes):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(changes)
+            snapshot = dict(job)
+        self._write_json(self._meta_path(job_id), snapshot)
+    
+    def active_count(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job["status"] in self.ACTIVE_STATUSES)
+    
+    def submit(self, kind: str, func: Callable, *args, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Met un job en file ; func(*args, progress=...) est exécutée par un worker"""
+        self.prune()
+        if self.active_count() >= self.max_workers + self.queue_limit:
+            raise HTTPException(
+                status_code=503,
+                detail="File de jobs pleine, réessayez plus tard",
+                headers={"Retry-After": str(config.GENERATION_RETRY_AFTER)}
+            )
+        
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "stage": "en attente",
+            "progress": 0,
+            "params": params or {},
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._cancel_events[job_id] = threading.Event()
+            # Copie avant soumission : le worker peut faire évoluer le job aussitôt
+            snapshot = dict(job)
+        self._write_json(self._meta_path(job_id), snapshot)
+        
+        future = self.executor.submit(self._run, job_id, func, args)
+        with self._lock:
+            self._futures[job_id] = future
+        return snapshot
+    
+    def _run(self, job_id: str, func: Callable, args: tuple):
+        cancel_event = self._cancel_events[job_id]
+        if cancel_event.is_set():
+            # Annulé avant que le future ne soit enregistré (future.cancel() impossible)
+            self._update(job_id, status="cancelled", stage="annulé", finished_at=datetime.now().isoformat())
+            with self._lock:
+                self._futures.pop(job_id, None)
+            return
+        self._update(job_id, status="running", stage="démarrage", started_at=datetime.now().isoformat())
+        
+        def progress(stage: str, percent: int):
+            if cancel_event.is_set():
+                raise JobCancelled()
+            self._update(job_id, stage=stage, progress=percent)
+        
+        try:
+            result = func(*args, progress=progress)
+            if cancel_event.is_set():
+                raise JobCancelled()
+            self._write_json(self._result_path(job_id), result)
+            self._update(job_id, status="completed", stage="terminé", progress=100,
+                         finished_at=datetime.now().isoformat())
+        except JobCancelled:
+            self._update(job_id, status="cancelled", stage="annulé", finished_at=datetime.now().isoformat())
+        except HTTPException as e:
+            self._update(job_id, status="failed", stage="échec", error=e.detail,
+                         finished_at=datetime.now().isoformat())
+        except Exception as e:
+            self._update(job_id, status="failed", stage="échec", error=str(e),
+                         finished_at=datetime.now().isoformat())
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+    
+    def recover(self) -> int:
+        """Passe en échec les jobs restés en attente ou en cours lors d'une exécution précédente
+        
+        Leur worker a disparu avec l'ancien processus : sans cela, ils resteraient actifs
+        indéfiniment. Retourne le nombre de jobs marqués.
+        """
+        if not os.path.isdir(self.jobs_dir):
+            return 0
+        
+        recovered = 0
+        for filename in os.listdir(self.jobs_dir):
+            if not filename.endswith(".meta.json"):
+                continue
+            job_id = filename[:-len(".meta.json")]
+            with self._lock:
+                if job_id in self._jobs:
+                    continue
+            try:
+                with open(self._meta_path(job_id), encoding='utf-8') as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            
+            if job.get("status") in self.ACTIVE_STATUSES:
+                job.update(status="failed", stage="interrompu", error="Job interrompu par un redémarrage du serveur",
+                           finished_at=datetime.now().isoformat())
+                self._write_json(self._meta_path(job_id), job)
+                recovered += 1
+        return recovered
+    
+    def prune(self) -> int:
+        """Supprime les jobs terminés au-delà de la rétention (max_age, max_finished)
+        
+        Couvre aussi les jobs d'une exécution précédente, présents seulement sur disque.
+        Retourne le nombre de jobs supprimés.
+        """
+        if (not self.max_age and self.max_finished is None) or not os.path.isdir(self.jobs_dir):
+            return 0
+        
+        finished = []
+        for filename in os.listdir(self.jobs_dir):
+            if not filename.endswith(".meta.json"):
+                continue
+            job_id = filename[:-len(".meta.json")]
+            try:
+                job = self.get(job_id)
+            except (OSError, ValueError):
+                continue
+            if job is not None and job.get("status") not in self.ACTIVE_STATUSES:
+                finished.append((job.get("finished_at") or job.get("created_at") or "", job_id))
+        
+        # Plus récents d'abord ; dates ISO locales comparées comme des chaînes
+        finished.sort(reverse=True)
+        cutoff = (datetime.now() - timedelta(seconds=self.max_age)).isoformat() if self.max_age else None
+        expired = [job_id for rank, (finished_at, job_id) in enumerate(finished)
+                   if (self.max_finished is not None and rank >= self.max_finished)
+                   or (cutoff is not None and finished_at < cutoff)]
+        
+        for job_id in expired:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                self._futures.pop(job_id, None)
+                self._cancel_events.pop(job_id, None)
+            for path in (self._result_path(job_id), self._meta_path(job_id)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        return len(expired)
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Métadonnées du job (en mémoire, ou sur disque pour un job d'une exécution précédente)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        
+        if not re.fullmatch(r"[0-9a-f]{32}", job_id) or not os.path.exists(self._meta_path(job_id)):
+            return None
+        with open(self._meta_path(job_id), encoding='utf-8') as f:
+            return json.load(f)
+    
+    def get_result(self, job_id: str) -> Optional[Any]:
+        """Résultat JSON d'un job terminé"""
+        path = self._result_path(job_id)
+        if not re.fullmatch(r"[0-9a-f]{32}", job_id) or not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Annule un job en attente ou demande l'arrêt d'un job en cours"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] not in self.ACTIVE_STATUSES:
+                return dict(job) if job is not None else self.get(job_id)
+            self._cancel_events[job_id].set()
+            future = self._futures.get(job_id)
+        
+        if future is not None and future.cancel():
+            self._update(job_id, status="cancelled", stage="annulé", finished_at=datetime.now().isoformat())
+            with self._lock:
+                self._futures.pop(job_id, None)
+        return self.get(job_id)
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"max_workers": self.max_workers, "queue_limit": self.queue_limit, **counts}
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+job_manager = JobManager(config.JOBS_DIR, config.JOB_WORKERS, config.JOB_QUEUE_LIMIT,
+                         max_age=config.JOB_RETENTION_SECONDS, max_finished=config.JOB_RETENTION_COUNT)
+
+class GroupIndex:
+    """Index des agrégats par magasin et par catégorie (groupby) du catalogue servi
+    
+    Reconstruit à chaque chargement du DataStore : /stores et /categories ne listent que
+    ce que /planogram/generate peut servir. Les endpoints lisent des vues précalculées.
+    """
+    
+    ZONE_COLUMN = 'input_zone_id'
+    DIMENSIONS = {
+        'stores': {'key_column': 'input_magasin_id', 'id_field': 'store_id',
+                   'value_column': 'input_surface_magasin', 'average_field': 'avg_surface'},
+        'categories': {'key_column': 'input_categorie_id', 'id_field': 'category_id',
+                       'value_column': 'input_prix_produit', 'average_field': 'avg_price'}
+    }
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._groups = {name: {} for name in self.DIMENSIONS}
+        self._views = {name: [] for name in self.DIMENSIONS}
+        self.rows_indexed = 0
+    
+    def rebuild(self, data: pd.DataFrame):
+        """Reconstruit l'index à partir d'un jeu de données complet"""
+        with self._lock:
+            self._groups = {name: {} for name in self.DIMENSIONS}
+            self._views = {name: [] for name in self.DIMENSIONS}
+            self.rows_indexed = 0
+            self._add_locked(data)
+    
+    def view(self, name: str) -> List[Dict[str, Any]]:
+        """Vue précalculée d'une dimension ('stores' ou 'categories')"""
+        return self._views[name]
+    
+    def _add_locked(self, data: pd.DataFrame):
+        for name, spec in self.DIMENSIONS.items():
+            key_column = spec['key_column']
+            if key_column not in data.columns:
+                continue
+            
+            if spec['value_column'] in data.columns:
+                values = pd.to_numeric(data[spec['value_column']], errors='coerce')
+            else:
+                values = pd.Series(np.nan, index=data.index)
+            
+            aggregated = values.groupby(data[key_column], sort=False, observed=True).agg(['size', 'sum', 'count'])
+            groups = self._groups[name]
+            for key, size, total, count in aggregated.itertuples():
+                entry = groups.setdefault(self._native(key), {
+                    'products_count': 0, 'value_sum': 0.0, 'value_count': 0, 'zones': {}
+                })
+                entry['products_count'] += int(size)
+                entry['value_sum'] += float(total)
+                entry['value_count'] += int(count)
+            
+            if self.ZONE_COLUMN in data.columns:
+                zone_counts = data.groupby([key_column, self.ZONE_COLUMN], sort=False, observed=True).size()
+                for (key, zone), count in zone_counts.items():
+                    zones = groups[self._native(key)]['zones']
+                    zones[str(zone)] = zones.get(str(zone), 0) + int(count)
+            
+            self._views[name] = [
+                {
+                    spec['id_field']: key,
+                    "products_count": entry['products_count'],
+                    spec['average_field']: entry['value_sum'] / entry['value_count'] if entry['value_count'] else 0,
+                    "zones": dict(entry['zones'])
+                }
+                for key, entry in groups.items()
+            ]
+        
+        self.rows_indexed += len(data)
+    
+    @staticmethod
+    def _native(value: Any) -> Any:
+        """Convertit les scalaires NumPy en types Python (sérialisables en JSON)"""
+        return value.item() if isinstance(value, np.generic) else value
+
+group_index = GroupIndex()
+
 def generate_sample_data():
     """Génère des données d'exemple"""
-    import numpy as np
     np.random.seed(42)
     n_samples = 50
     
@@ -76,13 +466,191 @@ def generate_sample_data():
     
     return pd.DataFrame(data)
 
+def create_pipeline(data: pd.DataFrame = None) -> PlanogramAIPipeline:
+    """Crée un pipeline de génération en mémoire partageant les modèles du registre"""
+    return pipeline_registry.create_pipeline(data)
+
+class DataStore:
+    """Catalogue chargé une seule fois en mémoire, partitionné par magasin et catégorie
+    
+    Sources : CSV (séparateur et encodage détectés), Parquet, ou SQLite (table `table`).
+    Les identifiants sont stockés en 'category' et les mesures en float32 (schéma INPUT_DTYPES).
+    Un thread de fond recharge la source quand le fichier change ; la nouvelle version
+    remplace l'ancienne d'un bloc. Sans source lisible, des données d'exemple sont servies.
+    """
+    
+    PARQUET_EXTENSIONS = ('.parquet', '.pq')
+    SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+    
+    def __init__(self, source_path: str, table: str = None, reload_interval: float = 30,
+                 on_reload: Callable[[pd.DataFrame], None] = None):
+        self.source_path = source_path
+        self.table = table
+        self.reload_interval = reload_interval
+        self.on_reload = on_reload
+        self._snapshot = None
+        self._signature = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.source = None
+        self.loaded_at = None
+    
+    @property
+    def data(self) -> pd.DataFrame:
+        return self._snapshot['data'] if self._snapshot is not None else pd.DataFrame()
+    
+    def _current_signature(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.source_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _read_source(self) -> pd.DataFrame:
+        """Lit la source selon son extension"""
+        extension = os.path.splitext(self.source_path)[1].lower()
+        if extension in self.PARQUET_EXTENSIONS:
+            return pd.read_parquet(self.source_path)
+        if extension in self.SQLITE_EXTENSIONS:
+            with sqlite3.connect(self.source_path) as connection:
+                return pd.read_sql_query(f'SELECT * FROM "{self.table}"', connection)
+        
+        with open(self.source_path, 'rb') as f:
+            header = f.readline()
+        separator = ';' if header.count(b';') > header.count(b',') else ','
+        try:
+            return pd.read_csv(self.source_path, sep=separator, encoding='utf-8')
+        except UnicodeDecodeError:
+            return pd.read_csv(self.source_path, sep=separator, encoding='latin-1')
+    
+    @staticmethod
+    def _optimize(data: pd.DataFrame) -> pd.DataFrame:
+        """Identifiants en 'category', mesures en float32 (colonnes non convertibles inchangées)"""
+        for col, dtype in INPUT_DTYPES.items():
+            if col in data.columns:
+                try:
+                    data[col] = data[col].astype(dtype)
+                except (ValueError, TypeError):
+                    pass
+        return data
+    
+    @staticmethod
+    def _partition(data: pd.DataFrame, columns: List[str]) -> Dict[Any, np.ndarray]:
+        """Positions des lignes de chaque groupe (clés converties en texte)"""
+        if any(col not in data.columns for col in columns):
+            return {}
+        indices = data.groupby(columns if len(columns) > 1 else columns[0], sort=False, observed=True).indices
+        return {
+            tuple(str(k) for k in key) if isinstance(key, tuple) else str(key): positions
+            for key, positions in indices.items()
+        }
+    
+    def load(self) -> bool:
+        """Charge la source et remplace les données servies ; retourne True si elles ont changé"""
+        signature = self._current_signature()
+        data = None
+        if signature is not None:
+            try:
+                data = self._optimize(self._read_source())
+                self.source = self.source_path
+            except Exception as e:
+                print(f"❌ Erreur lors du chargement de {self.source_path}: {e}")
+        self._signature = signature
+        
+        if data is None or data.empty:
+            if self._snapshot is not None:
+                print("⚠️ Source illisible, conservation des données en mémoire")
+                return False
+            print(f"⚠️ Source de données indisponible ({self.source_path}), utilisation des données d'exemple")
+            data = generate_sample_data()
+            self.source = "sample"
+        
+        self._snapshot = {
+            'data': data,
+            'by_pair': self._partition(data, ['input_magasin_id', 'input_categorie_id']),
+            'by_store': self._partition(data, ['input_magasin_id']),
+            'by_category': self._partition(data, ['input_categorie_id'])
+        }
+        self.loaded_at = datetime.now().isoformat()
+        print(f"✅ Catalogue chargé: {len(data)} lignes, {len(self._snapshot['by_pair'])} partitions")
+        
+        if self.on_reload is not None:
+            self.on_reload(data)
+        return True
+    
+    def filter(self, magasin_id: Optional[str], categorie_id: Optional[str]) -> pd.DataFrame:
+        """Lignes d'un magasin et/ou d'une catégorie (lecture directe de la partition)"""
+        snapshot = self._snapshot
+        data = snapshot['data']
+        
+        # Filtre ignoré si la colonne correspondante est absente
+        magasin_id = magasin_id if magasin_id and 'input_magasin_id' in data.columns else None
+        categorie_id = categorie_id if categorie_id and 'input_categorie_id' in data.columns else None
+        
+        if magasin_id and categorie_id:
+            positions = snapshot['by_pair'].get((magasin_id, categorie_id))
+        elif magasin_id:
+            positions = snapshot['by_store'].get(magasin_id)
+        elif categorie_id:
+            positions = snapshot['by_category'].get(categorie_id)
+        else:
+            return data
+        
+        if positions is None:
+            return data.iloc[0:0]
+        return data.take(positions)
+    
+    def _watch(self):
+        while not self._stop_event.wait(self.reload_interval):
+            if self._current_signature() != self._signature:
+                print(f"🔄 Modification détectée, rechargement de {self.source_path}")
+                self.load()
+    
+    def start_watching(self):
+        """Démarre le rechargement en arrière-plan sur modification du fichier source"""
+        if self._thread is None and self.reload_interval:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._watch, name="data-store-reload", daemon=True)
+            self._thread.start()
+    
+    def stop_watching(self):
+        self._stop_event.set()
+        self._thread = None
+    
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot or {'data': pd.DataFrame(), 'by_pair': {}}
+        return {
+            "source": self.source,
+            "rows": len(snapshot['data']),
+            "partitions": len(snapshot['by_pair']),
+            "memory_mb": round(float(snapshot['data'].memory_usage(deep=True).sum()) / 1024 ** 2, 2),
+            "loaded_at": self.loaded_at
+        }
+
+data_store = DataStore(config.DATA_PATH, config.DATA_TABLE, config.DATA_RELOAD_INTERVAL,
+                       on_reload=group_index.rebuild)
+
 @app.on_event("startup")
 async def startup_event():
     """Initialisation au démarrage"""
-    global sample_data
-    sample_data = generate_sample_data()
+    data_store.load()
+    data_store.start_watching()
+    interrupted = job_manager.recover()
+    if interrupted:
+        print(f"⚠️ {interrupted} job(s) interrompu(s) par le redémarrage marqué(s) en échec")
+    pruned = job_manager.prune()
+    if pruned:
+        print(f"🧹 {pruned} job(s) terminé(s) supprimé(s) (rétention)")
+    pipeline_registry.get()
     print("🚀 API Planogramme IA démarrée")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Arrêt du pool de génération, de la file de jobs et du rechargement des données"""
+    data_store.stop_watching()
+    generation_pool.shutdown()
+    job_manager.shutdown()
+
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """Page d'accueil de l'API"""
@@ -135,6 +703,31 @@ async def root():
                 <div class="description">Upload d'un fichier CSV et génération de planogramme</div>
             </div>
             
+            <div class="endpoint">
+                <div class="method">POST /planogram/batch-generate</div>
+                <div class="description">Génération des planogrammes de tous les couples magasin/catégorie</div>
+            </div>
+            
+            <div class="endpoint">
+                <div class="method">POST /planogram/generate-stream · POST /planogram/batch-generate-stream</div>
+                <div class="description">Génération en flux NDJSON (meubles et positions envoyés par blocs)</div>
+            </div>
+            
+            <div class="endpoint">
+                <div class="method">POST /jobs/upload-and-generate · POST /jobs/batch-generate</div>
+                <div class="description">Génération asynchrone : retourne un job_id</div>
+            </div>
+            
+            <div class="endpoint">
+                <div class="method">GET /jobs/{job_id} · DELETE /jobs/{job_id}</div>
+                <div class="description">Progression et résultat d'un job, annulation</div>
+            </div>
+            
+            <div class="endpoint">
+                <div class="method">GET /cache/stats · DELETE /cache</div>
+                <div class="description">Métriques et vidage du cache de résultats</div>
+            </div>
+            
             <div class="endpoint">
                 <div class="method">GET /planogram/stats</div>
                 <div class="description">Statistiques générales du système</div>
@@ -166,23 +759,12 @@ async def get_furniture_types():
 
 @app.get("/stores")
 async def get_stores():
-    """Retourne la liste des magasins disponibles"""
-    global sample_data
+    """Retourne la liste des magasins disponibles (index précalculé)"""
+    stores = group_index.view('stores')
     
-    if sample_data is not None and 'input_magasin_id' in sample_data.columns:
-        stores = sample_data['input_magasin_id'].unique().tolist()
-        store_details = []
-        
-        for store_id in stores:
-            store_data = sample_data[sample_data['input_magasin_id'] == store_id]
-            store_details.append({
-                "store_id": store_id,
-                "products_count": len(store_data),
-                "avg_surface": store_data['input_surface_magasin'].mean() if 'input_surface_magasin' in store_data.columns else 0
-            })
-        
+    if stores:
         return {
-            "stores": store_details,
+            "stores": stores,
             "total_stores": len(stores)
         }
     
@@ -197,23 +779,12 @@ async def get_stores():
 
 @app.get("/categories")
 async def get_categories():
-    """Retourne la liste des catégories disponibles"""
-    global sample_data
+    """Retourne la liste des catégories disponibles (index précalculé)"""
+    categories = group_index.view('categories')
     
-    if sample_data is not None and 'input_categorie_id' in sample_data.columns:
-        categories = sample_data['input_categorie_id'].unique().tolist()
-        category_details = []
-        
-        for category_id in categories:
-            category_data = sample_data[sample_data['input_categorie_id'] == category_id]
-            category_details.append({
-                "category_id": category_id,
-                "products_count": len(category_data),
-                "avg_price": category_data['input_prix_produit'].mean() if 'input_prix_produit' in category_data.columns else 0
-            })
-        
+    if categories:
         return {
-            "categories": category_details,
+            "categories": categories,
             "total_categories": len(categories)
         }
     
@@ -239,6 +810,134 @@ async def get_zones():
         "total_zones": 4
     }
 
+def filter_data(data: pd.DataFrame, magasin_id: Optional[str], categorie_id: Optional[str]) -> pd.DataFrame:
+    """Filtre les données par magasin et/ou catégorie"""
+    filtered_data = data
+    
+    if magasin_id and 'input_magasin_id' in filtered_data.columns:
+        filtered_data = filtered_data[filtered_data['input_magasin_id'] == magasin_id]
+    
+    if categorie_id and 'input_categorie_id' in filtered_data.columns:
+        filtered_data = filtered_data[filtered_data['input_categorie_id'] == categorie_id]
+    
+    if filtered_data.empty:
+        raise HTTPException(status_code=400, detail="Aucune donnée après filtrage")
+    
+    return filtered_data
+
+def predict_planogram(filtered_data: pd.DataFrame, magasin_id: Optional[str],
+                      categorie_id: Optional[str], optimization_level: int = DEFAULT_OPTIMIZATION_LEVEL) -> tuple:
+    """Prédictions brutes des données filtrées, sérialisées ensuite en flux"""
+    pipeline = create_pipeline(filtered_data)
+    results = pipeline.run_filtered_pipeline(
+        filtered_data,
+        magasin_id=magasin_id or "MAG_001",
+        categorie_id=categorie_id or "CAT_001",
+        optimization_level=optimization_level
+    )
+    
+    if not results:
+        raise HTTPException(status_code=500, detail="Erreur lors de la génération")
+    return pipeline, results
+
+def predict_batch(data: pd.DataFrame, optimization_level: int = DEFAULT_OPTIMIZATION_LEVEL) -> tuple:
+    """Prédictions par lots (une passe, découpées par couple magasin/catégorie)"""
+    batch_pipeline = create_pipeline(data)
+    batch_results = batch_pipeline.run_batch_pipeline(data, optimization_level=optimization_level)
+    
+    if not batch_results:
+        raise HTTPException(status_code=500, detail="Erreur lors de la génération par lots")
+    return batch_pipeline, batch_results
+
+def no_progress(stage: str, percent: int):
+    """Rapport de progression ignoré (génération synchrone)"""
+
+def planogram_cache_key(filtered_data: pd.DataFrame, magasin_id: Optional[str], categorie_id: Optional[str],
+                        options: Dict[str, Any] = None) -> str:
+    """Clé de cache : lignes filtrées, filtres, niveau d'optimisation et version des modèles en service
+    
+    Seules les options qui changent le planogramme généré entrent dans la clé.
+    """
+    return ResultCache.make_key(
+        filtered_data,
+        magasin_id=magasin_id,
+        categorie_id=categorie_id,
+        model_version=pipeline_registry.get().model_version,
+        optimization_level=(options or {}).get("optimization_level", DEFAULT_OPTIMIZATION_LEVEL)
+    )
+
+def get_cached_planogram(cache_key: str, magasin_id: Optional[str],
+                         categorie_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Planogramme en cache, avec un identifiant et une date de création propres à cette réponse"""
+    cached = result_cache.get(cache_key)
+    if cached is not None and cached["planogram"].get("planogram_info"):
+        fresh_info = PlanogramAIPipeline._planogram_info(magasin_id or "MAG_001", categorie_id or "CAT_001")
+        cached["planogram"]["planogram_info"].update(
+            planogram_id=fresh_info["planogram_id"], date_creation=fresh_info["date_creation"]
+        )
+    return cached
+
+def build_planogram(filtered_data: pd.DataFrame, magasin_id: Optional[str], categorie_id: Optional[str],
+                    options: Dict[str, Any] = None,
+                    progress: Callable[[str, int], None] = no_progress,
+                    cache_key: str = None) -> Dict[str, Any]:
+    """Génère le planogramme JSON des données filtrées (exécuté dans le pool de génération)
+    
+    Le résultat est mis en cache (voir planogram_cache_key). Si cache_key est fourni,
+    l'appelant a déjà consulté le cache sans succès : la génération a lieu directement.
+    """
+    if cache_key is None:
+        cache_key = planogram_cache_key(filtered_data, magasin_id, categorie_id, options)
+        cached = get_cached_planogram(cache_key, magasin_id, categorie_id)
+        if cached is not None:
+            return cached
+    
+    # Génération directement sur les données filtrées en mémoire
+    pipeline = create_pipeline(filtered_data)
+    
+    progress("génération", 40)
+    results = pipeline.run_filtered_pipeline(
+        filtered_data,
+        magasin_id=magasin_id or "MAG_001",
+        categorie_id=categorie_id or "CAT_001",
+        optimization_level=(options or {}).get("optimization_level", DEFAULT_OPTIMIZATION_LEVEL)
+    )
+    
+    if not results:
+        raise HTTPException(status_code=500, detail="Erreur lors de la génération")
+    
+    # Génération du JSON final
+    progress("sortie JSON", 80)
+    json_output = pipeline.generate_json_output(
+        results,
+        magasin_id=magasin_id or "MAG_001",
+        categorie_id=categorie_id or "CAT_001"
+    )
+    
+    generation = {"planogram": json_output, "rows_processed": len(filtered_data)}
+    result_cache.put(cache_key, generation)
+    return generation
+
+def build_planogram_from_upload(contents: bytes, magasin_id: Optional[str], categorie_id: Optional[str],
+                                options: Dict[str, Any] = None,
+                                progress: Callable[[str, int], None] = no_progress) -> Dict[str, Any]:
+    """Lit le CSV uploadé depuis les octets de la requête et génère le planogramme"""
+    progress("lecture du fichier", 10)
+    data = pd.read_csv(io.BytesIO(contents))
+    
+    progress("filtrage", 20)
+    filtered_data = filter_data(data, magasin_id, categorie_id)
+    return build_planogram(filtered_data, magasin_id, categorie_id, options, progress)
+
+def build_batch_planograms(data: pd.DataFrame, optimization_level: int = DEFAULT_OPTIMIZATION_LEVEL,
+                           progress: Callable[[str, int], None] = no_progress) -> List[Dict[str, Any]]:
+    """Génère les planogrammes de tous les couples (magasin, catégorie) en une seule passe"""
+    progress("génération par lots", 20)
+    batch_pipeline, batch_results = predict_batch(data, optimization_level)
+    
+    progress("sortie JSON", 80)
+    return batch_pipeline.generate_batch_json_output(batch_results)
+
 @app.post("/planogram/generate")
 async def generate_planogram(
     magasin_id: Optional[str] = Form(None),
@@ -247,69 +946,39 @@ async def generate_planogram(
     apply_temperature_constraints: bool = Form(True)
 ):
     """Génère un planogramme avec les paramètres spécifiés"""
-    global pipeline_instance, sample_data
-    
     try:
-        # Utilisation des données d'exemple si pas de données chargées
-        if sample_data is None:
-            sample_data = generate_sample_data()
-        
-        # Filtrage des données
-        filtered_data = sample_data.copy()
-        
-        if magasin_id and 'input_magasin_id' in filtered_data.columns:
-            filtered_data = filtered_data[filtered_data['input_magasin_id'] == magasin_id]
-        
-        if categorie_id and 'input_categorie_id' in filtered_data.columns:
-            filtered_data = filtered_data[filtered_data['input_categorie_id'] == categorie_id]
-        
+        # Lecture directe de la partition (magasin, catégorie) du catalogue en mémoire
+        filtered_data = data_store.filter(magasin_id, categorie_id)
         if filtered_data.empty:
             raise HTTPException(status_code=400, detail="Aucune donnée après filtrage")
         
-        # Sauvegarde temporaire
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp_file:
-            filtered_data.to_csv(tmp_file.name, index=False)
-            temp_path = tmp_file.name
+        # Cache consulté avant le pool : un succès ne prend pas de place de génération. La clé (hachage
+        # des lignes, modèles éventuellement rechargés depuis le disque) est calculée hors de la boucle
+        options = {"optimization_level": optimization_level}
+        cache_key = await asyncio.to_thread(planogram_cache_key, filtered_data, magasin_id, categorie_id, options)
+        generation = get_cached_planogram(cache_key, magasin_id, categorie_id)
         
-        try:
-            # Initialisation du pipeline
-            pipeline_instance = PlanogramAIPipeline(temp_path)
-            
-            # Génération
-            results = pipeline_instance.run_filtered_pipeline(
-                filtered_data,
-                magasin_id=magasin_id or "MAG_001",
-                categorie_id=categorie_id or "CAT_001"
+        # Génération hors de la boucle asyncio
+        if generation is None:
+            generation = await generation_pool.run(
+                build_planogram, filtered_data, magasin_id, categorie_id, options, no_progress, cache_key
             )
-            
-            if not results:
-                raise HTTPException(status_code=500, detail="Erreur lors de la génération")
-            
-            # Génération du JSON final
-            json_output = pipeline_instance.generate_json_output(
-                results,
-                magasin_id=magasin_id or "MAG_001",
-                categorie_id=categorie_id or "CAT_001"
-            )
-            
-            return {
-                "success": True,
-                "message": "Planogramme généré avec succès",
-                "planogram": json_output,
-                "generation_params": {
-                    "magasin_id": magasin_id,
-                    "categorie_id": categorie_id,
-                    "optimization_level": optimization_level,
-                    "apply_temperature_constraints": apply_temperature_constraints,
-                    "products_processed": len(filtered_data)
-                }
-            }
         
-        finally:
-            # Nettoyage du fichier temporaire
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        return PlanogramJSONResponse({
+            "success": True,
+            "message": "Planogramme généré avec succès",
+            "planogram": generation["planogram"],
+            "generation_params": {
+                "magasin_id": magasin_id,
+                "categorie_id": categorie_id,
+                "optimization_level": optimization_level,
+                "apply_temperature_constraints": apply_temperature_constraints,
+                "products_processed": generation["rows_processed"]
+            }
+        })
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la génération: {str(e)}")
 
@@ -321,98 +990,187 @@ async def upload_and_generate(
     optimization_level: int = Form(3)
 ):
     """Upload un fichier CSV et génère un planogramme"""
-    global pipeline_instance
-    
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Le fichier doit être au format CSV")
     
     try:
-        # Lecture du fichier uploadé
         contents = await file.read()
         
-        # Sauvegarde temporaire
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.csv', delete=False) as tmp_file:
-            tmp_file.write(contents)
-            temp_path = tmp_file.name
-        
-        try:
-            # Chargement des données
-            data = pd.read_csv(temp_path)
-            
-            # Filtrage
-            filtered_data = data.copy()
-            
-            if magasin_id and 'input_magasin_id' in filtered_data.columns:
-                filtered_data = filtered_data[filtered_data['input_magasin_id'] == magasin_id]
-            
-            if categorie_id and 'input_categorie_id' in filtered_data.columns:
-                filtered_data = filtered_data[filtered_data['input_categorie_id'] == categorie_id]
-            
-            if filtered_data.empty:
-                raise HTTPException(status_code=400, detail="Aucune donnée après filtrage")
-            
-            # Sauvegarde des données filtrées
-            filtered_temp_path = temp_path.replace('.csv', '_filtered.csv')
-            filtered_data.to_csv(filtered_temp_path, index=False)
-            
-            # Génération
-            pipeline_instance = PlanogramAIPipeline(filtered_temp_path)
-            
-            results = pipeline_instance.run_filtered_pipeline(
-                filtered_data,
-                magasin_id=magasin_id or "MAG_001",
-                categorie_id=categorie_id or "CAT_001"
-            )
-            
-            if not results:
-                raise HTTPException(status_code=500, detail="Erreur lors de la génération")
-            
-            json_output = pipeline_instance.generate_json_output(
-                results,
-                magasin_id=magasin_id or "MAG_001",
-                categorie_id=categorie_id or "CAT_001"
-            )
-            
-            return {
-                "success": True,
-                "message": "Fichier uploadé et planogramme généré avec succès",
-                "file_info": {
-                    "filename": file.filename,
-                    "size": len(contents),
-                    "rows_processed": len(filtered_data)
-                },
-                "planogram": json_output
-            }
+        # Lecture du CSV, filtrage et génération hors de la boucle asyncio
+        generation = await generation_pool.run(
+            build_planogram_from_upload, contents, magasin_id, categorie_id,
+            {"optimization_level": optimization_level}
+        )
         
-        finally:
-            # Nettoyage des fichiers temporaires
-            for path in [temp_path, temp_path.replace('.csv', '_filtered.csv')]:
-                if os.path.exists(path):
-                    os.unlink(path)
+        return PlanogramJSONResponse({
+            "success": True,
+            "message": "Fichier uploadé et planogramme généré avec succès",
+            "file_info": {
+                "filename": file.filename,
+                "size": len(contents),
+                "rows_processed": generation["rows_processed"]
+            },
+            "planogram": generation["planogram"]
+        })
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors du traitement: {str(e)}")
 
+@app.post("/planogram/batch-generate")
+async def batch_generate_planograms(
+    optimization_level: int = Form(3),
+    apply_temperature_constraints: bool = Form(True)
+):
+    """Génère un planogramme pour chaque couple (magasin, catégorie) en un seul appel"""
+    try:
+        catalog = data_store.data
+        
+        # Une seule passe de prédiction sur toutes les lignes, découpée ensuite par groupe
+        planograms = await generation_pool.run(build_batch_planograms, catalog, optimization_level)
+        
+        return PlanogramJSONResponse({
+            "success": True,
+            "message": f"{len(planograms)} planogrammes générés avec succès",
+            "planograms": planograms,
+            "total_planograms": len(planograms),
+            "generation_params": {
+                "optimization_level": optimization_level,
+                "apply_temperature_constraints": apply_temperature_constraints,
+                "products_processed": len(catalog)
+            }
+        })
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la génération par lots: {str(e)}")
+
+@app.post("/planogram/generate-stream")
+async def generate_planogram_stream(
+    magasin_id: Optional[str] = Form(None),
+    categorie_id: Optional[str] = Form(None),
+    optimization_level: int = Form(3),
+    chunk_size: int = Form(config.STREAM_CHUNK_SIZE)
+):
+    """Génère un planogramme et le renvoie en flux NDJSON (en-tête, puis meubles et positions par blocs)"""
+    filtered_data = data_store.filter(magasin_id, categorie_id)
+    if filtered_data.empty:
+        raise HTTPException(status_code=400, detail="Aucune donnée après filtrage")
+    
+    pipeline, results = await generation_pool.run(predict_planogram, filtered_data, magasin_id, categorie_id,
+                                                  optimization_level)
+    
+    # Itérateur synchrone : sérialisé bloc par bloc hors de la boucle asyncio
+    return StreamingResponse(
+        pipeline.iter_ndjson_output(results, magasin_id or "MAG_001", categorie_id or "CAT_001",
+                                    chunk_size=max(chunk_size, 1)),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/planogram/batch-generate-stream")
+async def batch_generate_stream(
+    optimization_level: int = Form(3),
+    chunk_size: int = Form(config.STREAM_CHUNK_SIZE)
+):
+    """Génère les planogrammes de tous les couples (magasin, catégorie) en flux NDJSON
+    
+    Chaque planogramme commence par sa ligne "planogram_info" ; les lignes suivantes
+    lui appartiennent jusqu'à l'en-tête suivant.
+    """
+    batch_pipeline, batch_results = await generation_pool.run(predict_batch, data_store.data, optimization_level)
+    
+    return StreamingResponse(
+        batch_pipeline.iter_batch_ndjson_output(batch_results, chunk_size=max(chunk_size, 1)),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/jobs/upload-and-generate", status_code=202)
+async def submit_upload_job(
+    file: UploadFile = File(...),
+    magasin_id: Optional[str] = Form(None),
+    categorie_id: Optional[str] = Form(None),
+    optimization_level: int = Form(3)
+):
+    """Soumet la génération d'un planogramme à partir d'un CSV uploadé (suivi via /jobs/{job_id})"""
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Le fichier doit être au format CSV")
+    
+    contents = await file.read()
+    job = job_manager.submit(
+        "upload-and-generate", build_planogram_from_upload, contents, magasin_id, categorie_id,
+        {"optimization_level": optimization_level},
+        params={
+            "filename": file.filename,
+            "size": len(contents),
+            "magasin_id": magasin_id,
+            "categorie_id": categorie_id,
+            "optimization_level": optimization_level
+        }
+    )
+    return {"job_id": job["job_id"], "status": job["status"], "status_url": f"/jobs/{job['job_id']}"}
+
+@app.post("/jobs/batch-generate", status_code=202)
+async def submit_batch_job(optimization_level: int = Form(3)):
+    """Soumet la génération par lots de tous les couples (magasin, catégorie)"""
+    catalog = data_store.data
+    job = job_manager.submit("batch-generate", build_batch_planograms, catalog, optimization_level,
+                             params={"optimization_level": optimization_level, "products": len(catalog)})
+    return {"job_id": job["job_id"], "status": job["status"], "status_url": f"/jobs/{job['job_id']}"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Statut et progression d'un job ; inclut le résultat une fois terminé"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job introuvable: {job_id}")
+    
+    if job["status"] == "completed":
+        job["result"] = job_manager.get_result(job_id)
+    return job
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Annule un job en attente ou en cours"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job introuvable: {job_id}")
+    return job
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Métriques du cache de résultats (succès, échecs, évictions)"""
+    return result_cache.stats()
+
+@app.delete("/cache")
+async def clear_cache():
+    """Vide le cache de résultats"""
+    result_cache.clear()
+    return {"success": True, "message": "Cache vidé"}
+
 @app.get("/planogram/stats")
 async def get_planogram_stats():
     """Retourne les statistiques générales du système"""
-    global sample_data
-    
-    if sample_data is None:
-        sample_data = generate_sample_data()
-    
+    catalog = data_store.data
+    registry_status = pipeline_registry.status()
     stats = {
         "system_info": {
             "version": "1.0.0",
             "supported_furniture_types": len(FURNITURE_TYPES),
             "ml_models": ["XGBoost", "Random Forest"],
+            "models_loaded": registry_status["models_loaded"],
+            "models": registry_status,
+            "generation_pool": generation_pool.stats(),
+            "jobs": job_manager.stats(),
             "last_updated": datetime.now().isoformat()
         },
         "data_stats": {
-            "total_products": len(sample_data),
-            "unique_stores": sample_data['input_magasin_id'].nunique() if 'input_magasin_id' in sample_data.columns else 0,
-            "unique_categories": sample_data['input_categorie_id'].nunique() if 'input_categorie_id' in sample_data.columns else 0,
-            "avg_product_price": sample_data['input_prix_produit'].mean() if 'input_prix_produit' in sample_data.columns else 0
+            "total_products": len(catalog),
+            "unique_stores": catalog['input_magasin_id'].nunique() if 'input_magasin_id' in catalog.columns else 0,
+            "unique_categories": catalog['input_categorie_id'].nunique() if 'input_categorie_id' in catalog.columns else 0,
+            "avg_product_price": float(catalog['input_prix_produit'].mean()) if 'input_prix_produit' in catalog.columns else 0,
+            "store": data_store.stats()
         },
         "furniture_capabilities": {
             "max_faces_supported": max([info["faces"] for info in FURNITURE_TYPES.values()]),
@@ -0,0 +1,62 @@
+import sys
+import time
+sys.path.append('..')
+
+import numpy as np
+import pandas as pd
+from main_pipeline import FurnitureDimensionPredictor, FurnitureTypePredictor
+
+
+def generate_benchmark_features(n_samples: int, n_features: int = 12) -> pd.DataFrame:
+    """Génère une matrice de features synthétique pour le benchmark"""
+    rng = np.random.default_rng(42)
+    X = pd.DataFrame(rng.normal(size=(n_samples, n_features)),
+                     columns=[f'input_feature_{i}' for i in range(n_features)])
+    X['input_contrainte_temperature_produit'] = rng.integers(0, 2, n_samples)
+    X['input_categorie_id'] = rng.integers(0, 20, n_samples)
+    return X
+
+
+def benchmark_mode(X: pd.DataFrame, furniture_types: np.ndarray, multi_output: bool) -> dict:
+    """Mesure les temps d'entraînement et de prédiction d'un mode"""
+    predictor = FurnitureDimensionPredictor(multi_output=multi_output)
+
+    start_time = time.perf_counter()
+    predictor.train(X, furniture_types)
+    fit_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    predictions = predictor.predict(X, furniture_types)
+    predict_time = time.perf_counter() - start_time
+
+    assert len(predictions) == 9
+    return {'fit': fit_time, 'predict': predict_time}
+
+
+def run_benchmark(sizes=(1000, 5000, 20000)):
+    """Compare le mode 9 modèles indépendants et le mode multi-sorties"""
+    print("⏱️ Benchmark des modèles de dimensions")
+    print("=" * 60)
+
+    results = []
+    for n_samples in sizes:
+        X = generate_benchmark_features(n_samples)
+        furniture_types = FurnitureTypePredictor()._generate_furniture_type_labels(X).to_numpy()
+
+        per_target = benchmark_mode(X, furniture_types, multi_output=False)
+        multi_output = benchmark_mode(X, furniture_types, multi_output=True)
+        results.append((n_samples, per_target, multi_output))
+
+    print("\n📊 RÉSULTATS")
+    print(f"{'Lignes':>8} | {'Fit 9 modèles':>14} | {'Fit multi':>10} | {'Predict 9':>10} | {'Predict multi':>13}")
+    for n_samples, per_target, multi_output in results:
+        print(f"{n_samples:>8} | {per_target['fit']:>13.2f}s | {multi_output['fit']:>9.2f}s | "
+              f"{per_target['predict']:>9.3f}s | {multi_output['predict']:>12.3f}s")
+        print(f"{'':>8}   ⚡ Gain fit: x{per_target['fit'] / multi_output['fit']:.1f}, "
+              f"predict: x{per_target['predict'] / multi_output['predict']:.1f}")
+
+    return results
+
+
+if __name__ == '__main__':
+    run_benchmark()
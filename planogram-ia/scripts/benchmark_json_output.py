@@ -0,0 +1,131 @@
+import sys
+import json
+import time
+sys.path.append('..')
+
+import numpy as np
+from main_pipeline import (
+    JSON_BACKEND,
+    AVAILABLE_FACES,
+    FURNITURE_SPECS,
+    FURNITURE_TYPE_NAMES,
+    SHELF_COUNT_FIELDS,
+    build_furniture_records,
+    build_position_records,
+    serialize_json
+)
+
+
+def generate_benchmark_results(n_positions: int) -> dict:
+    """Génère des résultats de prédiction synthétiques (une position et un meuble par ligne)"""
+    rng = np.random.default_rng(42)
+    dimensions = {
+        'largeur': rng.uniform(60, 300, n_positions),
+        'hauteur': rng.uniform(80, 250, n_positions),
+        'profondeur': rng.uniform(30, 80, n_positions)
+    }
+    for field in SHELF_COUNT_FIELDS:
+        dimensions[field] = rng.integers(0, 8, n_positions)
+
+    return {
+        'furniture_type': rng.integers(1, 13, n_positions),
+        'dimensions': dimensions,
+        'positions': {
+            'face': rng.choice(['front', 'back', 'left', 'right'], n_positions),
+            'etagere': rng.integers(1, 6, n_positions),
+            'colonne': rng.integers(1, 8, n_positions),
+            'quantite': rng.integers(1, 10, n_positions)
+        }
+    }
+
+
+def build_per_element(results: dict) -> dict:
+    """Construction élément par élément avec float()/int() (approche d'origine)"""
+    furniture, positions = [], []
+    for i in range(len(results['furniture_type'])):
+        furniture_type_id = int(results['furniture_type'][i])
+        faces = FURNITURE_SPECS.get(furniture_type_id, {}).get('faces', 1)
+        record = {
+            "furniture_id": f"FURN_{i + 1:03d}",
+            "furniture_type_id": furniture_type_id,
+            "furniture_type_name": FURNITURE_TYPE_NAMES.get(furniture_type_id, "unknown"),
+            "faces": faces,
+            "available_faces": list(AVAILABLE_FACES.get(faces, ['front'])),
+            "largeur": float(results['dimensions']['largeur'][i]),
+            "hauteur": float(results['dimensions']['hauteur'][i]),
+            "profondeur": float(results['dimensions']['profondeur'][i]),
+            "imageUrl": f"/images/furniture_{furniture_type_id}.png"
+        }
+        for field in SHELF_COUNT_FIELDS:
+            record[field] = int(results['dimensions'][field][i])
+        furniture.append(record)
+
+        positions.append({
+            "position_id": f"POS_{i + 1:03d}",
+            "furniture_id": f"FURN_{i + 1:03d}",
+            "produit_id": f"PROD_{i + 1:03d}",
+            "face": str(results['positions']['face'][i]),
+            "etagere": int(results['positions']['etagere'][i]),
+            "colonne": int(results['positions']['colonne'][i]),
+            "quantite": int(results['positions']['quantite'][i])
+        })
+    return {"furniture": furniture, "product_positions": positions}
+
+
+def build_bulk(results: dict) -> dict:
+    """Construction colonne par colonne (conversion en masse des tableaux)"""
+    return {
+        "furniture": build_furniture_records(results),
+        "product_positions": build_position_records(results)
+    }
+
+
+def timed(func, *args, **kwargs):
+    """Exécute func et retourne (résultat, durée en secondes)"""
+    start_time = time.perf_counter()
+    value = func(*args, **kwargs)
+    return value, time.perf_counter() - start_time
+
+
+def run_benchmark(n_positions: int = 100000):
+    """Compare construction et sérialisation d'un planogramme de n_positions positions"""
+    print(f"⏱️ Benchmark sortie JSON - {n_positions} positions (backend: {JSON_BACKEND})")
+    print("=" * 60)
+
+    results = generate_benchmark_results(n_positions)
+
+    per_element, per_element_build = timed(build_per_element, results)
+    bulk, bulk_build = timed(build_bulk, results)
+
+    stdlib_pretty, stdlib_pretty_time = timed(json.dumps, per_element, indent=2, ensure_ascii=False)
+    _, stdlib_compact_time = timed(json.dumps, bulk, separators=(',', ':'), ensure_ascii=False)
+    backend_pretty, backend_pretty_time = timed(serialize_json, bulk, pretty=True)
+    backend_compact, backend_compact_time = timed(serialize_json, bulk)
+
+    print("\n📊 RÉSULTATS")
+    print(f"{'Étape':<40} | {'Temps':>8}")
+    print(f"{'Construction élément par élément':<40} | {per_element_build:>7.3f}s")
+    print(f"{'Construction en masse':<40} | {bulk_build:>7.3f}s")
+    print(f"{'json.dumps indent=2 (origine)':<40} | {stdlib_pretty_time:>7.3f}s")
+    print(f"{'json.dumps compact':<40} | {stdlib_compact_time:>7.3f}s")
+    print(f"{f'serialize_json pretty ({JSON_BACKEND})':<40} | {backend_pretty_time:>7.3f}s")
+    print(f"{f'serialize_json compact ({JSON_BACKEND})':<40} | {backend_compact_time:>7.3f}s")
+
+    original = per_element_build + stdlib_pretty_time
+    optimized = bulk_build + backend_compact_time
+    print(f"\n⚡ Total origine: {original:.3f}s → optimisé: {optimized:.3f}s (x{original / optimized:.1f})")
+    print(f"📦 Taille: indentée {len(stdlib_pretty.encode('utf-8')) / 1024 ** 2:.1f} Mo, "
+          f"compacte {len(backend_compact) / 1024 ** 2:.1f} Mo")
+
+    return {
+        'per_element_build': per_element_build,
+        'bulk_build': bulk_build,
+        'stdlib_pretty': stdlib_pretty_time,
+        'stdlib_compact': stdlib_compact_time,
+        'backend_pretty': backend_pretty_time,
+        'backend_compact': backend_compact_time
+    }
+
+
+if __name__ == '__main__':
+    run_benchmark()
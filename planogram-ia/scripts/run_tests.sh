@@ -85,6 +85,17 @@ else
     print_warning "Fichier de tests unitaires non trouvé"
 fi
 
+# Tests unitaires de l'API
+if [ -f "scripts/test_api.py" ]; then
+    (cd scripts && python3 test_api.py) > logs/api_unit_tests.log 2>&1
+    if [ $? -eq 0 ]; then
+        print_success "Tests unitaires de l'API réussis"
+    else
+        print_error "Échec des tests unitaires de l'API - voir logs/api_unit_tests.log"
+        cat logs/api_unit_tests.log
+    fi
+fi
+
 # Test du pipeline principal
 print_status "Test du pipeline principal..."
 if [ -f "main_pipeline.py" ]; then
@@ -0,0 +1,429 @@
+import sys
+import os
+sys.path.append('..')
+
+import unittest
+import asyncio
+import json
+import tempfile
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import pandas as pd
+from unittest import mock
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import api
+
+class TestGenerateEndpointCache(unittest.TestCase):
+    """Tests du cache de résultats consulté avant le pool de génération"""
+
+    def setUp(self):
+        """Catalogue filtré et modèles simulés, cache vide"""
+        self.filtered = pd.DataFrame({'input_magasin_id': ['MAG_001'] * 3, 'input_categorie_id': ['CAT_001'] * 3,
+                                      'input_prix_produit': [1.0, 2.0, 3.0]})
+        patches = [
+            mock.patch.object(api.pipeline_registry, 'get', return_value=mock.Mock(model_version='v1')),
+            mock.patch.object(api.data_store, 'filter', return_value=self.filtered)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        api.result_cache.clear()
+        self.addCleanup(api.result_cache.clear)
+        self.client = TestClient(api.app)
+
+    def test_cache_hit_bypasses_saturated_pool(self):
+        """Test : un succès de cache répond même pool saturé, avec un id et une date rafraîchis"""
+        key = api.planogram_cache_key(self.filtered, 'MAG_001', 'CAT_001', {"optimization_level": 3})
+        api.result_cache.put(key, {"planogram": {"planogram_info": {"planogram_id": "PLANO_OLD",
+                                                                    "date_creation": "2000-01-01T00:00:00"},
+                                                 "furniture": []},
+                                   "rows_processed": 3})
+
+        with mock.patch.object(api.generation_pool, 'pending', api.generation_pool.capacity):
+            # apply_temperature_constraints n'entre pas dans la clé : même entrée de cache
+            response = self.client.post("/planogram/generate", data={
+                "magasin_id": "MAG_001", "categorie_id": "CAT_001", "optimization_level": 3,
+                "apply_temperature_constraints": "false"
+            })
+
+        self.assertEqual(response.status_code, 200)
+        info = response.json()["planogram"]["planogram_info"]
+        self.assertNotEqual(info["planogram_id"], "PLANO_OLD")
+        self.assertNotEqual(info["date_creation"], "2000-01-01T00:00:00")
+        self.assertEqual(api.result_cache.stats()["hits"], 1)
+
+    def test_cache_key_computed_off_event_loop(self):
+        """Test : la clé de cache (hachage des lignes, chargement des modèles) n'est pas calculée sur la boucle"""
+        on_event_loop = []
+
+        def cache_key(*args):
+            try:
+                asyncio.get_running_loop()
+                on_event_loop.append(True)
+            except RuntimeError:
+                on_event_loop.append(False)
+            return "cle"
+
+        with mock.patch.object(api, 'planogram_cache_key', side_effect=cache_key), \
+                mock.patch.object(api.generation_pool, 'pending', api.generation_pool.capacity):
+            self.client.post("/planogram/generate", data={"magasin_id": "MAG_001", "categorie_id": "CAT_001"})
+
+        self.assertEqual(on_event_loop, [False])
+
+    def test_cache_miss_uses_pool(self):
+        """Test : un échec de cache passe par le pool (503 s'il est saturé)"""
+        with mock.patch.object(api.generation_pool, 'pending', api.generation_pool.capacity):
+            response = self.client.post("/planogram/generate", data={"magasin_id": "MAG_001",
+                                                                     "categorie_id": "CAT_001"})
+
+        self.assertEqual(response.status_code, 503)
+
+class TestGenerationPool(unittest.TestCase):
+    """Tests du pool de génération borné (refus 503 au-delà de sa capacité)"""
+
+    def setUp(self):
+        self.pool = api.GenerationPool(max_workers=1, queue_limit=1)
+        self.addCleanup(self.pool.executor.shutdown, wait=True)
+
+    def test_run_in_worker(self):
+        """Test : la fonction s'exécute dans un thread du pool et libère sa place"""
+        thread_name = asyncio.run(self.pool.run(lambda: threading.current_thread().name))
+
+        self.assertTrue(thread_name.startswith("planogram-generation"))
+        self.assertEqual(self.pool.stats()["pending"], 0)
+
+    def test_rejects_beyond_capacity(self):
+        """Test : pool et file pleins → 503 avec Retry-After ; les demandes admises aboutissent"""
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        async def scenario():
+            admitted = [asyncio.ensure_future(self.pool.run(release.wait, 5)) for _ in range(self.pool.capacity)]
+            await asyncio.sleep(0)
+            with self.assertRaises(HTTPException) as context:
+                await self.pool.run(release.wait, 5)
+            release.set()
+            return context.exception, await asyncio.gather(*admitted)
+
+        error, results = asyncio.run(scenario())
+
+        self.assertEqual(error.status_code, 503)
+        self.assertIn("Retry-After", error.headers)
+        self.assertEqual(results, [True, True])
+        self.assertEqual(self.pool.stats()["rejected"], 1)
+        self.assertEqual(self.pool.stats()["pending"], 0)
+
+class TestGroupIndex(unittest.TestCase):
+    """Tests de l'index des magasins et catégories du catalogue"""
+
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'input_magasin_id': ['MAG_001', 'MAG_001', 'MAG_002'],
+            'input_categorie_id': ['CAT_001', 'CAT_002', 'CAT_001'],
+            'input_zone_id': ['Z1', 'Z2', 'Z1'],
+            'input_surface_magasin': [400.0, 600.0, 300.0],
+            'input_prix_produit': [10.0, 20.0, 30.0]
+        })
+
+    def test_rebuild_aggregates(self):
+        """Test : effectifs, moyennes et zones par magasin et par catégorie"""
+        index = api.GroupIndex()
+        index.rebuild(self.data)
+
+        stores = {store['store_id']: store for store in index.view('stores')}
+        self.assertEqual(stores['MAG_001']['products_count'], 2)
+        self.assertEqual(stores['MAG_001']['avg_surface'], 500.0)
+        self.assertEqual(stores['MAG_001']['zones'], {'Z1': 1, 'Z2': 1})
+        categories = {category['category_id']: category for category in index.view('categories')}
+        self.assertEqual(categories['CAT_001']['avg_price'], 20.0)
+        self.assertEqual(index.rows_indexed, 3)
+
+    def test_rebuild_replaces_previous_catalog(self):
+        """Test : un rechargement remplace l'index (pas de double comptage)"""
+        index = api.GroupIndex()
+        index.rebuild(self.data)
+        index.rebuild(self.data)
+
+        stores = {store['store_id']: store for store in index.view('stores')}
+        self.assertEqual(stores['MAG_001']['products_count'], 2)
+        self.assertEqual(index.rows_indexed, 3)
+
+    def test_upload_does_not_change_index(self):
+        """Test : un CSV uploadé n'ajoute pas de magasin que /planogram/generate ne peut pas servir"""
+        api.group_index.rebuild(self.data)
+        self.addCleanup(api.group_index.rebuild, pd.DataFrame())
+        upload = pd.DataFrame({'input_magasin_id': ['MAG_999'], 'input_categorie_id': ['CAT_001']})
+
+        with mock.patch.object(api, 'build_planogram', return_value={"planogram": {}, "rows_processed": 1}):
+            api.build_planogram_from_upload(upload.to_csv(index=False).encode(), None, None)
+            api.build_planogram_from_upload(upload.to_csv(index=False).encode(), None, None)
+
+        store_ids = [store['store_id'] for store in api.group_index.view('stores')]
+        self.assertEqual(sorted(store_ids), ['MAG_001', 'MAG_002'])
+
+class TestJobManager(unittest.TestCase):
+    """Tests de la file de jobs : soumission, annulation, file pleine, reprise après redémarrage"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.manager = api.JobManager(self.temp_dir.name, max_workers=1, queue_limit=1)
+        self.addCleanup(self.manager.executor.shutdown, wait=True)
+
+    def wait_for(self, job_id: str, statuses=('completed', 'failed', 'cancelled'), timeout: float = 5.0):
+        """Attend que le job atteigne un des statuts donnés"""
+        return self.wait_for_manager(self.manager, job_id, statuses, timeout)
+
+    def wait_for_manager(self, manager, job_id: str, statuses=('completed', 'failed', 'cancelled'),
+                         timeout: float = 5.0):
+        """Attend que le job du gestionnaire donné atteigne un des statuts donnés"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = manager.get(job_id)
+            if job["status"] in statuses:
+                return job
+            time.sleep(0.01)
+        self.fail(f"Job {job_id} toujours {manager.get(job_id)['status']}")
+
+    def blocking_job(self):
+        """Job qui occupe le worker jusqu'à ce que release soit levé"""
+        started, release = threading.Event(), threading.Event()
+
+        def work(progress):
+            started.set()
+            release.wait(5)
+            progress("travail", 50)
+            return {"done": True}
+
+        self.addCleanup(release.set)
+        return work, started, release
+
+    def test_submit_completes_and_stores_result(self):
+        """Test : un job soumis se termine, son résultat et ses métadonnées sont sur disque"""
+        job = self.manager.submit("test", lambda value, progress: {"value": value}, 3)
+        self.assertEqual(job["status"], "queued")
+
+        finished = self.wait_for(job["job_id"])
+
+        self.assertEqual(finished["status"], "completed")
+        self.assertEqual(finished["progress"], 100)
+        self.assertEqual(self.manager.get_result(job["job_id"]), {"value": 3})
+        with open(self.manager._meta_path(job["job_id"]), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)["status"], "completed")
+
+    def test_failed_job(self):
+        """Test : une exception du job est rapportée dans son statut"""
+        def fail(progress):
+            raise ValueError("boom")
+
+        job = self.wait_for(self.manager.submit("test", fail)["job_id"])
+
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error"], "boom")
+
+    def test_cancel_queued_job(self):
+        """Test : un job en attente derrière un job en cours est annulé immédiatement"""
+        work, started, release = self.blocking_job()
+        running = self.manager.submit("test", work)
+        started.wait(5)
+        queued = self.manager.submit("test", lambda progress: {})
+
+        cancelled = self.manager.cancel(queued["job_id"])
+        release.set()
+
+        self.assertEqual(cancelled["status"], "cancelled")
+        self.assertEqual(self.wait_for(running["job_id"])["status"], "completed")
+        self.assertIsNone(self.manager.get_result(queued["job_id"]))
+
+    def test_cancel_before_future_stored(self):
+        """Test : une annulation arrivée avant l'enregistrement du future termine le job en 'cancelled'"""
+        with mock.patch.object(self.manager.executor, 'submit', return_value=mock.Mock()):
+            job = self.manager.submit("test", lambda progress: {})
+        self.manager._cancel_events[job["job_id"]].set()
+
+        self.manager._run(job["job_id"], lambda progress: {}, ())
+
+        self.assertEqual(self.manager.get(job["job_id"])["status"], "cancelled")
+        self.assertEqual(self.manager.active_count(), 0)
+
+    def test_cancel_running_job(self):
+        """Test : un job en cours s'arrête à sa prochaine étape"""
+        work, started, release = self.blocking_job()
+        job = self.manager.submit("test", work)
+        started.wait(5)
+
+        self.manager.cancel(job["job_id"])
+        release.set()
+
+        self.assertEqual(self.wait_for(job["job_id"])["status"], "cancelled")
+
+    def test_queue_full(self):
+        """Test : au-delà de max_workers + queue_limit jobs actifs, la soumission est refusée (503)"""
+        work, started, release = self.blocking_job()
+        self.manager.submit("test", work)
+        started.wait(5)
+        self.manager.submit("test", lambda progress: {})
+
+        with self.assertRaises(HTTPException) as context:
+            self.manager.submit("test", lambda progress: {})
+        self.assertEqual(context.exception.status_code, 503)
+
+    def test_recover_interrupted_jobs(self):
+        """Test : les jobs actifs d'une exécution précédente sont marqués en échec au démarrage"""
+        for job_id, status in (("a" * 32, "running"), ("b" * 32, "queued"), ("c" * 32, "completed")):
+            self.manager._write_json(self.manager._meta_path(job_id), {"job_id": job_id, "status": status})
+
+        restarted = api.JobManager(self.temp_dir.name, max_workers=1, queue_limit=1)
+        self.addCleanup(restarted.shutdown)
+
+        self.assertEqual(restarted.recover(), 2)
+        self.assertEqual(restarted.get("a" * 32)["status"], "failed")
+        self.assertEqual(restarted.get("b" * 32)["status"], "failed")
+        self.assertEqual(restarted.get("c" * 32)["status"], "completed")
+        self.assertEqual(restarted.recover(), 0)
+
+    def test_prune_keeps_most_recent_finished_jobs(self):
+        """Test : au-delà de max_finished, les jobs terminés les plus anciens quittent la mémoire et le disque"""
+        manager = api.JobManager(self.temp_dir.name, max_workers=1, queue_limit=1, max_finished=2)
+        self.addCleanup(manager.executor.shutdown, wait=True)
+        # Job d'une exécution précédente (disque uniquement), le plus ancien
+        manager._write_json(manager._meta_path("a" * 32), {"job_id": "a" * 32, "status": "completed",
+                                                           "finished_at": "2000-01-01T00:00:00"})
+        job_ids = []
+        for value in range(3):
+            job_ids.append(manager.submit("test", lambda value, progress: {"value": value}, value)["job_id"])
+            self.wait_for_manager(manager, job_ids[-1])
+
+        # La 3e soumission a déjà supprimé le job le plus ancien ; il reste un job en trop
+        self.assertEqual(manager.prune(), 1)
+
+        self.assertIsNone(manager.get("a" * 32))
+        self.assertIsNone(manager.get(job_ids[0]))
+        self.assertNotIn(job_ids[0], manager._jobs)
+        self.assertNotIn(job_ids[0], manager._cancel_events)
+        self.assertFalse(os.path.exists(manager._result_path(job_ids[0])))
+        self.assertEqual(manager.get_result(job_ids[2]), {"value": 2})
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)),
+                         sorted(f"{job_id}{suffix}" for job_id in job_ids[1:] for suffix in (".json", ".meta.json")))
+
+    def test_prune_expired_jobs_keeps_active(self):
+        """Test : les jobs terminés plus anciens que max_age sont supprimés, jamais les jobs actifs"""
+        manager = api.JobManager(self.temp_dir.name, max_workers=1, queue_limit=1, max_age=3600)
+        self.addCleanup(manager.executor.shutdown, wait=True)
+        for job_id, status, finished_at in (("a" * 32, "completed", "2000-01-01T00:00:00"),
+                                            ("b" * 32, "failed", datetime.now().isoformat()),
+                                            ("c" * 32, "running", None)):
+            manager._write_json(manager._meta_path(job_id), {"job_id": job_id, "status": status,
+                                                             "created_at": "2000-01-01T00:00:00",
+                                                             "finished_at": finished_at})
+
+        self.assertEqual(manager.prune(), 1)
+        self.assertIsNone(manager.get("a" * 32))
+        self.assertEqual(manager.get("b" * 32)["status"], "failed")
+        self.assertEqual(manager.get("c" * 32)["status"], "running")
+
+class TestDataStore(unittest.TestCase):
+    """Tests du catalogue en mémoire : sources, partitions, rechargement, données d'exemple"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.data = pd.DataFrame({
+            'input_produit_id': ['P1', 'P2', 'P3', 'P4'],
+            'input_magasin_id': [1, 1, 2, 2],
+            'input_categorie_id': ['Épicerie', 'Crèmerie', 'Épicerie', 'Épicerie'],
+            'input_prix_produit': [1.5, 2.5, 3.5, 4.5]
+        })
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.temp_dir.name, filename)
+
+    def test_load_csv_detects_separator_and_encoding(self):
+        """Test : CSV séparé par ';' et encodé en latin-1"""
+        path = self.path('catalog.csv')
+        self.data.to_csv(path, sep=';', index=False, encoding='latin-1')
+        store = api.DataStore(path, reload_interval=0)
+
+        self.assertTrue(store.load())
+
+        self.assertEqual(store.source, path)
+        self.assertEqual(len(store.data), 4)
+        self.assertEqual(set(store.data['input_categorie_id'].astype(str)), {'Épicerie', 'Crèmerie'})
+        self.assertEqual(str(store.data['input_magasin_id'].dtype), 'category')
+
+    def test_load_parquet_and_sqlite(self):
+        """Test : sources Parquet et SQLite (table configurée)"""
+        parquet_path = self.path('catalog.parquet')
+        self.data.to_parquet(parquet_path, index=False)
+        sqlite_path = self.path('catalog.db')
+        with sqlite3.connect(sqlite_path) as connection:
+            self.data.to_sql('planogram_data', connection, index=False)
+
+        for store in (api.DataStore(parquet_path, reload_interval=0),
+                      api.DataStore(sqlite_path, table='planogram_data', reload_interval=0)):
+            self.assertTrue(store.load())
+            self.assertEqual(len(store.data), 4)
+            self.assertEqual(store.stats()['partitions'], 3)
+
+    def test_filter_partitions(self):
+        """Test : filtre par couple, par magasin, par catégorie (identifiants numériques lus en texte)"""
+        path = self.path('catalog.csv')
+        self.data.to_csv(path, index=False)
+        store = api.DataStore(path, reload_interval=0)
+        store.load()
+
+        self.assertEqual(store.filter('1', 'Épicerie')['input_produit_id'].tolist(), ['P1'])
+        self.assertEqual(store.filter('2', None)['input_produit_id'].tolist(), ['P3', 'P4'])
+        self.assertEqual(store.filter(None, 'Épicerie')['input_produit_id'].tolist(), ['P1', 'P3', 'P4'])
+        self.assertEqual(len(store.filter(None, None)), 4)
+        self.assertTrue(store.filter('9', None).empty)
+
+    def test_reload_after_modification(self):
+        """Test : le thread de fond recharge la source modifiée et notifie on_reload"""
+        path = self.path('catalog.csv')
+        self.data.to_csv(path, index=False)
+        reloaded = []
+        store = api.DataStore(path, reload_interval=0.05, on_reload=reloaded.append)
+        store.load()
+        store.start_watching()
+        self.addCleanup(store.stop_watching)
+
+        self.data.iloc[:2].to_csv(path, index=False)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        deadline = time.monotonic() + 5
+        while len(store.data) != 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        self.assertEqual(len(store.data), 2)
+        self.assertEqual(len(reloaded), 2)
+
+    def test_unreadable_source_keeps_snapshot(self):
+        """Test : une source devenue illisible ne remplace pas les données servies"""
+        path = self.path('catalog.csv')
+        self.data.to_csv(path, index=False)
+        store = api.DataStore(path, reload_interval=0)
+        store.load()
+
+        os.remove(path)
+
+        self.assertFalse(store.load())
+        self.assertEqual(len(store.data), 4)
+        self.assertEqual(store.source, path)
+
+    def test_sample_data_fallback(self):
+        """Test : sans source lisible au premier chargement, les données d'exemple sont servies"""
+        store = api.DataStore(self.path('missing.csv'), reload_interval=0)
+
+        self.assertTrue(store.load())
+
+        self.assertEqual(store.source, "sample")
+        self.assertFalse(store.data.empty)
+        self.assertFalse(store.filter('MAG_001', None).empty)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
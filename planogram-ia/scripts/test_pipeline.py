@@ -3,17 +3,37 @@ import os
 sys.path.append('..')
 
 import unittest
+import json
+import time
 import pandas as pd
 import numpy as np
 from main_pipeline import (
-    DataProcessor, 
+    AISLE_CLEARANCE,
+    allocate_zone_space,
+    DataProcessor,
+    DatasetCache,
     FurnitureTypePredictor, 
     FurnitureDimensionPredictor,
+    FURNITURE_SPECS,
     PositionPredictor,
     ConstraintManager,
     PlanogramModels,
-    PlanogramAIPipeline
+    PlanogramAIPipeline,
+    PipelineRegistry,
+    ResultCache,
+    build_shelf_bins,
+    fit_estimators,
+    optimize_shelf_assignment,
+    pack_shelves,
+    size_fixtures,
+    resolve_optimization_level,
+    solve_placement,
+    resolve_n_jobs,
+    serialize_json
 )
+import main_pipeline
+from unittest import mock
+from sklearn.ensemble import RandomForestRegressor
 
 class TestDataProcessor(unittest.TestCase):
     """Tests pour le processeur de données"""
@@ -48,6 +68,36 @@ class TestDataProcessor(unittest.TestCase):
         self.assertEqual(len(data), 3)
         self.assertIn('input_produit_id', data.columns)
     
+    def test_load_data_chunks(self):
+        """Test de la lecture par blocs avec schéma de types explicite"""
+        chunks = list(self.processor.load_data_chunks(chunksize=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertEqual(str(chunks[0]['input_categorie_id'].dtype), 'category')
+        self.assertEqual(chunks[0]['input_longueur_produit'].dtype, np.float32)
+
+    def test_iter_preprocessed_chunks(self):
+        """Test du prétraitement bloc par bloc avec encodeurs partagés"""
+        chunks = list(self.processor.iter_preprocessed_chunks(chunksize=2, columns=[
+            'input_categorie_id', 'input_longueur_produit', 'input_largeur_produit']))
+        processed = pd.concat([processed_chunk for _, processed_chunk in chunks])
+
+        self.assertEqual([len(raw_chunk) for raw_chunk, _ in chunks], [2, 1])
+        self.assertEqual(len(processed), 3)
+        self.assertEqual(list(processed['input_categorie_id']), [0, 1, 0])
+        self.assertIn('surface_produit', processed.columns)
+        self.assertNotIn('input_prix_produit', processed.columns)
+
+    def test_chunked_preprocessing_matches_full(self):
+        """Test : avec encodeurs et médianes appris, le prétraitement par blocs égale le prétraitement complet"""
+        data = self.test_data.assign(input_prix_produit=[10.5, np.nan, 8.5], input_longueur_produit=[20.0, 25.0, np.nan])
+        data.to_csv(self.test_file, index=False)
+        full = self.processor.preprocess_data(pd.read_csv(self.test_file))
+
+        self.assertEqual(full['input_prix_produit'].tolist(), [10.5, 9.5, 8.5])
+        for chunksize in (1, 2):
+            chunked = pd.concat([processed for _, processed in self.processor.iter_preprocessed_chunks(chunksize)])
+            pd.testing.assert_frame_equal(chunked.reset_index(drop=True), full, check_dtype=False)
+
     def test_preprocess_data(self):
         """Test du prétraitement"""
         processed = self.processor.preprocess_data(self.test_data)
@@ -57,6 +107,65 @@ class TestDataProcessor(unittest.TestCase):
         if 'surface_produit' in processed.columns:
             self.assertTrue(processed['surface_produit'].notna().all())
 
+@unittest.skipUnless(DatasetCache.is_available(), "pyarrow non installé")
+class TestDatasetCache(unittest.TestCase):
+    """Tests pour le cache Parquet des données prétraitées"""
+
+    def setUp(self):
+        self.test_file = 'test_cache_data.csv'
+        self.cache_dir = 'test_cache'
+        pd.DataFrame({
+            'input_produit_id': ['PROD_001', 'PROD_002', 'PROD_003'],
+            'input_longueur_produit': [20.0, 25.0, 15.0],
+            'input_largeur_produit': [10.0, 12.0, 8.0],
+            'input_categorie_id': ['CAT_001', 'CAT_002', 'CAT_001']
+        }).to_csv(self.test_file, index=False)
+
+    def tearDown(self):
+        if os.path.exists(self.test_file):
+            os.remove(self.test_file)
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, name))
+            os.rmdir(self.cache_dir)
+
+    def test_warm_start_skips_csv(self):
+        """Test du démarrage à chaud depuis le cache"""
+        cold = PlanogramAIPipeline(self.test_file, cache_dir=self.cache_dir)
+        self.assertTrue(cold.load_and_preprocess_data())
+
+        warm = PlanogramAIPipeline(self.test_file, cache_dir=self.cache_dir)
+        warm.data_processor.load_data = lambda: self.fail("Le CSV ne doit pas être relu")
+        self.assertTrue(warm.load_and_preprocess_data())
+
+        pd.testing.assert_frame_equal(warm.processed_data, cold.processed_data)
+        self.assertEqual(set(warm.data_processor.label_encoders), set(cold.data_processor.label_encoders))
+
+    def test_invalidation_on_source_change(self):
+        """Test de l'invalidation quand le CSV source change"""
+        cache = DatasetCache(self.cache_dir)
+        data = pd.read_csv(self.test_file)
+        cache.save(self.test_file, 'raw', data)
+        self.assertIsNotNone(cache.load(self.test_file, 'raw'))
+
+        data.head(2).to_csv(self.test_file, index=False)
+        self.assertIsNone(cache.load(self.test_file, 'raw'))
+
+        cache.save(self.test_file, 'raw', data.head(2))
+        self.assertEqual(len([name for name in os.listdir(self.cache_dir) if name.endswith('.parquet')]), 1)
+
+    def test_content_hashed_only_on_signature_change(self):
+        """Test : un chargement à chaud (nouvelle instance) ne relit pas le CSV tant que mtime et taille sont inchangés"""
+        DatasetCache(self.cache_dir).save(self.test_file, 'dashboard', pd.read_csv(self.test_file))
+
+        with mock.patch.object(DatasetCache, '_content_hash', side_effect=AssertionError("CSV re-hashé")):
+            self.assertIsNotNone(DatasetCache(self.cache_dir).load(self.test_file, 'dashboard'))
+
+        pd.read_csv(self.test_file).head(2).to_csv(self.test_file, index=False)
+        with mock.patch.object(DatasetCache, '_content_hash', wraps=DatasetCache._content_hash) as content_hash:
+            self.assertIsNone(DatasetCache(self.cache_dir).load(self.test_file, 'dashboard'))
+        content_hash.assert_called_once()
+
 class TestFurnitureTypePredictor(unittest.TestCase):
     """Tests pour le prédicteur de types de meubles"""
     
@@ -76,6 +185,21 @@ class TestFurnitureTypePredictor(unittest.TestCase):
         self.assertEqual(len(labels), len(self.X_test))
         self.assertTrue(all(1 <= label <= 12 for label in labels))
     
+    def test_generate_labels_rules(self):
+        """Test des règles métier vectorisées et de la reproductibilité"""
+        X = pd.DataFrame({
+            'input_contrainte_temperature_produit': [1, 0, 0, 0, 1, 0],
+            'input_categorie_id': [4, 4, 3, 5, 3, 12]
+        })
+        labels = self.predictor._generate_furniture_type_labels(X)
+
+        self.assertIn(labels[0], [9, 10])
+        self.assertIn(labels[4], [9, 10])
+        self.assertEqual(list(labels[[1, 2, 3, 5]]), [4, 2, 1, 4])
+
+        same_seed = FurnitureTypePredictor(random_state=42)._generate_furniture_type_labels(X)
+        self.assertEqual(list(labels), list(same_seed))
+
     def test_train_and_predict(self):
         """Test d'entraînement et prédiction"""
         self.predictor.train(self.X_test)
@@ -84,6 +208,357 @@ class TestFurnitureTypePredictor(unittest.TestCase):
         self.assertEqual(len(predictions), len(self.X_test))
         self.assertTrue(all(1 <= pred <= 12 for pred in predictions))
 
+class TestFurnitureDimensionPredictor(unittest.TestCase):
+    """Tests pour le prédicteur de dimensions"""
+
+    def setUp(self):
+        self.predictor = FurnitureDimensionPredictor()
+
+    def test_generate_dimension_targets(self):
+        """Test des targets vectorisées selon le nombre de faces"""
+        furniture_types = np.array([1, 2, 3, 99])
+        X = pd.DataFrame({'feature1': range(len(furniture_types))})
+        targets = self.predictor._generate_dimension_targets(X, furniture_types)
+
+        self.assertEqual(len(targets), 9)
+        for target in targets.values():
+            self.assertEqual(len(target), len(furniture_types))
+
+        # 1 face (et type inconnu → planogram) : unique_face uniquement
+        for i in [0, 3]:
+            self.assertGreaterEqual(targets['nb_etageres_unique_face'][i], 1)
+            self.assertEqual(targets['nb_etageres_front_back'][i], 0)
+            self.assertEqual(targets['nb_colonnes_left_right'][i], 0)
+
+        # 2 faces : front_back uniquement ; 4 faces : front_back et left_right
+        self.assertEqual(targets['nb_colonnes_unique_face'][1], 0)
+        self.assertGreaterEqual(targets['nb_colonnes_front_back'][1], 1)
+        self.assertEqual(targets['nb_etageres_left_right'][1], 0)
+        self.assertGreaterEqual(targets['nb_etageres_left_right'][2], 1)
+
+        # Dimensions autour des spécifications (bruit de 10 %)
+        base_width = FURNITURE_SPECS[2]['largeur']
+        self.assertLess(abs(targets['largeur'][1] - base_width), base_width * 0.5)
+
+    def test_multi_output_mode(self):
+        """Test du mode multi-sorties (2 modèles, une passe de prédiction)"""
+        X = pd.DataFrame({'feature1': np.arange(40), 'feature2': np.arange(40) % 3})
+        furniture_types = np.array([1, 2, 3, 9] * 10)
+
+        predictor = FurnitureDimensionPredictor(multi_output=True)
+        predictor.train(X, furniture_types)
+        predictions = predictor.predict(X, furniture_types)
+
+        self.assertTrue(all(model is None for model in predictor.models.values()))
+        self.assertEqual(set(predictions), set(predictor.models))
+        for values in predictions.values():
+            self.assertEqual(len(values), len(X))
+
+        restored = FurnitureDimensionPredictor()
+        restored.set_state(predictor.get_state())
+        np.testing.assert_array_equal(restored.predict(X, furniture_types)['largeur'], predictions['largeur'])
+
+class TestPlacementEngine(unittest.TestCase):
+    """Tests du moteur de placement des facings sur les étagères"""
+
+    def test_pack_shelves_first_fit_decreasing(self):
+        """Test : rangement sans débordement, étagère souhaitée respectée, produits trop hauts non placés"""
+        bins = {'largeur': np.array([100.0]), 'etageres': np.array([2]), 'hauteur_etagere': np.array([40.0]),
+                'profondeur': np.array([40.0]), 'colonnes': np.array([4])}
+        items = {
+            'bin': np.zeros(4, dtype=int),
+            'largeur': np.array([20.0, 30.0, 25.0, 10.0]),
+            'hauteur': np.array([30.0, 35.0, 20.0, 50.0]),
+            'profondeur': np.full(4, 20.0),
+            'quantite': np.array([3, 2, 4, 1]),
+            'etagere': np.array([1, 1, 2, 1])
+        }
+
+        placement = pack_shelves(items, bins)
+
+        # Le plus haut prend le début de l'étagère 1, le suivant n'y tient plus → étagère 2 ;
+        # le dernier ne tient entier nulle part → facings réduits sur l'étagère la plus libre
+        np.testing.assert_array_equal(placement['etagere'][:3], [2, 1, 1])
+        np.testing.assert_array_equal(placement['quantite'], [3, 2, 1, 0])
+        np.testing.assert_array_equal(placement['colonne'][:3], [1, 1, 3])
+        np.testing.assert_array_equal(placement['placed'], [True, True, True, False])
+
+    def test_optimization_levels(self):
+        """Test : niveau 1 glouton sans recherche, niveau 3 jamais moins rempli que le glouton trié"""
+        rng = np.random.default_rng(0)
+        n_items = 400
+        bins = {'largeur': np.full(20, 100.0), 'etageres': np.full(20, 3), 'hauteur_etagere': np.full(20, 40.0),
+                'profondeur': np.full(20, 40.0), 'colonnes': np.full(20, 4)}
+        items = {'bin': rng.integers(0, 20, n_items), 'largeur': rng.uniform(5, 30, n_items),
+                 'hauteur': rng.uniform(10, 35, n_items), 'profondeur': np.full(n_items, 20.0),
+                 'quantite': rng.integers(1, 6, n_items)}
+
+        _, greedy = solve_placement(items, bins, optimization_level=1)
+        _, sorted_greedy = solve_placement(items, bins, optimization_level=2)
+        _, local_search = solve_placement(items, bins, optimization_level=3)
+
+        self.assertEqual(greedy['solver'], 'greedy')
+        self.assertEqual(greedy['iterations'], 0)
+        self.assertEqual(local_search['solver'], 'local_search')
+        self.assertGreater(local_search['iterations'], 0)
+        self.assertGreaterEqual(local_search['fill_rate'], sorted_greedy['fill_rate'])
+        self.assertLess(local_search['elapsed'], local_search['time_budget'] + 1.0)
+        self.assertEqual(resolve_optimization_level(9), 5)
+        self.assertEqual(resolve_optimization_level(None), 3)
+
+    def test_fill_rate_non_decreasing_with_level(self):
+        """Test : sur les mêmes produits, le remplissage ne baisse pas du niveau 1 au niveau 5"""
+        rng = np.random.default_rng(1)
+        n_items = 300
+        bins = {'largeur': np.full(15, 100.0), 'etageres': np.full(15, 4), 'hauteur_etagere': np.full(15, 40.0),
+                'profondeur': np.full(15, 40.0), 'colonnes': np.full(15, 4)}
+        items = {'bin': rng.integers(0, 15, n_items), 'largeur': rng.uniform(5, 30, n_items),
+                 'hauteur': rng.uniform(10, 35, n_items), 'profondeur': np.full(n_items, 20.0),
+                 'quantite': rng.integers(1, 6, n_items), 'etagere': rng.integers(1, 5, n_items),
+                 'priorite': rng.uniform(0, 1, n_items), 'niveau_oeil': rng.random(n_items) < 0.2,
+                 'tete_gondole': rng.random(n_items) < 0.1}
+
+        # Horloge simulée : chaque lecture avance d'1 ms, les budgets deviennent des nombres d'itérations fixes
+        fill_rates = []
+        for level in (1, 2, 3, 4, 5):
+            clock = iter(np.arange(1e6) * 1e-3)
+            with mock.patch('main_pipeline.time.perf_counter', side_effect=lambda: next(clock)):
+                fill_rates.append(solve_placement(items, bins, optimization_level=level)[1]['fill_rate'])
+
+        self.assertEqual(fill_rates, sorted(fill_rates))
+
+    def test_refine_skipped_without_improvement(self):
+        """Test : au niveau 5, l'affectation des étagères n'est pas relancée si le rangement n'a pas changé"""
+        bins = {'largeur': np.array([100.0]), 'etageres': np.array([4]), 'hauteur_etagere': np.array([40.0]),
+                'profondeur': np.array([40.0]), 'colonnes': np.array([4])}
+        items = {'bin': np.zeros(3, dtype=int), 'largeur': np.array([20.0, 20.0, 20.0]), 'hauteur': np.full(3, 30.0),
+                 'profondeur': np.full(3, 20.0), 'quantite': np.array([2, 2, 2]), 'etagere': np.array([1, 1, 2]),
+                 'priorite': np.array([0.0, 1.0, 0.0])}
+
+        placement, info = solve_placement(items, bins, optimization_level=5)
+
+        self.assertEqual(info['refines'], 1)
+        self.assertEqual(info['iterations'], 0)
+        self.assertEqual(placement['etagere'][1], 3)
+
+    def test_anytime_shelf_assignment(self):
+        """Test : l'optimiseur remonte les exigences niveau_oeil et les priorités vers l'étagère 3, sans débordement"""
+        bins = {'largeur': np.array([100.0]), 'etageres': np.array([4]), 'hauteur_etagere': np.array([40.0]),
+                'profondeur': np.array([40.0]), 'colonnes': np.array([4])}
+        items = {
+            'bin': np.zeros(3, dtype=int),
+            'largeur': np.array([20.0, 20.0, 20.0]),
+            'hauteur': np.full(3, 30.0),
+            'profondeur': np.full(3, 20.0),
+            'quantite': np.array([2, 2, 2]),
+            'etagere': np.array([1, 1, 2]),
+            'priorite': np.array([0.0, 1.0, 0.0]),
+            'niveau_oeil': np.array([True, False, False]),
+            'tete_gondole': np.array([False, False, True])
+        }
+        placement = pack_shelves(items, bins)
+
+        stats = optimize_shelf_assignment(items, bins, placement, time_budget=0.2)
+
+        self.assertGreater(stats['moves'], 1000)
+        self.assertGreater(stats['score'], stats['score_initial'])
+        self.assertIn(placement['etagere'][0], (3, 4))
+        self.assertEqual(placement['etagere'][1], 3)
+        np.testing.assert_array_equal(placement['quantite'], [2, 2, 2])
+        self.assertEqual(placement['colonne'][2], 1)
+        for shelf in range(1, 5):
+            on_shelf = placement['etagere'] == shelf
+            self.assertLessEqual((items['largeur'] * placement['quantite'])[on_shelf].sum(), 100.0)
+
+    def test_anytime_stops_early_on_small_groups(self):
+        """Test : un petit groupe rend la main bien avant le budget demandé (plafond par produit, stagnation)"""
+        rng = np.random.default_rng(0)
+        bins = {'largeur': np.full(2, 100.0), 'etageres': np.full(2, 4), 'hauteur_etagere': np.full(2, 40.0),
+                'profondeur': np.full(2, 40.0), 'colonnes': np.full(2, 4)}
+        items = {'bin': rng.integers(0, 2, 20), 'largeur': rng.uniform(5, 30, 20), 'hauteur': np.full(20, 30.0),
+                 'profondeur': np.full(20, 20.0), 'quantite': rng.integers(1, 6, 20), 'priorite': rng.uniform(0, 1, 20)}
+        placement = pack_shelves(items, bins)
+
+        start = time.perf_counter()
+        stats = optimize_shelf_assignment(items, bins, placement, time_budget=5.0)
+
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertGreaterEqual(stats['score'], stats['score_initial'])
+
+        # Sans plafond de temps effectif, l'arrêt vient de la stagnation
+        with mock.patch('main_pipeline.ANYTIME_SECONDS_PER_PRODUCT', 1.0):
+            stats = optimize_shelf_assignment(items, bins, pack_shelves(items, bins), time_budget=5.0)
+        self.assertTrue(stats['converged'])
+
+    def test_size_fixtures(self):
+        """Test du dimensionnement : unités partagées par groupe, capacité respectée, tous les produits placés"""
+        rng = np.random.default_rng(0)
+        n_rows = 300
+        data = pd.DataFrame({
+            'input_magasin_id': rng.choice(['MAG_001', 'MAG_002'], n_rows),
+            'input_categorie_id': rng.choice(['CAT_001', 'CAT_002', 'CAT_003'], n_rows),
+            'input_largeur_produit': rng.uniform(5, 20, n_rows),
+            'input_hauteur_produit': rng.uniform(10, 30, n_rows),
+            'input_longueur_produit': rng.uniform(8, 25, n_rows)
+        })
+        furniture_types = rng.choice([1, 2], n_rows)
+        dimensions = {'largeur': np.full(n_rows, 120.0), 'hauteur': np.full(n_rows, 180.0),
+                      'profondeur': np.full(n_rows, 60.0), 'nb_etageres_unique_face': np.full(n_rows, 4),
+                      'nb_etageres_front_back': np.full(n_rows, 4)}
+        positions = {'face': np.full(n_rows, 'front'), 'quantite': rng.integers(1, 5, n_rows),
+                     'etagere': rng.integers(1, 5, n_rows)}
+
+        fixtures = size_fixtures(data, furniture_types, dimensions, positions)
+
+        units = fixtures['unit']
+        n_units = len(fixtures['furniture_type'])
+        self.assertLess(n_units, n_rows // 4)
+        np.testing.assert_array_equal(fixtures['furniture_type'][units], furniture_types)
+        # Une unité ne mélange ni les magasins ni les catégories
+        groups = data.groupby(units)[['input_magasin_id', 'input_categorie_id']].nunique()
+        self.assertTrue((groups == 1).all().all())
+        # Numérotation par première apparition des unités
+        first_rows = np.unique(units, return_index=True)[1]
+        self.assertTrue((np.diff(first_rows) > 0).all())
+
+        bin_index, bins = build_shelf_bins(fixtures['furniture_type'][units],
+                                           {field: values[units] for field, values in fixtures['dimensions'].items()},
+                                           positions['face'], units)
+        placement = pack_shelves({'bin': bin_index, 'largeur': data['input_largeur_produit'].to_numpy(),
+                                  'hauteur': data['input_hauteur_produit'].to_numpy(),
+                                  'profondeur': data['input_longueur_produit'].to_numpy(),
+                                  'quantite': positions['quantite'], 'etagere': positions['etagere']}, bins)
+        self.assertTrue(placement['placed'].all())
+
+    def test_allocate_zone_space(self):
+        """Test de l'implantation : meubles dans leur zone, sans chevauchement ni allée obstruée"""
+        rng = np.random.default_rng(0)
+        n_units = 400
+        zone_of_unit = rng.choice(['Z1', 'Z2'], n_units)
+        data = pd.DataFrame({
+            'input_magasin_id': 'MAG_001',
+            'input_zone_id': zone_of_unit,
+            'input_longueur_zone': np.where(zone_of_unit == 'Z1', 60.0, 25.0),
+            'input_largeur_zone': np.where(zone_of_unit == 'Z1', 40.0, 12.0),
+            'input_hauteur_zone': 3.0,
+            'input_longueur_magasin': 50.0,
+            'input_largeur_magasin': 30.0
+        })
+        furniture_types = rng.choice([1, 2, 3], n_units)
+        fixtures = {'furniture_type': furniture_types,
+                    'dimensions': {'largeur': rng.uniform(60, 300, n_units),
+                                   'hauteur': np.where(np.arange(n_units) == 0, 400.0, 180.0),
+                                   'profondeur': rng.uniform(30, 80, n_units)}}
+
+        start_time = time.perf_counter()
+        layout = allocate_zone_space(data, np.arange(n_units), fixtures)
+        self.assertLess(time.perf_counter() - start_time, 5.0)
+
+        placed = layout['placed']
+        self.assertFalse(placed[0])  # plus haut que la zone
+        self.assertGreater(placed.sum(), n_units // 2)
+        np.testing.assert_array_equal(layout['zone_id'], zone_of_unit)
+
+        # Emprises (rotation comprise) dans la zone bornée par le magasin, allée d'au moins un
+        # dégagement entre deux meubles d'une même zone
+        rotated = layout['rotation'] == 90
+        size_x = np.where(rotated, fixtures['dimensions']['profondeur'], fixtures['dimensions']['largeur'])
+        size_y = np.where(rotated, fixtures['dimensions']['largeur'], fixtures['dimensions']['profondeur'])
+        x0, y0 = layout['x'][placed], layout['y'][placed]
+        x1, y1 = x0 + size_x[placed], y0 + size_y[placed]
+        self.assertTrue((x0 >= 0).all() and (y0 >= 0).all())
+        self.assertTrue((x1 <= np.where(zone_of_unit[placed] == 'Z1', 5000, 2500) + 0.1).all())
+        self.assertTrue((y1 <= np.where(zone_of_unit[placed] == 'Z1', 3000, 1200) + 0.1).all())
+        zones = zone_of_unit[placed]
+
+        def intersections(ax0, ay0, ax1, ay1):
+            """Rectangles A qui chevauchent une emprise de meuble de la même zone"""
+            hits = (np.minimum(ax1[:, None], x1[None, :]) - np.maximum(ax0[:, None], x0[None, :]) > 0.1) & \
+                (np.minimum(ay1[:, None], y1[None, :]) - np.maximum(ay0[:, None], y0[None, :]) > 0.1) & \
+                (zones[:, None] == zones[None, :])
+            np.fill_diagonal(hits, False)
+            return hits.any(axis=1)
+
+        self.assertFalse(intersections(x0, y0, x1, y1).any())
+        # Allée complète devant chaque face accessible (avant : y croissant, x croissant si tourné ;
+        # arrière pour 2 faces ; côtés pour 4 faces) : dans la zone et libre de toute autre emprise
+        faces = np.array([FURNITURE_SPECS[furniture_type]['faces'] for furniture_type in furniture_types])[placed]
+        turned = rotated[placed]
+        clear = AISLE_CLEARANCE
+        length = np.where(zones == 'Z1', 5000, 2500)
+        width = np.where(zones == 'Z1', 3000, 1200)
+        strips = {
+            '+x': (x1, y0, x1 + clear, y1), '-x': (x0 - clear, y0, x0, y1),
+            '+y': (x0, y1, x1, y1 + clear), '-y': (x0, y0 - clear, x1, y0)
+        }
+        # Direction de chaque face, meuble droit puis tourné de 90°
+        directions = {'front': ('+y', '+x'), 'back': ('-y', '-x'), 'left': ('-x', '+y'), 'right': ('+x', '-y')}
+        for face, accessible in (('front', faces >= 1), ('back', faces >= 2), ('left', faces == 4),
+                                 ('right', faces == 4)):
+            straight, rotated_direction = directions[face]
+            sx0, sy0, sx1, sy1 = (np.where(turned, turned_value, straight_value) for straight_value, turned_value
+                                  in zip(strips[straight], strips[rotated_direction]))
+            self.assertTrue((sx0[accessible] >= -0.1).all() and (sy0[accessible] >= -0.1).all(), face)
+            self.assertTrue((sx1[accessible] <= length[accessible] + 0.1).all(), face)
+            self.assertTrue((sy1[accessible] <= width[accessible] + 0.1).all(), face)
+            self.assertFalse(intersections(sx0, sy0, sx1, sy1)[accessible].any(), face)
+
+    def test_shelf_bins_per_face(self):
+        """Test : une gondole double face donne un bac par face, avec ses propres étagères"""
+        dimensions = {'largeur': np.array([150.0, 150.0]), 'hauteur': np.array([200.0, 200.0]),
+                      'profondeur': np.array([45.0, 45.0]), 'nb_etageres_front_back': np.array([5, 5])}
+        bin_index, bins = build_shelf_bins(np.array([2, 2]), dimensions, np.array(['front', 'back']),
+                                           units=np.array([0, 0]))
+
+        self.assertEqual(len(bins['largeur']), 2)
+        self.assertNotEqual(bin_index[0], bin_index[1])
+        np.testing.assert_allclose(bins['hauteur_etagere'], [40.0, 40.0])
+        np.testing.assert_allclose(bins['profondeur'], [22.5, 22.5])
+
+
+class TestParallelTraining(unittest.TestCase):
+    """Tests de l'entraînement parallèle des modèles indépendants"""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = pd.DataFrame(rng.normal(size=(60, 3)), columns=['f1', 'f2', 'f3'])
+        self.targets = {name: rng.normal(size=60) for name in ['a', 'b', 'c']}
+
+    def _tasks(self):
+        return [(name, RandomForestRegressor(n_estimators=5, random_state=42), self.X, y)
+                for name, y in self.targets.items()]
+
+    def test_resolve_n_jobs(self):
+        """Test du budget de cœurs (borné par le nombre de cœurs disponibles)"""
+        with mock.patch('main_pipeline.os.cpu_count', return_value=4):
+            self.assertEqual(resolve_n_jobs(None), 1)
+            self.assertEqual(resolve_n_jobs(-1), 4)
+            self.assertEqual(resolve_n_jobs(-2), 3)
+            self.assertEqual(resolve_n_jobs(16), 4)
+
+    def test_parallel_matches_sequential(self):
+        """Test : mêmes modèles en parallèle qu'en séquentiel, sans sur-souscription"""
+        sequential, _ = fit_estimators(self._tasks(), n_jobs=1)
+        with mock.patch('main_pipeline.os.cpu_count', return_value=4):
+            parallel, timings = fit_estimators(self._tasks(), n_jobs=4)
+
+        self.assertEqual(set(timings), set(self.targets))
+        for name in self.targets:
+            # 3 workers pour 4 cœurs → 1 thread par estimateur
+            self.assertEqual(parallel[name].n_jobs, 1)
+            np.testing.assert_allclose(parallel[name].predict(self.X), sequential[name].predict(self.X))
+
+    def test_training_times_reported(self):
+        """Test du temps d'entraînement par modèle"""
+        data = pd.DataFrame({'input_feature1': np.arange(50), 'input_feature2': np.arange(50) % 7})
+        models = PlanogramModels(n_jobs=2)
+        models.train_models(data)
+
+        self.assertIn('type', models.training_times)
+        self.assertIn('dimension.largeur', models.training_times)
+        self.assertIn('position.face', models.training_times)
+        self.assertTrue(all(seconds >= 0 for seconds in models.training_times.values()))
+
 class TestConstraintManager(unittest.TestCase):
     """Tests pour le gestionnaire de contraintes"""
     
@@ -132,6 +607,152 @@ class TestConstraintManager(unittest.TestCase):
             max_faces = self.constraint_manager.furniture_constraints.get(furniture_type, {}).get('max_faces', 1)
             self.assertLessEqual(face, max_faces)
 
+class TestVectorizedConstraints(unittest.TestCase):
+    """Tests pour l'application vectorisée des contraintes"""
+
+    def setUp(self):
+        self.constraint_manager = ConstraintManager()
+        self.original_data = pd.DataFrame({
+            'input_contrainte_temperature_produit': [1, 0, 0, 0],
+            'input_contrainte_conditionnement_produit': ['aucun', 'fragile', 'liquide', 'aucun'],
+            'input_type_contrainte_legal': ['aucune', 'aucune', 'age', 'licence'],
+            'input_priorite_merchandising': [5, 9, 5, 2],
+            'input_surface_magasin': [500, 250, 900, 500]
+        })
+        self.predictions = {
+            'furniture_type': np.array([1, 1, 1, 2]),
+            'dimensions': {
+                'largeur': np.array([120.0, 120.0, 120.0, 500.0]),
+                'hauteur': np.array([180.0, 190.0, 180.0, 180.0]),
+                'profondeur': np.array([40.0, 40.0, 40.0, 40.0])
+            },
+            'positions': {
+                'face': np.array(['back', 'front', 'left', 'front']),
+                'etagere': np.array([1, 1, 3, 1]),
+                'colonne': np.array([5, 5, 5, 5]),
+                'quantite': np.array([7, 7, 7, 1])
+            }
+        }
+
+    def test_rules_applied_per_row(self):
+        """Test des règles évaluées en masques sur tout le lot"""
+        constrained = self.constraint_manager.apply_constraints(self.predictions, self.original_data)
+        positions = constrained['positions']
+
+        # Température : produit froid → réfrigérateur
+        np.testing.assert_array_equal(constrained['furniture_type'], [9, 1, 1, 2])
+        # Faces invalides ramenées sur 'front', licence → 'back' sur une gondole
+        np.testing.assert_array_equal(positions['face'], ['front', 'front', 'front', 'back'])
+        # Fragile → quantité ≤ 3, haute priorité → quantité ≥ 5
+        np.testing.assert_array_equal(positions['quantite'], [7, 5, 7, 1])
+        # Liquide → étagère ≤ 2 puis âge → étagère ≥ 4, basse priorité → étagère ≥ 4
+        np.testing.assert_array_equal(positions['etagere'], [1, 3, 4, 4])
+        # Surface : petit magasin compact, grand magasin imposant, largeur bornée à 400
+        np.testing.assert_array_equal(constrained['dimensions']['largeur'], [120.0, 100.0, 150.0, 400.0])
+        np.testing.assert_array_equal(constrained['dimensions']['hauteur'], [180.0, 180.0, 200.0, 180.0])
+
+    def test_constraint_summary(self):
+        """Test des compteurs de modifications par règle"""
+        self.constraint_manager.apply_constraints(self.predictions, self.original_data)
+        summary = self.constraint_manager.constraint_summary
+
+        self.assertEqual(summary['temperature'], 1)
+        self.assertEqual(summary['faces'], 2)
+        self.assertEqual(summary['dimensions'], 1)
+        self.assertEqual(summary['packaging'], 2)
+        self.assertEqual(summary['legal'], 2)
+        self.assertEqual(summary['merchandising'], 2)
+        self.assertEqual(summary['store_surface'], 2)
+        self.assertNotIn('supplier', summary)
+
+    def test_compliant_rows_not_counted(self):
+        """Test : une ligne visée par une règle mais déjà conforme n'est pas comptée"""
+        self.predictions['furniture_type'][0] = 9
+        self.predictions['dimensions']['largeur'][3] = 400.0
+
+        constrained = self.constraint_manager.apply_constraints(self.predictions, self.original_data)
+        summary = self.constraint_manager.constraint_summary
+
+        self.assertEqual(constrained['furniture_type'][0], 9)
+        self.assertEqual(summary['temperature'], 0)
+        self.assertEqual(summary['dimensions'], 0)
+
+    def test_numeric_face_codes(self):
+        """Test : faces codées 1-4 contrôlées comme les noms, codes conservés en sortie"""
+        self.predictions['positions']['face'] = np.array([2, 1, 3, 1])
+
+        constrained = self.constraint_manager.apply_constraints(self.predictions, self.original_data)
+
+        np.testing.assert_array_equal(constrained['positions']['face'], [1, 1, 1, 2])
+        self.assertEqual(self.constraint_manager.constraint_summary['faces'], 2)
+
+class TestConstraintRuleTable(unittest.TestCase):
+    """Tests pour la table déclarative des règles de contraintes"""
+
+    def setUp(self):
+        self.original_data = pd.DataFrame({
+            'input_nom_zone': ['promo', 'standard', 'promo']
+        })
+        self.predictions = {
+            'furniture_type': np.array([1, 1, 1]),
+            'dimensions': {'largeur': np.array([120.0, 120.0, 120.0])},
+            'positions': {
+                'face': np.array(['front', 'front', 'front']),
+                'etagere': np.array([1, 2, 1]),
+                'colonne': np.array([4, 4, 4]),
+                'quantite': np.array([2, 2, 2])
+            }
+        }
+        self.store_rule = {
+            'group': 'promo_magasin', 'priority': 95, 'column': 'input_nom_zone',
+            'predicate': ['eq', 'promo'], 'target': 'positions.quantite', 'action': ['max', 6],
+            'label': "Zone promo → facing élargi"
+        }
+
+    def test_store_specific_rule(self):
+        """Test d'une règle ajoutée sans modification du code"""
+        constraint_manager = ConstraintManager()
+        constraint_manager.add_rules([self.store_rule])
+        constrained = constraint_manager.apply_constraints(self.predictions, self.original_data)
+
+        np.testing.assert_array_equal(constrained['positions']['quantite'], [6, 2, 6])
+        self.assertEqual(constraint_manager.constraint_summary['promo_magasin'], 2)
+
+    def test_rules_file(self):
+        """Test du chargement de règles depuis un fichier JSON"""
+        rules_file = 'test_rules.json'
+        with open(rules_file, 'w', encoding='utf-8') as f:
+            json.dump([self.store_rule], f)
+
+        try:
+            constraint_manager = ConstraintManager()
+            constraint_manager.load_rules_file(rules_file)
+            self.assertIn('contraintes_promo_magasin', constraint_manager.get_all_constraints_info())
+        finally:
+            os.remove(rules_file)
+
+    def test_rules_skipped_when_column_absent(self):
+        """Test que les règles sans colonne d'entrée disponible ne sont pas exécutées"""
+        constraint_manager = ConstraintManager()
+        constraint_manager.apply_constraints(self.predictions, self.original_data)
+        summary = constraint_manager.constraint_summary
+
+        self.assertEqual(set(summary), {'faces', 'dimensions'})
+
+    def test_invalid_rule(self):
+        """Test du rejet d'une règle invalide à la compilation"""
+        invalid_rule = dict(self.store_rule, action=['double', 2])
+        with self.assertRaises(ValueError):
+            ConstraintManager(rules=[invalid_rule])
+
+    def test_constraints_info_from_rules(self):
+        """Test de la description des contraintes générée depuis la table"""
+        info = ConstraintManager().get_all_constraints_info()
+
+        self.assertEqual(len(info), 10)
+        self.assertIn('input_placement_exige_supplier', info['contraintes_fournisseur']['colonnes_utilisees'])
+        self.assertIn("Niveau œil → étagères 3-4", info['contraintes_fournisseur']['actions'])
+
 class TestPlanogramAIPipeline(unittest.TestCase):
     """Tests pour le pipeline principal"""
     
@@ -166,6 +787,15 @@ class TestPlanogramAIPipeline(unittest.TestCase):
         self.assertIsNotNone(self.pipeline.raw_data)
         self.assertIsNotNone(self.pipeline.processed_data)
     
+    def test_in_memory_data(self):
+        """Test du pipeline sur des données en mémoire (sans lecture du CSV)"""
+        data = pd.read_csv(self.test_file)
+        pipeline = PlanogramAIPipeline('fichier_inexistant.csv', data=data)
+
+        self.assertTrue(pipeline.load_and_preprocess_data())
+        self.assertIs(pipeline.raw_data, data)
+        self.assertEqual(len(pipeline.processed_data), len(data))
+
     def test_generate_planogram(self):
         """Test de génération de planogramme"""
         # Chargement des données
@@ -182,6 +812,114 @@ class TestPlanogramAIPipeline(unittest.TestCase):
         self.assertIn('dimensions', results)
         self.assertIn('positions', results)
     
+    def test_batch_pipeline(self):
+        """Test de la génération par lots (une passe, un résultat par couple magasin/catégorie)"""
+        self.pipeline.load_and_preprocess_data()
+        self.pipeline.train_models()
+        raw_data = self.pipeline.raw_data
+
+        batch_results = self.pipeline.run_batch_pipeline()
+
+        expected_groups = raw_data.groupby(['input_magasin_id', 'input_categorie_id']).size()
+        self.assertEqual(set(batch_results), set(expected_groups.index))
+        for key, results in batch_results.items():
+            self.assertEqual(len(results['furniture_type']), expected_groups[key])
+            self.assertEqual(len(results['positions']['face']), expected_groups[key])
+
+        documents = self.pipeline.generate_batch_json_output(batch_results)
+        self.assertEqual(len(documents), len(batch_results))
+        self.assertEqual({(doc['planogram_info']['magasin_id'], doc['planogram_info']['categorie_id'])
+                          for doc in documents}, set(batch_results))
+        for doc in documents:
+            group = raw_data[(raw_data['input_magasin_id'] == doc['planogram_info']['magasin_id']) &
+                             (raw_data['input_categorie_id'] == doc['planogram_info']['categorie_id'])]
+            self.assertEqual([position['produit_id'] for position in doc['product_positions']],
+                             group['input_produit_id'].tolist())
+
+    def test_positions_keep_input_product_ids(self):
+        """Test : produit_id des positions = identifiant d'entrée, même inconnu des encodeurs"""
+        self.pipeline.load_and_preprocess_data()
+        self.pipeline.train_models()
+        new_rows = self.pipeline.raw_data.head(5).assign(input_produit_id=[f'NEW_{i}' for i in range(5)])
+
+        results = self.pipeline.run_filtered_pipeline(new_rows)
+        json_output = self.pipeline.generate_json_output(results)
+
+        self.assertEqual([position['produit_id'] for position in json_output['product_positions']],
+                         [f'NEW_{i}' for i in range(5)])
+
+    def test_chunked_pipeline_keeps_input_product_ids(self):
+        """Test : le traitement par blocs garde les identifiants produit inconnus des encodeurs"""
+        self.pipeline.load_and_preprocess_data()
+        self.pipeline.train_models()
+        new_ids = [f'NEW_{i:03d}' for i in range(20)]
+        pd.read_csv(self.test_file).assign(input_produit_id=new_ids).to_csv(self.test_file, index=False)
+
+        chunks = list(self.pipeline.run_chunked_pipeline(chunksize=8))
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual([product_id for results in chunks for product_id in results['positions']['produit_id']],
+                         new_ids)
+
+    def test_ndjson_output(self):
+        """Test de la sortie NDJSON par blocs"""
+        results = {
+            'furniture_type': np.array([1, 2, 3, 9, 2]),
+            'dimensions': {
+                'largeur': np.array([120.0, 150.0, 100.0, 80.0, 150.0]),
+                'hauteur': np.array([180.0, 200.0, 160.0, 190.0, 200.0]),
+                'profondeur': np.array([40.0, 45.0, 35.0, 70.0, 45.0]),
+                'nb_etageres_front_back': np.array([0, 4, 3, 0, 5])
+            },
+            'positions': {
+                'face': np.array(['front', 'back', 'left', 'front', 'front']),
+                'etagere': np.array([3, 4, 2, 1, 2]),
+                'colonne': np.array([2, 3, 1, 1, 4]),
+                'quantite': np.array([4, 6, 3, 2, 1])
+            }
+        }
+
+        chunks = list(self.pipeline.iter_ndjson_output(results, 'MAG_001', 'CAT_001', chunk_size=2))
+        lines = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+
+        # En-tête + 3 blocs (2 + 2 + 1 lignes)
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(lines[0]['type'], 'planogram_info')
+        furniture = [line for line in lines if line['type'] == 'furniture']
+        positions = [line for line in lines if line['type'] == 'product_position']
+        self.assertEqual(len(furniture), 5)
+        self.assertEqual(len(positions), 5)
+
+        self.assertEqual(furniture[2]['furniture_type_name'], 'shelves-display')
+        self.assertEqual(furniture[2]['available_faces'], ['front', 'back', 'left', 'right'])
+        self.assertEqual(furniture[1]['nb_etageres_front_back'], 4)
+        self.assertEqual(furniture[1]['nb_colonnes_front_back'], 0)
+        self.assertEqual(positions[4], {'type': 'product_position', 'position_id': 'POS_005',
+                                        'furniture_id': 'FURN_005', 'produit_id': 'PROD_005',
+                                        'face': 'front', 'etagere': 2, 'colonne': 4, 'quantite': 1})
+
+    def test_serialize_json_backends_match(self):
+        """Test : orjson et le repli json produisent le même document JSON valide (NaN → null, clés non textuelles)"""
+        if main_pipeline.orjson is None:
+            self.skipTest("orjson non installé")
+        payload = {
+            'valeurs': np.array([1.5, np.nan, np.inf]),
+            'scalaires': [np.float64(np.nan), np.int64(7), float('-inf'), 'texte é'],
+            1: {'imbriqué': np.float32(2.5)},
+            True: None,
+            2.5: 'clé flottante'
+        }
+
+        def strict_loads(data: bytes):
+            return json.loads(data, parse_constant=lambda constant: self.fail(f"Constante invalide: {constant}"))
+
+        for pretty in (False, True):
+            with_orjson = serialize_json(payload, pretty=pretty)
+            with mock.patch.object(main_pipeline, 'orjson', None):
+                with_stdlib = serialize_json(payload, pretty=pretty)
+            self.assertEqual(strict_loads(with_stdlib), strict_loads(with_orjson))
+        self.assertEqual(strict_loads(with_stdlib)['valeurs'], [1.5, None, None])
+
     def test_json_output(self):
         """Test de génération JSON"""
         # Données de test simulées
@@ -213,6 +951,162 @@ class TestPlanogramAIPipeline(unittest.TestCase):
         self.assertEqual(len(json_output['furniture']), 3)
         self.assertEqual(len(json_output['product_positions']), 3)
 
+    def test_json_output_links_positions(self):
+        """Test du rattachement des positions aux meubles et des statistiques de la sortie JSON"""
+        n_rows = 1200
+        mock_results = {
+            'furniture_type': np.tile([1, 2, 3], n_rows // 3),
+            'dimensions': {
+                'largeur': np.full(n_rows, 100.0),
+                'hauteur': np.full(n_rows, 180.0),
+                'profondeur': np.full(n_rows, 40.0)
+            },
+            'positions': {
+                'face': np.tile(['front', 'back', 'front'], n_rows // 3),
+                'etagere': np.ones(n_rows, dtype=int),
+                'colonne': np.ones(n_rows, dtype=int),
+                'quantite': np.full(n_rows, 2)
+            }
+        }
+
+        json_output = self.pipeline.generate_json_output(mock_results)
+
+        self.assertEqual(len(json_output['furniture']), n_rows)
+        furniture_ids = {item['furniture_id'] for item in json_output['furniture']}
+        self.assertTrue(all(position['furniture_id'] in furniture_ids
+                            for position in json_output['product_positions']))
+        self.assertEqual(json_output['furniture'][1]['available_faces'], ['front', 'back'])
+
+        statistics = json_output['statistics']
+        self.assertEqual(statistics['total_products'], n_rows)
+        self.assertEqual(statistics['total_quantite'], 2 * n_rows)
+        self.assertEqual(statistics['face_distribution']['front'], 800)
+        self.assertEqual(statistics['face_distribution']['left'], 0)
+
+class TestResultCache(unittest.TestCase):
+    """Tests du cache LRU + TTL des résultats"""
+
+    def setUp(self):
+        self.data = pd.DataFrame({'input_produit_id': ['P1', 'P2'], 'input_prix_produit': [1.0, 2.0]})
+
+    def test_key_depends_on_rows_and_params(self):
+        """Test de la clé : mêmes lignes et paramètres → même clé"""
+        key = ResultCache.make_key(self.data, optimization_level=3, model_version='v1')
+        self.assertEqual(key, ResultCache.make_key(self.data.copy(), model_version='v1', optimization_level=3))
+        self.assertNotEqual(key, ResultCache.make_key(self.data, optimization_level=4, model_version='v1'))
+        self.assertNotEqual(key, ResultCache.make_key(self.data, optimization_level=3, model_version='v2'))
+
+        changed = self.data.copy()
+        changed.loc[1, 'input_prix_produit'] = 2.5
+        self.assertNotEqual(key, ResultCache.make_key(changed, optimization_level=3, model_version='v1'))
+
+    def test_lru_eviction_and_metrics(self):
+        """Test de l'éviction LRU et des compteurs"""
+        cache = ResultCache(max_entries=2)
+        cache.put('a', {'value': 1})
+        cache.put('b', {'value': 2})
+        self.assertEqual(cache.get('a'), {'value': 1})
+        cache.put('c', {'value': 3})
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), {'value': 3})
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (2, 1, 1))
+
+        # Copie à la lecture : le cache n'est pas modifié par l'appelant
+        cache.get('a')['value'] = 99
+        self.assertEqual(cache.get('a'), {'value': 1})
+
+    def test_ttl_expiration(self):
+        """Test de l'expiration des entrées"""
+        cache = ResultCache(ttl_seconds=0)
+        cache.put('a', {'value': 1})
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+class TestModelPersistence(unittest.TestCase):
+    """Tests pour la sauvegarde et le chargement des modèles entraînés"""
+
+    def setUp(self):
+        test_data = pd.DataFrame({
+            'input_produit_id': [f'PROD_{i:03d}' for i in range(1, 31)],
+            'input_prix_produit': np.random.uniform(5, 50, 30),
+            'input_longueur_produit': np.random.uniform(10, 30, 30),
+            'input_largeur_produit': np.random.uniform(5, 20, 30),
+            'input_contrainte_temperature_produit': np.random.choice([0, 1], 30),
+            'input_magasin_id': np.random.choice(['MAG_001', 'MAG_002'], 30),
+            'input_categorie_id': np.random.choice(['CAT_001', 'CAT_002'], 30),
+        })
+
+        self.test_file = 'test_persistence_data.csv'
+        self.model_file = 'test_models/planogram_models.joblib'
+        test_data.to_csv(self.test_file, index=False)
+
+        self.pipeline = PlanogramAIPipeline(self.test_file)
+        self.pipeline.load_and_preprocess_data()
+        self.pipeline.train_models()
+
+    def tearDown(self):
+        for path in [self.test_file, self.model_file]:
+            if os.path.exists(path):
+                os.remove(path)
+        if os.path.isdir('test_models'):
+            os.rmdir('test_models')
+
+    def test_save_and_load(self):
+        """Test de l'aller-retour sauvegarde / chargement"""
+        self.assertTrue(self.pipeline.save_models(self.model_file))
+
+        loaded = PlanogramAIPipeline.from_artifact(self.model_file, self.test_file)
+        self.assertTrue(loaded.models.is_trained)
+        self.assertEqual(loaded.models.feature_columns, self.pipeline.models.feature_columns)
+        self.assertEqual(set(loaded.data_processor.label_encoders),
+                         set(self.pipeline.data_processor.label_encoders))
+        self.assertEqual(loaded.data_processor.numeric_medians, self.pipeline.data_processor.numeric_medians)
+
+        X = self.pipeline.models._select_features(self.pipeline.processed_data)
+        np.testing.assert_array_equal(
+            loaded.models.furniture_type_predictor.predict(X),
+            self.pipeline.models.furniture_type_predictor.predict(X)
+        )
+
+    def test_load_missing_artifact(self):
+        """Test du chargement d'un artefact inexistant"""
+        pipeline = PlanogramAIPipeline(self.test_file)
+        self.assertFalse(pipeline.load_models('missing/planogram_models.joblib'))
+        self.assertFalse(pipeline.models.is_trained)
+
+    def test_registry_hot_reload(self):
+        """Test du registre partagé : chargement unique puis rechargement si l'artefact change"""
+        self.pipeline.save_models(self.model_file)
+        registry = PipelineRegistry(self.model_file, self.test_file)
+
+        shared = registry.get()
+        self.assertTrue(shared.models.is_trained)
+        self.assertIs(registry.get(), shared)
+
+        # Pipeline de requête : modèles partagés, encodeurs copiés
+        request_pipeline = registry.create_pipeline(self.pipeline.raw_data.head(5))
+        self.assertIs(request_pipeline.models, shared.models)
+        self.assertIsNot(request_pipeline.data_processor.label_encoders, shared.data_processor.label_encoders)
+
+        # Nouvel artefact → remplacement à la prochaine demande
+        self.pipeline.save_models(self.model_file)
+        stat = os.stat(self.model_file)
+        os.utime(self.model_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNot(registry.get(), shared)
+        self.assertEqual(registry.status()['reload_count'], 2)
+
+    def test_unseen_categories_after_load(self):
+        """Test de l'inférence avec des valeurs inconnues des encodeurs"""
+        self.pipeline.save_models(self.model_file)
+        loaded = PlanogramAIPipeline.from_artifact(self.model_file, self.test_file)
+
+        new_data = self.pipeline.raw_data.head(5).copy()
+        new_data['input_magasin_id'] = 'MAG_999'
+        results = loaded.run_filtered_pipeline(new_data)
+        self.assertEqual(len(results['furniture_type']), 5)
+
 def run_performance_test():
     """Test de performance avec un dataset plus large"""
     print("🚀 Test de performance...")
@@ -14,7 +14,8 @@ from io import StringIO
 
 # Import du pipeline principal
 try:
-    from main_pipeline import PlanogramAIPipeline
+    from main_pipeline import (DatasetCache, PipelineRegistry, ResultCache, serialize_json,
+                               DEFAULT_OPTIMIZATION_LEVEL, OPTIMIZATION_LEVELS, optimization_chain)
 except ImportError as e:
     st.error(f"❌ Erreur d'import: {e}")
     st.stop()
@@ -22,6 +23,10 @@ except ImportError as e:
 # Configuration du chemin (en haut du fichier)
 #DATA_PATH = r"C:\Users\Dell\Desktop\Smart-Store\SmartStore-IA\dataset.csv"
 DATA_PATH = 'data/dataset.csv'
+# Artefact des modèles entraînés (généré par main_pipeline.py)
+MODEL_PATH = 'models/planogram_models.joblib'
+# Cache Parquet des données parsées (démarrages à chaud sans relecture du CSV)
+CACHE_DIR = 'cache'
 # NOUVEAU: Chemin pour le fichier de transfert DIRECT
 TRANSFER_FILE = "planogram_transfer.json"
 TRANSFER_DIR = "transfer"
@@ -344,26 +349,6 @@ def detect_csv_separator_and_encoding(content):
     return best_result
 
 
-def map_product_ids(json_output, original_data):
-    """Remplace complètement les IDs générés par les IDs originaux"""
-    if 'input_produit_id' not in original_data.columns:
-        return json_output
-
-    # Créer un mapping complet
-    id_mapping = {}
-    for i, (_, row) in enumerate(original_data.iterrows(), 1):
-        generated_id = f"PROD_{i:03d}"
-        original_id = row['input_produit_id']
-        id_mapping[generated_id] = original_id
-
-    # Mapper les IDs dans product_positions
-    for position in json_output['product_positions']:
-        generated_id = position['produit_id']
-        if generated_id in id_mapping:
-            position['produit_id'] = id_mapping[generated_id]
-
-    return json_output
-
 # Fonction pour générer des données d'exemple
 @st.cache_data
 def generate_sample_data():
@@ -452,6 +437,13 @@ def load_data_safe(file_path=None, uploaded_file=None):
 
     elif file_path and os.path.exists(file_path):
         try:
+            # Démarrage à chaud : fichier déjà parsé et inchangé → lecture du cache Parquet
+            dataset_cache = DatasetCache(CACHE_DIR)
+            cached = dataset_cache.load(file_path, 'dashboard')
+            if cached is not None:
+                st.success(f"⚡ Fichier chargé depuis le cache: {file_path}")
+                return cached[0]
+
             # Même logique pour les fichiers locaux
             with open(file_path, 'rb') as f:
                 content = f.read()
@@ -467,6 +459,7 @@ def load_data_safe(file_path=None, uploaded_file=None):
             data = pd.read_csv(string_io, sep=detection_result['separator'])
 
             if not data.empty and len(data.columns) > 0:
+                dataset_cache.save(file_path, 'dashboard', data)
                 st.success(f"✅ Fichier chargé depuis: {file_path}")
                # st.success(f"Encodage détecté: {detection_result['encoding']}")
                 #st.success(f"Séparateur détecté: '{detection_result['separator']}'")
@@ -493,18 +486,44 @@ def load_data_safe(file_path=None, uploaded_file=None):
         return generate_sample_data()
 
 
+@st.cache_resource
+def load_pipeline_registry():
+    """Registre des modèles entraînés partagé entre les sessions (rechargé si l'artefact change)"""
+    return PipelineRegistry(MODEL_PATH)
+
+
+@st.cache_resource
+def load_result_cache():
+    """Cache des planogrammes générés partagé entre les sessions"""
+    return ResultCache()
+
+
 # Sidebar pour la configuration
 st.sidebar.header("⚙️ Configuration")
 
+pipeline_registry = load_pipeline_registry()
+trained_pipeline = pipeline_registry.get()
+if trained_pipeline.models.is_trained:
+    st.sidebar.success("🧠 Modèles entraînés chargés")
+else:
+    st.sidebar.warning(f"⚠️ Aucun modèle entraîné trouvé ({MODEL_PATH})")
+
 # Configuration des paramètres
 st.sidebar.subheader("🎛️ Paramètres de génération")
 
+def level_budget(level):
+    """Budget de temps total d'un niveau d'optimisation, étapes des niveaux inférieurs comprises"""
+    return sum(OPTIMIZATION_LEVELS[step]['time_budget'] + OPTIMIZATION_LEVELS[step]['refine_budget']
+               for step in optimization_chain(level))
+
+
 optimization_level = st.sidebar.slider(
     "Niveau d'optimisation",
     min_value=1,
     max_value=5,
-    value=3,
-    help="1=Rapide, 5=Qualité maximale"
+    value=DEFAULT_OPTIMIZATION_LEVEL,
+    help=", ".join(f"{level}={tier['label']}" + (f" ({level_budget(level):g} s)" if level_budget(level) else "")
+                   for level, tier in OPTIMIZATION_LEVELS.items())
 )
 
 apply_temperature_constraints = st.sidebar.checkbox(
@@ -656,31 +675,41 @@ with tab2:
                     if filtered_data.empty:
                         st.error("❌ Aucune donnée après filtrage!")
                     else:
-                        # Sauvegarde temporaire des données
-                        temp_file = "temp_data.csv"
-                        filtered_data.to_csv(temp_file, index=False)
-
-                        # Initialisation du pipeline
-                        st.session_state.pipeline = PlanogramAIPipeline(temp_file)
+                        # Initialisation du pipeline sur les données en mémoire (modèles pré-entraînés si disponibles)
+                        st.session_state.pipeline = pipeline_registry.create_pipeline(filtered_data)
 
-                        # Génération
-                        results = st.session_state.pipeline.run_filtered_pipeline(
+                        # Résultat déjà généré pour ces lignes, ces paramètres et ces modèles ?
+                        result_cache = load_result_cache()
+                        cache_key = ResultCache.make_key(
                             filtered_data,
-                            magasin_id=magasin_selected if magasin_selected != "Tous" else "MAG_001",
-                            categorie_id=categorie_selected if categorie_selected != "Toutes" else "CAT_001"
+                            magasin_id=magasin_selected,
+                            categorie_id=categorie_selected,
+                            optimization_level=optimization_level,
+                            apply_temperature_constraints=apply_temperature_constraints,
+                            model_version=st.session_state.pipeline.model_version
                         )
+                        json_output = result_cache.get(cache_key)
 
-                        if results:
-                            # Génération du JSON final
-                            json_output = st.session_state.pipeline.generate_json_output(
-                                results,
+                        if json_output is None:
+                            # Génération
+                            results = st.session_state.pipeline.run_filtered_pipeline(
+                                filtered_data,
                                 magasin_id=magasin_selected if magasin_selected != "Tous" else "MAG_001",
-                                categorie_id=categorie_selected if categorie_selected != "Toutes" else "CAT_001"
+                                categorie_id=categorie_selected if categorie_selected != "Toutes" else "CAT_001",
+                                optimization_level=optimization_level
                             )
 
-                            # Appliquer le mapping des IDs
-                            json_output = map_product_ids(json_output, filtered_data)
+                            if results:
+                                # Génération du JSON final
+                                json_output = st.session_state.pipeline.generate_json_output(
+                                    results,
+                                    magasin_id=magasin_selected if magasin_selected != "Tous" else "MAG_001",
+                                    categorie_id=categorie_selected if categorie_selected != "Toutes" else "CAT_001"
+                                )
+
+                                result_cache.put(cache_key, json_output)
 
+                        if json_output:
                             st.session_state.results = json_output
 
                             st.markdown("""
@@ -759,7 +788,7 @@ with tab3:
 
         # Affichage animé du JSON généré
         with st.expander("📄 Afficher le JSON généré (avec effet visuel)", expanded=True):
-            json_str = json.dumps(results, indent=2, ensure_ascii=False)
+            json_str = serialize_json(results, pretty=True).decode('utf-8')
 
             # Créer un effet de chargement progressif
             placeholder = st.empty()